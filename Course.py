@@ -1,10 +1,15 @@
-import pandas as pd
-import numpy as np
-from io import StringIO
+from pipeline import CoursePipeline, lazy_attributes
 
-with open('https://sportedgegolf.slack.com/files/U059KPH86CB/F05QZKBFRJN/course2023.txt', 'r', encoding='utf-8', errors='ignore') as file:
-    content = file.read()
+# Local copy of course2023.txt; a URL to a mirror works too
+COURSE_PATH = 'C:/Users/Owner/OneDrive/Desktop/SportEdge/data/course2023.txt'
 
-raw_course_stats = pd.read_csv(StringIO(content), delimiter=';')
-raw_course_stats = raw_course_stats.rename(columns={col: col.replace('#', '') for col in raw_shot_stats.columns})
-raw_course_stats.columns = raw_course_stats.columns.str.strip()
\ No newline at end of file
+courses = CoursePipeline(COURSE_PATH)
+
+# Module attributes computed on first access, so importing this module does no work
+__getattr__ = lazy_attributes(__name__, {
+    'course_stats': lambda: courses.result(),
+})
+
+
+if __name__ == '__main__':
+    print(courses.result().head())
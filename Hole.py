@@ -1,30 +1,33 @@
-import pandas as pd
-import numpy as np
-from io import StringIO
-from hole_helper_functions import hole_cleaner, hole_missing_data_handler, hole_feature_engineering
-
-with open('C:/Users/Owner/OneDrive/Desktop/SportEdge/data/rhole.txt', 'r', encoding='utf-8', errors='ignore') as hole_file:
-    content = hole_file.read()
-raw_hole_stats = pd.read_csv(StringIO(content), delimiter=';')
-
-# Clean & deal with missing data
-hole_stats = hole_cleaner(raw_hole_stats)
-hole_stats = hole_missing_data_handler(hole_stats)
-
-# Feature Engineering
-hole_stats = hole_feature_engineering(hole_stats)
-
-# Assign Players to teams
-US_players = [
-    32102, 39977, 51766, 47504, 27644, 35450,
-    48081, 50525, 33448, 34046, 46046, 36689
-]
-Int_players = [
-    28089, 29926, 31646, 32839, 39997, 45157,
-    48119, 33399, 37455, 39058, 39971
-]
-US_Team_holes = hole_stats['PlayerID'].isin(US_players)
-Int_Team_holes = hole_stats['PlayerID'].isin(Int_players)
-
-print(hole_stats['PlayerID'].isin(US_players).any())
-print(hole_stats['PlayerID'].isin(Int_players).any())
+import functools
+
+from pipeline import HolePipeline, lazy_attributes
+from query_helper_functions import ROSTERS_PATH, TableIndex, load_rosters
+
+HOLE_PATH = 'C:/Users/Owner/OneDrive/Desktop/SportEdge/data/rhole.txt'
+
+# Read & clean in chunks, deal with missing data & feature engineering. Nothing runs until a result is asked for.
+holes = HolePipeline(HOLE_PATH)
+
+
+@functools.cache
+def hole_index():
+    """
+    Indexed query layer over the processed holes, with teams from the roster config
+    """
+    return TableIndex(holes.result(), rosters=load_rosters(ROSTERS_PATH))
+
+
+# Module attributes computed on first access, so importing this module does no work
+__getattr__ = lazy_attributes(__name__, {
+    'hole_stats': lambda: holes.result(),
+    'US_Team_holes': lambda: hole_index().team('US'),
+    'Int_Team_holes': lambda: hole_index().team('International'),
+})
+
+
+if __name__ == '__main__':
+    holes.result()
+    print(holes.profiler.table())
+    holes.profiler.to_json('holes_profile.json')
+    print(len(hole_index().team('US')) > 0)
+    print(len(hole_index().team('International')) > 0)
@@ -1,39 +1,32 @@
-import pandas as pd
-import numpy as np
-from io import StringIO
-from shot_helper_functions import shots_cleaner, Strokes_Gained_Category, relative_SG, detailed_category, shot_feature_engineering, missing_shots_handler
+import functools
 
-with open('C:/Users/Owner/OneDrive/Desktop/SportEdge/data/rshot.txt', 'r', encoding='utf-8', errors='ignore') as file:
-    content = file.read()
+from pipeline import ShotPipeline, lazy_attributes
+from query_helper_functions import ROSTERS_PATH, TableIndex, load_rosters
 
-raw_shot_stats = pd.read_csv(StringIO(content), delimiter=';')
+SHOT_PATH = 'C:/Users/Owner/OneDrive/Desktop/SportEdge/data/rshot.txt'
 
-# Clean
-shot_stats = shots_cleaner(raw_shot_stats)
+# Read & clean in chunks, add Strokes Gained categories, deal with missing data, relative SG & feature engineering.
+# Nothing runs until a result is asked for; cleaned stages are cached on disk.
+shots = ShotPipeline(SHOT_PATH)
 
-# Add Strokes Gained categories
-shot_stats['SGCategory'] = shot_stats.apply(Strokes_Gained_Category, axis=1)
 
-# Deal with initial missing data
-shot_stats = missing_shots_handler(shot_stats)
+@functools.cache
+def shot_index():
+    """
+    Indexed query layer over the processed shots, with teams from the roster config
+    """
+    return TableIndex(shots.result(), rosters=load_rosters(ROSTERS_PATH))
 
-# Compute relevant Strokes Gained metrics
-relative_SG(shot_stats)
-shot_stats['detailed_category'] = shot_stats.apply(detailed_category, axis=1)
 
-# Feature Engineering
-shot_stats = shot_feature_engineering(shot_stats)
+# Module attributes computed on first access, so importing this module (e.g. in a worker process) does no work
+__getattr__ = lazy_attributes(__name__, {
+    'shot_stats': lambda: shots.result(),
+    'US_Team_shots': lambda: shot_index().team('US'),
+    'Int_Team_shots': lambda: shot_index().team('International'),
+})
 
-# Assign Players to teams
-US_players = [
-    32102, 39977, 51766, 47504, 27644, 35450,
-    48081, 50525, 33448, 34046, 46046, 36689
-]
-Int_players = [
-    28089, 29926, 31646, 32839, 39997, 45157,
-    48119, 33399, 37455, 39058, 39971
-]
-
-US_Team_shots = shot_stats[shot_stats['PlayerID'].isin(US_players)]
-Int_Team_shots = shot_stats[shot_stats['PlayerID'].isin(Int_players)]
 
+if __name__ == '__main__':
+    shots.result()
+    print(shots.profiler.table())
+    shots.profiler.to_json('shots_profile.json')
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from hole_helper_functions import categorize_hole_lengths, hole_feature_engineering, hole_missing_data_handler, \
+    load_hole_stats, validate_holes
+from profiling_helper_functions import PipelineProfiler
+from shot_helper_functions import add_detailed_category, add_SG_category, missing_shots_handler, relative_SG, \
+    shot_feature_engineering, load_shot_stats, validate_shots
+from synthetic_data import event_layout, write_synthetic_data
+
+# Shot row counts the suite runs at, generated data is cached in BENCH_DATA_DIR
+SUITE_SIZES = (10_000, 1_000_000, 10_000_000)
+BENCH_DATA_DIR = '.bench_data'
+BASELINE_PATH = 'benchmark_baseline.json'
+# A case regresses when its time or peak memory is more than this fraction above the baseline
+REGRESSION_TOLERANCE = 0.25
+# Slowdowns of less than this many seconds are timer noise at the small sizes & never flagged
+REGRESSION_MIN_SECONDS = 0.02
+# Sizes above this are timed once rather than best of 3
+SINGLE_RUN_ROWS = 1_000_000
+
+
+def synthetic_files(rows, data_dir=BENCH_DATA_DIR, seed=0):
+    """
+    Paths of synthetic rshot/rhole files with roughly `rows` shot rows. Generated on first use & reused after.
+    """
+    events, players = event_layout(rows)
+    name = f'{events}x{players}_{seed}'
+    shot_path = os.path.join(data_dir, f'rshot_{name}.txt')
+    hole_path = os.path.join(data_dir, f'rhole_{name}.txt')
+    if not (os.path.exists(shot_path) and os.path.exists(hole_path)):
+        os.makedirs(data_dir, exist_ok=True)
+        # Written under temporary names so an interrupted run doesn't leave a partial file behind
+        write_synthetic_data(shot_path + '.tmp', hole_path + '.tmp', events=events, players=players, seed=seed)
+        os.replace(shot_path + '.tmp', shot_path)
+        os.replace(hole_path + '.tmp', hole_path)
+    return shot_path, hole_path
+
+
+def run_case(name, func, make_input, repeat):
+    """
+    Best wall time of func(make_input()) over `repeat` runs, then one traced run for peak memory.
+    Returns the result row & the traced run's output, so stages can be chained.
+    """
+    timings = []
+    for _ in range(repeat):
+        data = make_input()
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    profiler = PipelineProfiler(mode='tracemalloc')
+    output = profiler.run(name, func, make_input())
+    record = profiler.records[0]
+    rows = record['rows_out'] if record['rows_in'] is None else record['rows_in']
+    seconds = min(timings)
+    return {'case': name, 'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds,
+            'peak_mb': record['traced_peak_mb']}, output
+
+
+def _stage_output(func):
+    """
+    Stages that modify in place & return nothing, as a stage returning the frame
+    """
+    def stage(df):
+        func(df)
+        return df
+    stage.__name__ = func.__name__
+    return stage
+
+
+def _with_report(func):
+    def stage(df):
+        return func(df, return_report=True)[0]
+    stage.__name__ = func.__name__
+    return stage
+
+
+SHOT_SUITE_STAGES = [load_shot_stats, _with_report(validate_shots), add_SG_category,
+                     _with_report(missing_shots_handler), _stage_output(relative_SG), add_detailed_category,
+                     shot_feature_engineering]
+HOLE_SUITE_STAGES = [load_hole_stats, _with_report(validate_holes), _with_report(hole_missing_data_handler),
+                     hole_feature_engineering, categorize_hole_lengths]
+
+
+def benchmark_suite(sizes=SUITE_SIZES, data_dir=BENCH_DATA_DIR):
+    """
+    Times every shot & hole pipeline function on synthetic data at each size, each stage fed the previous
+    stage's output. Cases are keyed 'function@size'.
+    """
+    results = []
+    for size in sizes:
+        repeat = 1 if size > SINGLE_RUN_ROWS else 3
+        shot_path, hole_path = synthetic_files(size, data_dir)
+        for path, stages in [(shot_path, SHOT_SUITE_STAGES), (hole_path, HOLE_SUITE_STAGES)]:
+            data = path
+            for stage in stages:
+                make_input = (lambda: path) if data is path else (lambda data=data: data.copy())
+                result, data = run_case(stage.__name__, stage, make_input, repeat)
+                results.append({'key': f'{stage.__name__}@{size}', 'size': size, **result})
+            del data
+    return pd.DataFrame(results)
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """
+    Stores seconds & peak memory per case key, keeping cases from earlier runs that weren't rerun.
+    """
+    baseline = load_baseline(path)
+    baseline.update({row.key: {'seconds': row.seconds, 'peak_mb': row.peak_mb} for row in results.itertuples()})
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=1, sort_keys=True)
+
+
+def compare_to_baseline(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Adds the baseline's seconds & peak memory and flags cases more than `tolerance` above either (for time, also
+    more than REGRESSION_MIN_SECONDS slower). Cases missing from the baseline are never flagged.
+    """
+    results = results.copy()
+    results['baseline_s'] = [baseline.get(key, {}).get('seconds', np.nan) for key in results['key']]
+    results['baseline_mb'] = [baseline.get(key, {}).get('peak_mb', np.nan) for key in results['key']]
+    slower = ((results['seconds'] > results['baseline_s'] * (1 + tolerance))
+              & (results['seconds'] - results['baseline_s'] > REGRESSION_MIN_SECONDS))
+    results['regression'] = slower | (results['peak_mb'] > results['baseline_mb'] * (1 + tolerance))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Synthetic data benchmark suite for the shot & hole pipelines.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[SUITE_SIZES[0]],
+                        help=f'shot rows to run at, e.g. {" ".join(map(str, SUITE_SIZES))} for the full suite')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+    results = compare_to_baseline(benchmark_suite(args.sizes), load_baseline(args.baseline), args.tolerance)
+    print(results.to_string(index=False, float_format=lambda value: f'{value:.3f}'))
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+    elif results['regression'].any():
+        print('Regressions: ' + ', '.join(results.loc[results['regression'], 'key']))
+        sys.exit(1)
@@ -0,0 +1,137 @@
+import argparse
+import multiprocessing as mp
+import resource
+import time
+from io import StringIO
+
+import pandas as pd
+
+from dtype_helper_functions import memory_report
+from hole_helper_functions import hole_cleaner, hole_feature_engineering, hole_missing_data_handler, load_hole_stats
+from shot_helper_functions import add_SG_category, missing_shots_handler, shots_cleaner, load_shot_stats
+from tests.reference_features import merge_hole_features
+
+
+def full_read(path, cleaner):
+    """
+    The original path: whole file read into a string, wrapped in StringIO & parsed in one go.
+    """
+    with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+        content = file.read()
+    return cleaner(pd.read_csv(StringIO(content), delimiter=';'))
+
+
+def _measure(target, args, queue):
+    start = time.perf_counter()
+    df = target(*args)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    queue.put((len(df), seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+
+
+def measure_in_subprocess(target, *args):
+    """
+    Runs target in a fresh process so each measurement gets its own peak RSS. Returns rows, seconds & peak RSS.
+    """
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(target, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def benchmark_loaders(shot_path=None, hole_path=None, chunksize=250_000):
+    """
+    Compares the full-read path with the chunked loaders on peak RSS and rows/sec.
+    """
+    cases = []
+    if shot_path:
+        cases += [('shots full read', full_read, (shot_path, shots_cleaner)),
+                  ('shots chunked', load_shot_stats, (shot_path, chunksize))]
+    if hole_path:
+        cases += [('holes full read', full_read, (hole_path, hole_cleaner)),
+                  ('holes chunked', load_hole_stats, (hole_path, chunksize))]
+    results = []
+    for name, target, args in cases:
+        rows, seconds, peak_rss = measure_in_subprocess(target, *args)
+        results.append({'case': name, 'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds,
+                        'peak_rss_mb': peak_rss / 2 ** 20})
+    return pd.DataFrame(results)
+
+
+def scale_frame(df, rows):
+    """
+    Repeats a frame's rows until it has `rows` rows.
+    """
+    repeats = -(-rows // len(df))
+    return pd.concat([df] * repeats, ignore_index=True).iloc[:rows]
+
+
+def time_function(func, df, repeat=3):
+    """
+    Best wall time of func over `repeat` runs, each on a fresh copy of df.
+    """
+    timings = []
+    for _ in range(repeat):
+        data = df.copy()
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_hole_features(hole_path, rows=1_000_000):
+    """
+    Times hole_feature_engineering against the merge-based implementation it replaced, on the given rhole export
+    scaled to `rows` rows.
+    """
+    hole_stats = scale_frame(hole_missing_data_handler(load_hole_stats(hole_path)), rows)
+    results = []
+    for func in [merge_hole_features, hole_feature_engineering]:
+        seconds = time_function(func, hole_stats)
+        results.append({'case': func.__name__, 'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds})
+    results = pd.DataFrame(results)
+    results['speedup'] = results['seconds'].iloc[0] / results['seconds']
+    return results
+
+
+def benchmark_missing_data(shot_path=None, hole_path=None, rows=5_000_000):
+    """
+    Times missing_shots_handler & hole_missing_data_handler on the given exports scaled to `rows` rows.
+    """
+    results = []
+    if shot_path:
+        shot_stats = scale_frame(add_SG_category(load_shot_stats(shot_path)), rows)
+        seconds = time_function(missing_shots_handler, shot_stats)
+        results.append({'case': 'missing_shots_handler', 'rows': rows, 'seconds': seconds,
+                        'rows_per_sec': rows / seconds})
+    if hole_path:
+        hole_stats = scale_frame(load_hole_stats(hole_path), rows)
+        seconds = time_function(hole_missing_data_handler, hole_stats)
+        results.append({'case': 'hole_missing_data_handler', 'rows': rows, 'seconds': seconds,
+                        'rows_per_sec': rows / seconds})
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the loaders, feature engineering & missing data '
+                                                 'handling on rshot/rhole exports.')
+    parser.add_argument('--shots', help='path to an rshot.txt export')
+    parser.add_argument('--holes', help='path to an rhole.txt export')
+    parser.add_argument('--chunksize', type=int, default=250_000)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows for the feature engineering benchmarks')
+    parser.add_argument('--missing-rows', type=int, default=5_000_000, help='rows for the missing data benchmarks')
+    parser.add_argument('--memory', action='store_true', help='per column memory of the cleaned tables')
+    args = parser.parse_args()
+    if not (args.shots or args.holes):
+        parser.error('give --shots and/or --holes')
+    print(benchmark_loaders(args.shots, args.holes, args.chunksize).to_string(index=False))
+    if args.holes:
+        print(benchmark_hole_features(args.holes, args.rows).to_string(index=False))
+    print(benchmark_missing_data(args.shots, args.holes, args.missing_rows).to_string(index=False))
+    if args.memory and args.shots:
+        print(memory_report(load_shot_stats(args.shots)).to_string())
+    if args.memory and args.holes:
+        print(memory_report(load_hole_stats(args.holes)).to_string())
@@ -0,0 +1,77 @@
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+import dtype_helper_functions
+from benchmark import BENCH_DATA_DIR, HOLE_SUITE_STAGES, SHOT_SUITE_STAGES, SUITE_SIZES, synthetic_files
+
+# Largest fraction the validation stages may add to a pipeline run
+VALIDATION_OVERHEAD_LIMIT = 0.05
+VALIDATION_STAGES = ('validate_shots', 'validate_holes')
+
+
+class _Timed:
+    """
+    Wraps a function & adds up the seconds spent in it
+    """
+    def __init__(self, func):
+        self.func = func
+        self.seconds = 0.0
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def benchmark_validation(rows=SUITE_SIZES[1], data_dir=BENCH_DATA_DIR, repeat=3):
+    """
+    Overhead of validation on the suite pipelines over synthetic data with `rows` shot rows: validation seconds /
+    seconds of the rest of the pipeline, each the best of `repeat` runs. Validation is the validation stages plus the
+    loaders' per row malformed value bookkeeping (malformed_flags), which is taken out of the loader's time.
+    """
+    results = []
+    shot_path, hole_path = synthetic_files(rows, data_dir)
+    malformed_flags = dtype_helper_functions.malformed_flags
+    for pipeline, path, stages in [('shots', shot_path, SHOT_SUITE_STAGES), ('holes', hole_path, HOLE_SUITE_STAGES)]:
+        runs = []
+        for _ in range(repeat):
+            data, validation_seconds, other_seconds = path, 0.0, 0.0
+            for stage in stages:
+                timed = dtype_helper_functions.malformed_flags = _Timed(malformed_flags)
+                try:
+                    start = time.perf_counter()
+                    data = stage(data)
+                    seconds = time.perf_counter() - start
+                finally:
+                    dtype_helper_functions.malformed_flags = malformed_flags
+                if stage.__name__ in VALIDATION_STAGES:
+                    validation_seconds += seconds
+                else:
+                    validation_seconds += timed.seconds
+                    other_seconds += seconds - timed.seconds
+            runs.append((validation_seconds, other_seconds, len(data)))
+            del data
+        validation_seconds = min(run[0] for run in runs)
+        other_seconds = min(run[1] for run in runs)
+        n_rows = runs[0][2]
+        overhead = validation_seconds / other_seconds
+        results.append({'pipeline': pipeline, 'rows': n_rows, 'validation_s': validation_seconds,
+                        'pipeline_s': other_seconds, 'overhead': overhead,
+                        'within_limit': overhead < VALIDATION_OVERHEAD_LIMIT})
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checks the validation stages add under VALIDATION_OVERHEAD_LIMIT '
+                                                 'to the suite pipelines.')
+    parser.add_argument('--rows', type=int, default=SUITE_SIZES[1],
+                        help=f'shot rows of synthetic data, e.g. {SUITE_SIZES[-1]} for the figure the limit is for')
+    args = parser.parse_args()
+    results = benchmark_validation(args.rows)
+    print(results.to_string(index=False, float_format=lambda value: f'{value:.3f}'))
+    sys.exit(0 if results['within_limit'].all() else 1)
@@ -0,0 +1,167 @@
+import hashlib
+import inspect
+import os
+
+DEFAULT_CACHE_DIR = '.stage_cache'
+DEFAULT_MAX_BYTES = 10 * 2 ** 30
+# Part of every stage version: bump to invalidate all cached outputs, e.g. after a pandas upgrade changes parsing
+CACHE_VERSION = 1
+# Stage dependencies are the modules in this directory
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_fingerprint(path, block_size=2 ** 20):
+    """
+    sha256 of a source file's contents, read in blocks so large exports aren't held in memory.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_repo(value):
+    path = getattr(inspect.getmodule(value), '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == PACKAGE_DIR
+
+
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _fingerprint(value, digest, seen):
+    """
+    Feeds value into digest: a repo function's source, closure, defaults & every global it names; a repo class's
+    source & its methods' references; the items of lists, tuples, sets & dicts (rule tables); reprs of scalars.
+    Library functions & other objects only contribute their type.
+    """
+    if isinstance(value, (str, bytes, int, float, complex, bool, type(None))):
+        digest.update(repr(value).encode())
+        return
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        digest.update(f'{type(value).__name__}{len(items)}'.encode())
+        for item in items:
+            _fingerprint(item, digest, seen)
+    elif isinstance(value, dict):
+        digest.update(f'dict{len(value)}'.encode())
+        for key, item in value.items():
+            _fingerprint(key, digest, seen)
+            _fingerprint(item, digest, seen)
+    elif inspect.isfunction(value) and _is_repo(value):
+        value = inspect.unwrap(value)
+        try:
+            digest.update(inspect.getsource(value).encode())
+        except (OSError, TypeError):
+            digest.update(value.__code__.co_code)
+        for cell in value.__closure__ or ():
+            _fingerprint(cell.cell_contents, digest, seen)
+        _fingerprint(value.__defaults__, digest, seen)
+        _fingerprint(value.__kwdefaults__, digest, seen)
+        names = _code_names(value.__code__)
+        for name in sorted(names):
+            if name not in value.__globals__:
+                continue
+            referenced = value.__globals__[name]
+            if inspect.ismodule(referenced):
+                # module.attribute: the attribute names are among the code's names too
+                for attribute in sorted(names):
+                    if _is_repo(referenced) and attribute in vars(referenced):
+                        _fingerprint(vars(referenced)[attribute], digest, seen)
+            else:
+                _fingerprint(referenced, digest, seen)
+    elif inspect.isclass(value) and _is_repo(value):
+        digest.update(inspect.getsource(value).encode())
+        for attribute in vars(value).values():
+            if inspect.isfunction(attribute):
+                _fingerprint(attribute, digest, seen)
+    else:
+        digest.update(type(value).__qualname__.encode())
+
+
+def stage_version(stage):
+    """
+    Version of a stage function: a hash of CACHE_VERSION, its `cache_version` attribute if set, its source & the
+    repo functions, classes & rule tables it references, followed transitively. Editing a stage or something it calls
+    invalidates its cached output, but not that of stages which don't use it.
+    """
+    digest = hashlib.sha256(f'{CACHE_VERSION}:{getattr(stage, "cache_version", None)}'.encode())
+    _fingerprint(inspect.unwrap(stage), digest, set())
+    return digest.hexdigest()
+
+
+def stage_key(parent_key, stage):
+    """
+    Cache key of a stage's output: chains the key of its input, so a changed stage also invalidates every later one.
+    """
+    return hashlib.sha256(f'{parent_key}:{stage.__name__}:{stage_version(stage)}'.encode()).hexdigest()
+
+
+def write_frame(df, path):
+    """
+    Writes a frame as uncompressed Feather (Arrow IPC) so it can be memory-mapped on read.
+    """
+    tmp_path = path + '.tmp'
+    df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def read_frame(path):
+    """
+    Memory-maps a Feather file written by write_frame.
+    """
+    from pyarrow import feather
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+def evict(cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Deletes least recently used cache files until the cache directory is under max_bytes.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.feather'):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+
+
+def run_cached_stages(source_path, stages, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Runs a pipeline of stages over a source file, caching each stage's output.
+    The first stage takes the source path (e.g. load_shot_stats), the rest take & return a DataFrame.
+    Only stages after the last valid cached output are run.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = file_fingerprint(source_path)
+    paths = []
+    for stage in stages:
+        key = stage_key(key, stage)
+        paths.append(os.path.join(cache_dir, f'{stage.__name__}-{key}.feather'))
+
+    df = None
+    start = 0
+    for i in reversed(range(len(stages))):
+        if os.path.exists(paths[i]):
+            os.utime(paths[i])
+            df = read_frame(paths[i])
+            start = i + 1
+            break
+    for i in range(start, len(stages)):
+        df = stages[i](source_path) if i == 0 else stages[i](df)
+        write_frame(df, paths[i])
+    evict(cache_dir, max_bytes)
+    return df
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from dtype_helper_functions import coerce_column_types, event_id
+from hole_helper_functions import categorize_hole_lengths
+from io_helper_functions import clean_column_name
+from shot_helper_functions import FIELD_DISTANCE_CATEGORIES
+
+COURSE_COLUMN_NAMES = {
+    'Tourn.': 'TournID',
+    'Tournament Schedule': 'TournID',
+    'Tournament Year': 'Year',
+    'Course': 'CourseID',
+    'Par Value': 'Par',
+    'Actual Yard': 'Yardage',
+}
+# Types for the course columns that are present; other columns are left as parsed
+COURSE_COLUMN_TYPES = {
+    'Year': 'Int16',
+    'TournID': 'Int16',
+    'CourseID': 'Int32',
+    'EventID': 'Int32',
+    'Round': 'Int8',
+    'Hole': 'Int8',
+    'Par': 'Int8',
+    'Yardage': 'Int16',
+}
+
+
+def course_cleaner(raw_course_stats, vocabularies=None):
+    """
+    Cleans course stats: strips '#' & whitespace from the headers, renames the shared columns like the shot & hole
+    cleaners & types the ones present.
+    """
+    course_stats = raw_course_stats.rename(columns=clean_column_name).rename(columns=COURSE_COLUMN_NAMES)
+    if 'Year' in course_stats and 'TournID' in course_stats:
+        course_stats['EventID'] = event_id(course_stats['Year'], course_stats['TournID'])
+    column_types = {column: dtype for column, dtype in COURSE_COLUMN_TYPES.items() if column in course_stats}
+    return coerce_column_types(course_stats, column_types, vocabularies)
+
+
+def load_course_stats(path, vocabularies=None):
+    """
+    Reads & cleans a semicolon-delimited course file. path can be a local file or a URL.
+    """
+    raw_course_stats = pd.read_csv(path, delimiter=';', encoding='utf-8', encoding_errors='ignore')
+    return course_cleaner(raw_course_stats, vocabularies)
+
+
+# Course hole key = CourseID * COURSE_HOLE_MULTIPLIER + Hole
+COURSE_HOLE_MULTIPLIER = 100
+PROFILE_KEY = 'CourseHoleKey'
+PROFILE_SG_COLUMNS = ['SGOTT', 'SGAPP', 'SGARG', 'SGPutt']
+SG_QUANTILES = [0.1, 0.5, 0.9]
+
+
+def course_hole_key(course_id, hole):
+    """
+    Integer key of a course's hole, -1 where either is missing
+    """
+    course_id = pd.Series(course_id).to_numpy('float64', na_value=np.nan)
+    hole = pd.Series(hole).to_numpy('float64', na_value=np.nan)
+    key = course_id * COURSE_HOLE_MULTIPLIER + hole
+    return np.where(np.isnan(key), -1, key).astype('int64')
+
+
+def _profile_frame(values, keys):
+    """
+    Means of every column of values per course hole key, in one groupby. Keys come back as a column so the
+    profile survives the stage cache.
+    """
+    valid = keys >= 0
+    profiles = values[valid].groupby(keys[valid]).mean()
+    profiles.index.name = PROFILE_KEY
+    profiles = profiles.reset_index()
+    profiles.insert(1, 'CourseID', profiles[PROFILE_KEY] // COURSE_HOLE_MULTIPLIER)
+    profiles.insert(2, 'Hole', profiles[PROFILE_KEY] % COURSE_HOLE_MULTIPLIER)
+    return profiles
+
+
+def build_hole_profiles(hole_stats):
+    """
+    Profile of every course hole from missing data handled hole_stats, over all the events played on it: scoring,
+    driving distance & SG averages, fairway & GIR rates (named like hole_feature_engineering's field averages) plus
+    the spread of each SG category & the hole's HoleLengthCategory.
+    """
+    keys = course_hole_key(hole_stats['CourseID'], hole_stats['Hole'])
+    values = pd.DataFrame({
+        'Yardage': hole_stats['Yardage'].to_numpy('float64', na_value=np.nan),
+        'HoleAvg': hole_stats['HoleScore'].to_numpy('float64', na_value=np.nan),
+        'DD_Avg': hole_stats['DrivingDistance'].to_numpy('float64', na_value=np.nan),
+        'FairwayAvg': (hole_stats['Fairway'] == True).fillna(False).to_numpy(dtype='float64'),
+        'GIRavg': (hole_stats['GIR'] == True).fillna(False).to_numpy(dtype='float64'),
+    })
+    for column in PROFILE_SG_COLUMNS:
+        sg = hole_stats[column].to_numpy('float64', na_value=np.nan)
+        values[f'{column}_avg'] = sg
+        # Mean of squares, turned into a standard deviation below
+        values[f'{column}_sq'] = sg ** 2
+    profiles = _profile_frame(values, keys)
+    for column in PROFILE_SG_COLUMNS:
+        variance = profiles.pop(f'{column}_sq') - profiles[f'{column}_avg'] ** 2
+        profiles[f'{column}_std'] = np.sqrt(variance.clip(lower=0))
+    profiles['Holes'] = np.bincount(np.searchsorted(profiles[PROFILE_KEY], keys[keys >= 0]), minlength=len(profiles))
+    profiles = categorize_hole_lengths(profiles)
+    return profiles
+
+
+def length_category_profiles(hole_stats):
+    """
+    Distribution of each SG category by HoleLengthCategory: mean, standard deviation & SG_QUANTILES
+    """
+    lengths = categorize_hole_lengths(hole_stats[['Yardage']].astype('float64'))['HoleLengthCategory']
+    grouped = hole_stats[PROFILE_SG_COLUMNS].astype('float64').groupby(lengths, observed=True)
+    profiles = {'mean': grouped.mean(), 'std': grouped.std()}
+    profiles.update({f'p{int(quantile * 100)}': grouped.quantile(quantile) for quantile in SG_QUANTILES})
+    return pd.concat(profiles, axis=1)
+
+
+def build_shot_profiles(shot_stats):
+    """
+    Profile of every course hole from shots with detailed categories, named like shot_feature_engineering's field
+    averages: HoleAvg, tee shot DD_Avg (inches) & FairwayAvg (%), & Avg_ToDistance_<category> for each
+    FIELD_DISTANCE_CATEGORIES category.
+    """
+    keys = course_hole_key(shot_stats['CourseID'], shot_stats['Hole'])
+    tee_shot = (shot_stats['SGCategory'] == 'Off the Tee').fillna(False).to_numpy(dtype=bool)
+    to_distance = shot_stats['ToDistance'].to_numpy('float64', na_value=np.nan)
+    category = shot_stats['detailed_category'].astype('object').to_numpy()
+    values = pd.DataFrame({
+        'HoleAvg': pd.to_numeric(shot_stats['HoleScore'], errors='coerce').to_numpy('float64', na_value=np.nan),
+        'DD_Avg': np.where(tee_shot, shot_stats['ShotDistance'].to_numpy('float64', na_value=np.nan), np.nan),
+        'FairwayAvg': np.where(tee_shot, (shot_stats['ToLie'] == 'Fairway').fillna(False).to_numpy(dtype=bool) * 100.0,
+                               np.nan),
+    })
+    for detailed_category in FIELD_DISTANCE_CATEGORIES:
+        values[f'Avg_ToDistance_{detailed_category}'] = np.where(category == detailed_category, to_distance, np.nan)
+    return _profile_frame(values, keys)
+
+
+class CourseProfiles:
+    """
+    Course hole profiles (from build_hole_profiles or build_shot_profiles) looked up by integer course hole key
+    with a binary search over the sorted keys
+    """
+
+    def __init__(self, profiles):
+        self.profiles = profiles.sort_values(PROFILE_KEY, ignore_index=True)
+        self._keys = self.profiles[PROFILE_KEY].to_numpy('int64')
+
+    def positions(self, df):
+        """
+        Profile row of each row of df (by its CourseID & Hole), -1 where there isn't one
+        """
+        keys = course_hole_key(df['CourseID'], df['Hole'])
+        if not len(self._keys):
+            return np.full(len(keys), -1)
+        positions = np.searchsorted(self._keys, keys).clip(0, len(self._keys) - 1)
+        return np.where((keys >= 0) & (self._keys[positions] == keys), positions, -1)
+
+    def lookup(self, df, column, by=None):
+        """
+        Profile value of column for each row of df as a float array, NaN where the hole has no profile.
+        With by (e.g. df's detailed_category), each row reads column_<its by value>.
+        """
+        positions = self.positions(df)
+        if by is None:
+            values = np.append(self.profiles[column].to_numpy('float64', na_value=np.nan), np.nan)
+            return values[positions]
+        result = np.full(len(df), np.nan)
+        by = pd.Series(by).astype('object').to_numpy()
+        for value in pd.unique(by[pd.notna(by)]):
+            name = f'{column}_{value}'
+            if name in self.profiles:
+                rows = by == value
+                values = np.append(self.profiles[name].to_numpy('float64', na_value=np.nan), np.nan)
+                result[rows] = values[positions[rows]]
+        return result
@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# EventID = Year * EVENT_ID_MULTIPLIER + TournID. Tournament schedule numbers are at most three digits.
+EVENT_ID_MULTIPLIER = 1000
+# Vocabularies of the categorical columns are dicts of column -> list of values, passed to the cleaners by whoever
+# owns them (e.g. a Pipeline, persisted in its cache dir). Values are only ever appended, so category codes stay stable
+# across the chunks, files & runs that share one.
+# Guards vocabulary updates when several files are cleaned in threads at once
+VOCABULARY_LOCK = threading.Lock()
+# Raw values read as True & False for 'bool' columns (ShotLink flags are 'Y'/'N'). Blanks are False; any other value
+# is False & flagged as malformed.
+TRUE_VALUES = ['Y', 'y', 'Yes', 'TRUE', 'True', 'true', '1', 1, True]
+FALSE_VALUES = ['N', 'n', 'No', 'FALSE', 'False', 'false', '0', 0, False]
+# Column the cleaners add when values fail to parse, with bit i set for the i-th column of the cleaner's column types.
+# Only added to chunks that have a malformed value; validation reads & drops it.
+MALFORMED_COLUMN = '_malformed'
+
+
+def load_vocabularies(path, vocabularies=None):
+    """
+    Loads persisted vocabularies into `vocabularies` (a new dict if None) & returns them. A missing file leaves them
+    as they are.
+    """
+    vocabularies = {} if vocabularies is None else vocabularies
+    if os.path.exists(path):
+        with open(path) as file:
+            for column, values in json.load(file).items():
+                with VOCABULARY_LOCK:
+                    vocabulary = vocabularies.setdefault(column, [])
+                    vocabulary.extend(value for value in values if value not in vocabulary)
+    return vocabularies
+
+
+def save_vocabularies(path, vocabularies):
+    """
+    Persists vocabularies as JSON.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(vocabularies, file, indent=1)
+    os.replace(tmp_path, path)
+
+
+def encode_categorical(series, vocabulary):
+    """
+    Categorical with the shared vocabulary as its categories. Unseen values are appended to the vocabulary.
+    """
+    categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    categorical = categorical.cat.rename_categories(lambda value: str(value))
+    with VOCABULARY_LOCK:
+        known = set(vocabulary)
+        vocabulary.extend(sorted(value for value in categorical.cat.categories if value not in known))
+        categories = list(vocabulary)
+    return categorical.cat.set_categories(categories)
+
+
+def event_id(year, tourn_id):
+    """
+    Composite integer EventID from Year & TournID
+    """
+    year = coerce_numeric(year, 'Int32')
+    tourn_id = coerce_numeric(tourn_id, 'Int32')
+    return (year * EVENT_ID_MULTIPLIER + tourn_id).astype('Int32')
+
+
+def coerce_numeric(series, dtype):
+    """
+    series as a numeric dtype. Values that don't parse, or for integer dtypes aren't whole or don't fit, become
+    missing instead of raising.
+    """
+    values = pd.to_numeric(series, errors='coerce')
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if pd.api.types.is_integer_dtype(dtype):
+        floats = pd.Series(values, copy=False).astype('float64')
+        limits = np.iinfo(getattr(dtype, 'numpy_dtype', dtype))
+        values = floats.mask((floats != floats.round()) | (floats < limits.min) | (floats > limits.max))
+    return values.astype(dtype)
+
+
+def malformed_flag(column, column_types):
+    """
+    Bit of column in MALFORMED_COLUMN for a cleaner's column types
+    """
+    return 1 << list(column_types).index(column)
+
+
+def _flag_values(codes, uniques, values):
+    # Per row: is the row's value among values. Flags have a handful of distinct values, so they're checked once each.
+    return np.append(pd.Index(uniques).isin(values), False)[codes]
+
+
+def malformed_flags(raw, column_types, coerced=None, flags=None):
+    """
+    MALFORMED_COLUMN bits per row of a chunk before coercion: flags that aren't TRUE_VALUES or FALSE_VALUES, & values
+    the numeric columns in coerced (set when the fast astype failed) have as missing. flags can give the flag columns'
+    pd.factorize output, if already computed.
+    """
+    malformed = np.zeros(len(raw), dtype='int64')
+    for column, dtype in column_types.items():
+        if dtype == 'bool' and not pd.api.types.is_bool_dtype(raw[column].dtype):
+            codes, uniques = flags[column] if flags and column in flags else pd.factorize(raw[column])
+            failed = ~_flag_values(codes, uniques, TRUE_VALUES + FALSE_VALUES) & (codes >= 0)
+        elif coerced is not None and column in coerced:
+            failed = (raw[column].notna() & coerced[column].isna()).to_numpy(dtype=bool)
+        else:
+            continue
+        malformed[failed] |= malformed_flag(column, column_types)
+    return malformed
+
+
+def coerce_column_types(df, column_types, vocabularies=None):
+    """
+    astype for a cleaner's column types, where 'category' columns are encoded against vocabularies (extended in
+    place; without them each column's categories are just its own values) &
+    'bool' flags are True for TRUE_VALUES. Malformed values become missing (False for flags) rather than failing the
+    run, & are recorded per row in MALFORMED_COLUMN.
+    """
+    vocabularies = {} if vocabularies is None else vocabularies
+    raw = df
+    coerced = None
+    numeric_types = {column: dtype for column, dtype in column_types.items() if dtype not in ('category', 'bool')}
+    try:
+        df = df.astype(numeric_types)
+    except (ValueError, TypeError):
+        # A malformed value: coerce column by column, setting the values that don't fit to missing
+        coerced = {column: coerce_numeric(df[column], dtype) for column, dtype in numeric_types.items()}
+        df = df.assign(**coerced)
+    flags = {column: pd.factorize(raw[column]) for column, dtype in column_types.items()
+             if dtype == 'bool' and not pd.api.types.is_bool_dtype(raw[column].dtype)}
+    malformed = malformed_flags(raw, column_types, coerced, flags)
+    for column, dtype in column_types.items():
+        if column in flags:
+            df[column] = _flag_values(*flags[column], TRUE_VALUES)
+        elif dtype == 'category':
+            with VOCABULARY_LOCK:
+                vocabulary = vocabularies.setdefault(column, [])
+            df[column] = encode_categorical(df[column], vocabulary)
+    if malformed.any():
+        df[MALFORMED_COLUMN] = malformed
+    return df
+
+
+def align_categories(chunks):
+    """
+    Chunks encoded while a vocabulary was still growing have a prefix of its final categories. Gives every chunk
+    the final categories (codes are unchanged) so they concatenate as categoricals.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return chunks
+    for column in chunks[-1].columns:
+        if isinstance(chunks[-1][column].dtype, pd.CategoricalDtype):
+            categories = chunks[-1][column].cat.categories
+            for chunk in chunks[:-1]:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return chunks
+
+
+def legacy_types(df, id_columns=('TournID', 'PlayerID', 'CourseID', 'EventID')):
+    """
+    The representation the cleaners used to produce: IDs & categoricals as str objects, nullable ints as Int64.
+    """
+    legacy = {}
+    for column in df.columns:
+        dtype = df[column].dtype
+        if column in id_columns or isinstance(dtype, pd.CategoricalDtype):
+            legacy[column] = df[column].astype(str).astype(object)
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(dtype):
+            legacy[column] = df[column].astype('Int64')
+        else:
+            legacy[column] = df[column]
+    return pd.DataFrame(legacy, index=df.index)
+
+
+def memory_report(df, baseline=None):
+    """
+    Per column memory (MB) of df against a baseline frame, by default df in the old legacy_types representation.
+    """
+    baseline = legacy_types(df) if baseline is None else baseline
+    before = baseline.memory_usage(deep=True, index=False) / 2 ** 20
+    after = df.memory_usage(deep=True, index=False) / 2 ** 20
+    report = pd.DataFrame({'before_mb': before, 'after_mb': after,
+                           'before_dtype': baseline.dtypes.astype(str), 'after_dtype': df.dtypes.astype(str)})
+    report['saved_mb'] = report['before_mb'] - report['after_mb']
+    report.loc['total'] = [before.sum(), after.sum(), '', '', before.sum() - after.sum()]
+    return report
@@ -0,0 +1,155 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Distances (inches) the table stores expected strokes at: log spaced from 1 inch to 700 yards
+DEFAULT_KNOTS = np.unique(np.round(np.geomspace(1, 25200, 60)))
+# Bins with fewer shots than this are interpolated from their neighbours
+MIN_BIN_SHOTS = 5
+# Lies with fewer shots than this use the all lies curve
+MIN_LIE_SHOTS = 200
+# Row of the all lies curve, used for rare & unseen lies
+ALL_LIES = 'All'
+HOLE_KEYS = ['EventID', 'PlayerID', 'Round', 'Hole']
+
+
+def strokes_to_hole_out(shot_stats):
+    """
+    Strokes each shot's player took from that shot's position to hole out, including the shot itself
+    """
+    order = shot_stats.sort_values(HOLE_KEYS + ['ShotNo'], kind='stable').index
+    strokes = shot_stats.loc[order, 'Strokes'].astype('float64')
+    grouped = strokes.groupby([shot_stats.loc[order, key] for key in HOLE_KEYS], observed=True)
+    remaining = grouped.transform('sum') - grouped.cumsum() + strokes
+    return remaining.reindex(shot_stats.index)
+
+
+class ExpectedStrokesTable:
+    """
+    Expected strokes to hole out by (FromLie, distance): a lies x knots float array, linearly interpolated between
+    the knots with np.searchsorted. Saved as .npy files so workers can memory-map one copy instead of rebuilding it.
+    """
+
+    def __init__(self, lies, knots, expected):
+        self.lies = list(lies)
+        self.knots = knots
+        self.expected = expected
+        self._rows = {lie: row for row, lie in enumerate(self.lies)}
+
+    @classmethod
+    def from_shots(cls, shot_stats, knots=DEFAULT_KNOTS):
+        """
+        Builds the table from historical shots: mean strokes to hole out per lie & distance bin, resampled onto the
+        knots. Only shots from holes that were completed are used.
+        """
+        holed = shot_stats['InHoleFlag'].eq('Y').fillna(False).astype('int8')
+        complete = holed.groupby([shot_stats[key] for key in HOLE_KEYS], observed=True).transform('max')
+        complete = complete.reindex(shot_stats.index).fillna(0).to_numpy(dtype=bool)
+        remaining = strokes_to_hole_out(shot_stats).to_numpy('float64', na_value=np.nan)
+        distance = shot_stats['FromDistance'].to_numpy('float64', na_value=np.nan)
+        lie = shot_stats['FromLie'].astype('object').to_numpy()
+        valid = complete & ~np.isnan(remaining) & ~np.isnan(distance) & pd.notna(lie)
+        remaining, distance, lie = remaining[valid], distance[valid], lie[valid]
+
+        bins = np.searchsorted(knots, distance)
+        all_lies = cls._curve(knots, bins, distance, remaining)
+        lies, curves = [], []
+        lie_codes, lie_values = pd.factorize(lie)
+        for code, value in enumerate(lie_values):
+            in_lie = lie_codes == code
+            if in_lie.sum() >= MIN_LIE_SHOTS:
+                curve = cls._curve(knots, bins[in_lie], distance[in_lie], remaining[in_lie])
+                lies.append(value)
+                curves.append(np.where(np.isnan(curve), all_lies, curve))
+        lies.append(ALL_LIES)
+        curves.append(all_lies)
+        return cls(lies, knots, np.vstack(curves))
+
+    @staticmethod
+    def _curve(knots, bins, distance, remaining):
+        """
+        Mean strokes per distance bin, placed at the bin's mean distance & interpolated onto the knots
+        """
+        n_bins = len(knots) + 1
+        counts = np.bincount(bins, minlength=n_bins)
+        kept = counts >= MIN_BIN_SHOTS
+        if not kept.any():
+            return np.full(len(knots), np.nan)
+        centres = np.bincount(bins, weights=distance, minlength=n_bins)[kept] / counts[kept]
+        means = np.bincount(bins, weights=remaining, minlength=n_bins)[kept] / counts[kept]
+        return np.interp(knots, centres, means)
+
+    def lie_rows(self, lies):
+        """
+        Table row of each lie, the all lies row for unseen or missing lies
+        """
+        categorical = pd.Categorical(lies)
+        category_rows = np.array([self._rows.get(lie, self._rows[ALL_LIES]) for lie in categorical.categories]
+                                 + [self._rows[ALL_LIES]], dtype='int64')
+        return category_rows[categorical.codes]
+
+    def expected_strokes(self, lies, distances):
+        """
+        Vectorized expected strokes for arrays of lies & distances (inches). NaN where the distance is missing.
+        """
+        distances = np.asarray(distances, dtype='float64')
+        rows = self.lie_rows(lies)
+        clipped = np.clip(distances, self.knots[0], self.knots[-1])
+        upper = np.searchsorted(self.knots, clipped, side='right').clip(1, len(self.knots) - 1)
+        lower_knot, upper_knot = self.knots[upper - 1], self.knots[upper]
+        weight = (clipped - lower_knot) / (upper_knot - lower_knot)
+        expected = self.expected[rows, upper - 1] * (1 - weight) + self.expected[rows, upper] * weight
+        return np.where(np.isnan(distances), np.nan, expected)
+
+    def strokes_gained(self, shot_stats):
+        """
+        SG of every shot against the table: expected before - expected after - strokes taken. Holed shots finish
+        on 0 expected strokes.
+        """
+        before = self.expected_strokes(shot_stats['FromLie'], shot_stats['FromDistance'].to_numpy('float64',
+                                                                                                  na_value=np.nan))
+        after = self.expected_strokes(shot_stats['ToLie'], shot_stats['ToDistance'].to_numpy('float64',
+                                                                                            na_value=np.nan))
+        holed = shot_stats['InHoleFlag'].eq('Y').fillna(False).to_numpy(dtype=bool)
+        after = np.where(holed, 0.0, after)
+        strokes = shot_stats['Strokes'].to_numpy('float64', na_value=np.nan)
+        return pd.Series(before - after - strokes, index=shot_stats.index, name='SGExpected')
+
+    def save(self, path):
+        """
+        Writes knots.npy, expected.npy & lies.json into directory path
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'knots.npy'), self.knots)
+        np.save(os.path.join(path, 'expected.npy'), self.expected)
+        tmp_path = os.path.join(path, 'lies.json.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(self.lies, file)
+        os.replace(tmp_path, os.path.join(path, 'lies.json'))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Opens a saved table. With mmap_mode='r' the arrays are memory-mapped, so processes share the page cache.
+        """
+        with open(os.path.join(path, 'lies.json')) as file:
+            lies = json.load(file)
+        return cls(lies, np.load(os.path.join(path, 'knots.npy'), mmap_mode=mmap_mode),
+                   np.load(os.path.join(path, 'expected.npy'), mmap_mode=mmap_mode))
+
+
+def fill_missing_SG(shot_stats, expected_strokes=None):
+    """
+    Fills SGBaseline values that are missing (e.g. blanked by missing_shots_handler) with SG from the
+    expected_strokes table. Without a table the shots are returned unchanged.
+    """
+    if expected_strokes is None:
+        return shot_stats
+    missing = shot_stats['SGBaseline'].isna().to_numpy(dtype=bool)
+    if missing.any():
+        sg = shot_stats['SGBaseline'].to_numpy('float64', na_value=np.nan, copy=True)
+        sg[missing] = expected_strokes.strokes_gained(shot_stats.loc[missing]).to_numpy()
+        shot_stats['SGBaseline'] = sg
+    return shot_stats
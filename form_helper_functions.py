@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+ROUND_KEYS = ['PlayerID', 'EventID', 'Round']
+# Rounds are put in date order by an `order` column, e.g. the event start date from the schedule (see
+# add_event_order). Without one they fall back to EventID: Year * 1000 + TournID orders seasons, but tournament
+# numbers are permanent IDs rather than schedule positions, so events within a season may be out of order.
+DEFAULT_ORDER = 'EventID'
+DEFAULT_WINDOW = 20
+DEFAULT_ALPHA = 0.1
+
+
+def add_event_order(df, schedule, order='EventDate'):
+    """
+    Adds the schedule's order column (e.g. each event's start date) to df's rows by EventID
+    """
+    dates = schedule.drop_duplicates('EventID').set_index('EventID')[order]
+    return df.assign(**{order: dates.reindex(df['EventID']).to_numpy()})
+
+
+def round_aggregates(df, aggregations, by=None, order=None):
+    """
+    One row per player round (& per `by` category, e.g. SGCategory or detailed_category) from shot or hole rows.
+    aggregations maps column -> 'sum' or 'mean'; sums of only missing values stay missing. An order column is
+    carried over to the rounds.
+    """
+    keys = ROUND_KEYS + ([by] if by else [])
+    grouped = df.groupby(keys, observed=True, sort=False)
+    rounds = pd.DataFrame({column: grouped[column].sum(min_count=1) if how == 'sum' else grouped[column].agg(how)
+                           for column, how in aggregations.items()})
+    if order and order not in keys:
+        rounds[order] = grouped[order].first()
+    return rounds.reset_index()
+
+
+def _form_order(rounds, by=None, order=None):
+    """
+    Positions sorting rounds by player (& category) then date (the order column, falling back to EventID) & round,
+    & a flag for the first row of each group
+    """
+    group = ['PlayerID'] + ([by] if by else [])
+    dates = [rounds[DEFAULT_ORDER].to_numpy('int64', na_value=-1)]
+    if order and order != DEFAULT_ORDER:
+        dates.append(pd.factorize(rounds[order], sort=True)[0])
+    order = np.lexsort([rounds['Round'].to_numpy('int64', na_value=-1)] + dates
+                       + [pd.factorize(rounds[column])[0] for column in group[::-1]])
+    codes = np.column_stack([pd.factorize(rounds[column])[0][order] for column in group])
+    new_group = np.ones(len(rounds), dtype=bool)
+    new_group[1:] = np.any(codes[1:] != codes[:-1], axis=1)
+    return order, new_group
+
+
+def rolling_form(rounds, value, window=DEFAULT_WINDOW, by=None, order=None):
+    """
+    Mean of value over each player's (& category's) last `window` rounds, the current one included, in the date
+    order given by the order column (EventID if None). Computed with cumulative sums over the sorted rows, so one
+    pass whatever the window. Missing values are skipped.
+    """
+    order, new_group = _form_order(rounds, by, order)
+    values = rounds[value].to_numpy('float64', na_value=np.nan)[order]
+    present = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(present)])
+    position = np.arange(len(values))
+    group_start = np.maximum.accumulate(np.where(new_group, position, 0))
+    lower = np.maximum(position + 1 - window, group_start)
+    count = counts[position + 1] - counts[lower]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        form = np.where(count > 0, (sums[position + 1] - sums[lower]) / count, np.nan)
+    result = np.empty(len(values))
+    result[order] = form
+    return pd.Series(result, index=rounds.index, name=f'{value}_last{window}')
+
+
+def ewm_form(rounds, value, alpha=DEFAULT_ALPHA, by=None, order=None):
+    """
+    Exponentially weighted mean of value over each player's (& category's) rounds in date order (the order column,
+    EventID if None): ewm = (1 - alpha) * previous ewm + alpha * value, starting at the first value. Missing values
+    are skipped.
+    """
+    order, new_group = _form_order(rounds, by, order)
+    sorted_rounds = rounds.iloc[order]
+    group = np.cumsum(new_group)
+    ewm = sorted_rounds[value].astype('float64').groupby(group).ewm(alpha=alpha, adjust=False, ignore_na=True).mean()
+    ewm = ewm.droplevel(0).reindex(sorted_rounds.index)
+    return ewm.reindex(rounds.index).rename(f'{value}_ewm')
+
+
+class FormTracker:
+    """
+    Rolling & EWM form of one value, kept up to date as events are appended. Only the last `window` rounds of each
+    group & its latest EWM are kept, so an update costs O(new rows) for the groups the new rows touch.
+    Events must be appended in date order; rows are dated by the order column (EventID if None).
+    """
+
+    def __init__(self, value, aggregation='sum', by=None, window=DEFAULT_WINDOW, alpha=DEFAULT_ALPHA, order=None):
+        self.value = value
+        self.aggregation = aggregation
+        self.by = by
+        self.order = order
+        self.window = window
+        self.alpha = alpha
+        self.group = ['PlayerID'] + ([by] if by else [])
+        self.history = None
+
+    def update(self, df):
+        """
+        Adds the rounds in df (shot or hole rows of new events) & returns them with their form columns
+        """
+        new = round_aggregates(df, {self.value: self.aggregation}, self.by, self.order)
+        new['_new'] = True
+        touched = np.zeros(0, dtype=bool)
+        if self.history is not None:
+            touched = pd.MultiIndex.from_frame(self.history[self.group]).isin(
+                pd.MultiIndex.from_frame(new[self.group]))
+        combined = pd.concat([self.history[touched], new], ignore_index=True) if len(touched) else new
+        rolling_column, ewm_column = f'{self.value}_last{self.window}', f'{self.value}_ewm'
+        combined[rolling_column] = rolling_form(combined, self.value, self.window, self.by, self.order).to_numpy()
+        if ewm_column not in combined:
+            combined[ewm_column] = np.nan
+
+        # Each group's latest EWM stands in for its earlier rounds: with adjust=False, starting from it continues
+        # the recursion exactly
+        seeds = combined[~combined['_new']].groupby(self.group, observed=True).tail(1)
+        seeds = seeds.assign(**{self.value: seeds[ewm_column]})
+        ewm_input = pd.concat([seeds, combined[combined['_new']]], ignore_index=True)
+        ewm_input[ewm_column] = ewm_form(ewm_input, self.value, self.alpha, self.by, self.order).to_numpy()
+        new = ewm_input[ewm_input['_new']].drop(columns='_new').reset_index(drop=True)
+
+        # Keep the last `window` rounds of the touched groups, in date order
+        updated = pd.concat([combined[~combined['_new']].drop(columns='_new'), new], ignore_index=True)
+        updated = updated.iloc[_form_order(updated, self.by, self.order)[0]]
+        updated = updated.groupby(self.group, observed=True).tail(self.window).assign(_new=False)
+        untouched = self.history[~touched] if len(touched) else None
+        self.history = pd.concat([untouched, updated], ignore_index=True) if untouched is not None else updated
+        return new
+
+    def form(self):
+        """
+        Latest rolling & EWM form per player (& category)
+        """
+        if self.history is None:
+            return pd.DataFrame()
+        latest = self.history.groupby(self.group, observed=True).tail(1)
+        return latest.drop(columns='_new').reset_index(drop=True)
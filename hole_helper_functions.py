@@ -1,137 +1,191 @@
 import numpy as np
 import pandas as pd
 
-def hole_cleaner(raw_hole_stats):
+from dtype_helper_functions import coerce_column_types, event_id
+from io_helper_functions import DEFAULT_CHUNKSIZE, concat_chunks, count_rows, read_cleaned_chunks
+from missing_data_helper_functions import apply_missing_data_rules, outside, where, zero_percentage, \
+    zeros_above_percent, zeros_where
+from validation_helper_functions import duplicated, malformed, missing, negative, outside_range, validate
+
+HOLE_COLUMN_NAMES = {
+    'Player': 'PlayerID',
+    'Tournament Schedule': 'TournID',
+    'Tournament Year': 'Year',
+    'Course': 'CourseID',
+    'Actual Yard': 'Yardage',
+    'Hit Fwy': 'Fairway',
+    'Hit Green': 'GIR',
+    'Driving Distance (rounded)': 'DrivingDistance',
+    'Tee Shot Landing Loc': 'TeeShotFinishLie',
+    'Tee Shot Detail Landing Loc': 'DetailedTeeShotFinishLie',
+    'RTP Score': 'ScoreToPar',
+    'Score': 'HoleScore',
+    'Shot': 'ShotNo',
+    'Appr Shot Dist to the Pin': 'AppDistance',
+    'Appr Shot Prox to the Hole': 'AppProx',
+    'Appr Shot Landing Loc': 'AppShotFinishLie',
+    'OTT Strokes Gained': 'SGOTT',
+    'APP Strokes Gained': 'SGAPP',
+    'ARG Strokes Gained': 'SGARG',
+    'Putts Gained': 'SGPutt',
+}
+HOLE_RELEVANT_FEATURES = [
+    'Year',
+    'TournID',
+    'PlayerID',
+    'CourseID',
+    'EventID',
+    'Round',
+    'Hole',
+    'Par',
+    'Yardage',
+    'HoleScore',
+    'ScoreToPar',
+    'Fairway',
+    'GIR',
+    'DrivingDistance',
+    'TeeShotFinishLie',
+    'AppDistance',
+    'AppProx',
+    'AppShotFinishLie',
+    'SGOTT',
+    'SGAPP',
+    'SGARG',
+    'SGPutt'
+]
+# Map column names to their desired datatypes
+HOLE_COLUMN_TYPES = {
+    'Year': 'Int16',
+    'TournID': 'Int16',
+    'PlayerID': 'Int32',
+    'CourseID': 'Int32',
+    'EventID': 'Int32',
+    'Round': 'Int8',
+    'Hole': 'Int8',
+    'Par': 'Int8',
+    'Yardage': 'Int16',
+    'HoleScore': 'Int8',
+    'ScoreToPar': 'Int8',
+    'Fairway': 'bool',
+    'GIR': 'bool',
+    'DrivingDistance': 'Int16',
+    'TeeShotFinishLie': 'category',
+    'AppDistance': 'Int32',
+    'AppProx': 'Int32',
+    'AppShotFinishLie': 'category',
+    'SGOTT': 'float64',
+    'SGAPP': 'float64',
+    'SGARG': 'float64',
+    'SGPutt': 'float64',
+}
+
+
+def hole_cleaner(raw_hole_stats, vocabularies=None):
     """
     Cleans Hole level stats, change col names, drop irellevant cols, formats types/
+    IDs become small ints, with EventID a composite Year/TournID key, & lies categoricals over vocabularies.
     """
     raw_hole_stats = raw_hole_stats.rename(columns={col: col.replace('#', '') for col in raw_hole_stats.columns})
     raw_hole_stats.columns = raw_hole_stats.columns.str.strip()
-    raw_hole_stats.rename(columns={
-        'Player': 'PlayerID',
-        'Tournament Schedule': 'TournID',
-        'Tournament Year': 'Year',
-        'Course': 'CourseID',
-        'Actual Yard': 'Yardage',
-        'Hit Fwy': 'Fairway',
-        'Hit Green': 'GIR',
-        'Driving Distance (rounded)': 'DrivingDistance',
-        'Tee Shot Landing Loc': 'TeeShotFinishLie',
-        'Tee Shot Detail Landing Loc': 'DetailedTeeShotFinishLie',
-        'RTP Score': 'ScoreToPar',
-        'Score': 'HoleScore',
-        'Shot': 'ShotNo',
-        'Appr Shot Dist to the Pin': 'AppDistance',
-        'Appr Shot Prox to the Hole': 'AppProx',
-        'Appr Shot Landing Loc': 'AppShotFinishLie',
-        'OTT Strokes Gained': 'SGOTT',
-        'APP Strokes Gained': 'SGAPP',
-        'ARG Strokes Gained': 'SGARG',
-        'Putts Gained': 'SGPutt',
-    }, inplace=True)
-    raw_hole_stats['EventID'] = raw_hole_stats['Year'].astype(str) + raw_hole_stats['TournID'].astype(str)
-    relevant_features = [
-        'Year',
-        'TournID',
-        'PlayerID',
-        'CourseID',
-        'EventID',
-        'Round',
-        'Hole',
-        'Par',
-        'Yardage',
-        'HoleScore',
-        'ScoreToPar',
-        'Fairway',
-        'GIR',
-        'DrivingDistance',
-        'TeeShotFinishLie',
-        'AppDistance',
-        'AppProx',
-        'AppShotFinishLie',
-        'SGOTT',
-        'SGAPP',
-        'SGARG',
-        'SGPutt'
-    ]
-    raw_hole_stats = raw_hole_stats.loc[:, relevant_features]
-    # Create a dictionary to map column names to their desired datatypes
-    column_types = {
-        'Year': 'Int64',
-        'TournID': 'str',
-        'PlayerID': 'str',
-        'CourseID': 'str',
-        'EventID': 'str',
-        'Round': 'Int64',
-        'Hole': 'Int64',
-        'Par': 'Int64',
-        'Yardage': 'Int64',
-        'HoleScore': 'Int64',
-        'ScoreToPar': 'Int64',
-        'Fairway': 'bool',
-        'GIR': 'bool',
-        'DrivingDistance': 'Int64',
-        'TeeShotFinishLie': 'str',
-        'AppDistance': 'Int64',
-        'AppProx': 'Int64',
-        'AppShotFinishLie': 'str',
-        'SGOTT': 'float64',
-        'SGAPP': 'float64',
-        'SGARG': 'float64',
-        'SGPutt': 'float64',
-    }
-    raw_hole_stats = raw_hole_stats.astype(column_types)
+    raw_hole_stats.rename(columns=HOLE_COLUMN_NAMES, inplace=True)
+    raw_hole_stats['EventID'] = event_id(raw_hole_stats['Year'], raw_hole_stats['TournID'])
+    raw_hole_stats = raw_hole_stats.loc[:, HOLE_RELEVANT_FEATURES]
+    raw_hole_stats = coerce_column_types(raw_hole_stats, HOLE_COLUMN_TYPES, vocabularies)
     hole_stats = raw_hole_stats
     return hole_stats
 
 
+def load_hole_stats(path, chunksize=DEFAULT_CHUNKSIZE, vocabularies=None):
+    """
+    Reads & cleans an rhole.txt export chunk by chunk, so memory scales with chunksize rather than file size.
+    Categoricals are encoded over vocabularies, shared by every chunk (a new set if None).
+    """
+    vocabularies = {} if vocabularies is None else vocabularies
+    chunks = read_cleaned_chunks(path, lambda chunk: hole_cleaner(chunk, vocabularies), HOLE_COLUMN_NAMES,
+                                 HOLE_RELEVANT_FEATURES, HOLE_COLUMN_TYPES, chunksize=chunksize)
+    return concat_chunks(chunks, count_rows(path))
+
+
+# Cached outputs of earlier versions are stale: 2 = 'Y'/'N' Fairway & GIR read as True/False & malformed values recorded
+load_hole_stats.cache_version = 2
+
+
+HOLE_KEYS = ['EventID', 'PlayerID', 'Round', 'Hole']
+# (reason, rule) pairs checked by validate_holes; rows failing any are quarantined. Values the cleaner couldn't parse
+# are malformed, & keys must be present.
+HOLE_VALIDATION_RULES = (
+    [(f'malformed {column}', malformed(column, HOLE_COLUMN_TYPES)) for column, dtype in HOLE_COLUMN_TYPES.items()
+     if dtype != 'category']
+    + [(f'missing {key}', missing(key)) for key in HOLE_KEYS]
+    + [('Par outside 3-5', outside_range('Par', 3, 5)),
+       ('Hole outside 1-18', outside_range('Hole', 1, 18))]
+    + [(f'negative {column}', negative(column)) for column in ['Yardage', 'DrivingDistance', 'AppDistance',
+                                                                'AppProx']]
+    + [('duplicate key', duplicated(HOLE_KEYS))]
+)
+# Rules whose rows are written to the quarantine but kept: a blank Par or HoleScore is carried as missing
+HOLE_FLAG_RULES = [(f'missing {column}', missing(column)) for column in ['Par', 'HoleScore']]
+
+
+def validate_holes(hole_stats, quarantine_path=None, return_report=False):
+    """
+    Checks cleaned holes against HOLE_VALIDATION_RULES in one vectorized pass per rule. Failing rows are dropped &
+    written to quarantine_path (if given) with their reasons, along with the rows HOLE_FLAG_RULES flag but keep.
+    With return_report, also returns the number of rows failing each rule.
+    """
+    hole_stats, report = validate(hole_stats, HOLE_VALIDATION_RULES, quarantine_path, HOLE_FLAG_RULES)
+    return (hole_stats, report) if return_report else hole_stats
+
+
+MISSING_DATA_KEYS = ['EventID', 'Round', 'CourseID', 'Hole']
+# Columns whose zeros are treated as missing when more than 10% of the column is 0
+ZERO_CHECKED_FEATURES = [
+    'DrivingDistance',
+    'Yardage',
+    'SGOTT',
+    'SGAPP',
+    'SGARG',
+    'SGPutt',
+    'AppProx'
+]
+SG_COLUMNS = ['SGOTT', 'SGAPP', 'SGARG', 'SGPutt']
+# (column, rule) pairs applied in order by hole_missing_data_handler
+HOLE_MISSING_DATA_RULES = (
+    # Set DD to nan for all Par 3's
+    [('DrivingDistance', where(lambda df: df['Par'] == 3)),
+     # Additional logic for AppProx
+     ('AppProx', zeros_where('AppProx', lambda df: df['AppShotFinishLie'] != 'Hole'))]
+    + [(feature, zeros_above_percent(feature, 10, MISSING_DATA_KEYS)) for feature in ZERO_CHECKED_FEATURES]
+    # filters SG for missing data
+    + [(category, outside(category, 0.5)) for category in SG_COLUMNS]
+)
+
+
 def zero_handler(df, column):
     """
     Function for checking percent of row entries = 0 in a given column.
     """
-    # total entries for each group
-    total_count = df.groupby(['EventID', 'Round', 'CourseID', 'Hole']).size()
-    count_zeros = df[df[column] == 0].groupby(['EventID', 'Round', 'CourseID', 'Hole']).size()
-    percentage_zeros = (count_zeros.sum() / total_count.sum()) * 100
-    return percentage_zeros
+    return zero_percentage(df, column, MISSING_DATA_KEYS)
+
 
 def filter_sg(row):
     """
-    filters SG for missing data
+    filters SG for missing data. Kept for existing callers, hole_missing_data_handler uses the outside() rule.
     """
     if abs(row) > 0.5:
         return np.nan
     else:
-        return row  # Use 'row' instead of 'x'
+        return row
 
 
-def hole_missing_data_handler(df):
+def hole_missing_data_handler(df, return_report=False):
     """
-    Function for handling missing data. Cycles through relevant columns, if any have less than 10% 0's, we change to nan.
+    Function for handling missing data. Applies HOLE_MISSING_DATA_RULES: DD on Par 3's, AppProx zeros that aren't
+    holed, columns with more than 10% 0's & SG outside +-0.5 are changed to nan.
+    With return_report, also returns the number of values changed per column.
     """
-    # Set DD to nan for all Par 3's
-    df.loc[df['Par'] == 3, 'DrivingDistance'] = np.nan
-    # Additional logic for AppProx
-    df.loc[(df['AppShotFinishLie'] != 'Hole') & (df['AppProx'] == 0), 'AppProx'] = np.nan
-    # Cycle through cols checking for 0's, amend if necessary
-    features_to_check = [
-        'DrivingDistance',
-        'Yardage',
-        'SGOTT',
-        'SGAPP',
-        'SGARG',
-        'SGPutt',
-        'AppProx'
-    ]
-    for feature in features_to_check:
-        percentage_zeros = zero_handler(df, feature)
-        if percentage_zeros > 10:
-            print(f"Replacing zeros with NaN in column: {feature}")
-            df.loc[df[feature] == 0, feature] = np.nan
-    SGcategories = ['SGOTT', 'SGAPP', 'SGARG', 'SGPutt']
-    for category in SGcategories:
-        df[category] = df[category].apply(filter_sg)
-    return df
+    df, report = apply_missing_data_rules(df, HOLE_MISSING_DATA_RULES)
+    return (df, report) if return_report else df
 
 
 def calculate_bool_avg(group, column):
@@ -165,51 +219,79 @@ def extreme_percentage_cols(df, column):
     df.loc[(df[column] > 0.9) & (df[column] < 1), column] = np.nan
 
 
-def hole_feature_engineering(hole_stats):
+# Field averages over (EventID, Hole): column -> (average column, relative column)
+HOLE_FIELD_AVERAGES = {
+    'HoleScore': ('HoleAvg', 'Vs_HoleAvg'),
+    'DrivingDistance': ('DD_Avg', 'Vs_DDAvg'),
+    'SGOTT': ('SGOTT_avg', 'Vs_SGOTT_avg'),
+    'SGAPP': ('SGAPP_avg', 'Vs_SGAPP_avg'),
+    'SGARG': ('SGARG_avg', 'Vs_SGARG_avg'),
+    'SGPutt': ('SGPutt_avg', 'Vs_SGPutt_avg'),
+}
+# Boolean rates over (EventID, Hole): column -> (rate column, relative column)
+HOLE_FIELD_RATES = {
+    'Fairway': ('FairwayAvg', 'RelativeFairway'),
+    'GIR': ('GIRavg', 'RelativeGIR'),
+}
+
+
+def group_codes(df, keys):
+    """
+    Factorizes the group key once. Returns a group code per row (-1 where a key is missing) & the number of groups.
+    """
+    codes = df.groupby(keys, sort=False).ngroup()
+    codes = codes.fillna(-1).to_numpy(dtype='int64')
+    return codes, int(codes.max()) + 1 if len(codes) else 0
+
+
+def fused_group_means(df, codes, n_groups, columns):
+    """
+    Means of several columns per group code in a single groupby, broadcast back to rows.
+    Rows with code -1 get NaN. Returns a dict of float arrays.
+    """
+    grouped = df[columns].groupby(codes).mean()
+    grouped = grouped.reindex(range(n_groups))
+    # Extra all-NaN row so code -1 picks up NaN
+    table = np.vstack([grouped.to_numpy(dtype='float64', na_value=np.nan), np.full((1, len(columns)), np.nan)])
+    broadcast = table[codes]
+    return {column: broadcast[:, i] for i, column in enumerate(columns)}
+
+
+def hole_feature_engineering(hole_stats, course_profiles=None):
     """
     Computes Averages, relative to average and other features.
+    All (EventID, Hole) averages & boolean rates are computed in one groupby & broadcast back without merging.
+    With course_profiles (a CourseProfiles of build_hole_profiles), the averages & rates are looked up from the
+    course hole's precomputed profile instead.
     """
-    # Average & Relatives
-    hole_stats['HoleAvg'] = hole_stats.groupby(['EventID', 'Hole'])['HoleScore'].transform('mean')
-    hole_stats['Vs_HoleAvg'] = hole_stats['HoleScore'] - hole_stats['HoleAvg']
-    hole_stats['DD_Avg'] = hole_stats.groupby(['EventID', 'Hole'])['DrivingDistance'].transform('mean')
-    hole_stats['Vs_DDAvg'] = hole_stats['DrivingDistance'] - hole_stats['DD_Avg']
-
-    # Strokes Gained Categories
-    hole_stats['SGOTT_avg'] = hole_stats.groupby(['EventID', 'Hole'])['SGOTT'].transform('mean')
-    hole_stats['Vs_SGOTT_avg'] = hole_stats['SGOTT'] - hole_stats['SGOTT_avg']
-    hole_stats['SGAPP_avg'] = hole_stats.groupby(['EventID', 'Hole'])['SGAPP'].transform('mean')
-    hole_stats['Vs_SGAPP_avg'] = hole_stats['SGAPP'] - hole_stats['SGAPP_avg']
-    hole_stats['SGARG_avg'] = hole_stats.groupby(['EventID', 'Hole'])['SGARG'].transform('mean')
-    hole_stats['Vs_SGARG_avg'] = hole_stats['SGARG'] - hole_stats['SGARG_avg']
-    hole_stats['SGPutt_avg'] = hole_stats.groupby(['EventID', 'Hole'])['SGPutt'].transform('mean')
-    hole_stats['Vs_SGPutt_avg'] = hole_stats['SGPutt'] - hole_stats['SGPutt_avg']
-
-    # Fairway Accuracy
-    FairwayAvg = hole_stats.groupby(['EventID', 'Hole']).apply(calculate_bool_avg, column='Fairway')
-    # Align with the original index & merge
-    FairwayAvg = FairwayAvg.reset_index(name='FairwayAvg')
-    hole_stats = pd.merge(hole_stats, FairwayAvg, on=['EventID', 'Hole'], how='left')
-    hole_stats['FairwayAvg'].replace(0, np.nan, inplace=True)
-    extreme_percentage_cols(hole_stats, 'FairwayAvg')
-    hole_stats['RelativeFairway'] = np.where(hole_stats['Fairway'] == True,
-                                             1 - hole_stats['FairwayAvg'],
-                                             - hole_stats['FairwayAvg'])
-    hole_stats['RelativeFairway'].replace(0, np.nan, inplace=True)
-
-    # Greens In Regulation
-    GIRavg = hole_stats.groupby(['EventID', 'Hole']).apply(calculate_bool_avg, column='GIR')
-    GIRavg = GIRavg.reset_index(name='GIRavg')
-    hole_stats = pd.merge(hole_stats, GIRavg, on=['EventID', 'Hole'], how='left')
-    # Accounting for missing data
-    hole_stats['GIRavg'].replace(0, np.nan, inplace=True)
-    extreme_percentage_cols(hole_stats, 'GIRavg')
-    hole_stats['RelativeGIR'] = np.where(hole_stats['GIR'] == True,
-                                             1 - hole_stats['GIRavg'],
-                                             - hole_stats['GIRavg'])
-    hole_stats['RelativeGIR'].replace(0, np.nan, inplace=True)
+    if course_profiles is None:
+        codes, n_groups = group_codes(hole_stats, ['EventID', 'Hole'])
+        rates = pd.DataFrame({column: (hole_stats[column] == True).fillna(False).astype('float64')
+                              for column in HOLE_FIELD_RATES}, index=hole_stats.index)
+        aggregates = fused_group_means(pd.concat([hole_stats[list(HOLE_FIELD_AVERAGES)], rates], axis=1), codes,
+                                       n_groups, list(HOLE_FIELD_AVERAGES) + list(HOLE_FIELD_RATES))
+    else:
+        aggregates = {column: course_profiles.lookup(hole_stats, avg_column)
+                      for column, (avg_column, _) in {**HOLE_FIELD_AVERAGES, **HOLE_FIELD_RATES}.items()}
+
+    # Average & Relatives, Strokes Gained Categories
+    for column, (avg_column, relative_column) in HOLE_FIELD_AVERAGES.items():
+        avg = aggregates[column]
+        if isinstance(hole_stats[column].dtype, pd.api.extensions.ExtensionDtype):
+            avg = pd.array(avg, dtype='Float64')
+        hole_stats[avg_column] = avg
+        hole_stats[relative_column] = hole_stats[column] - hole_stats[avg_column]
+
+    # Fairway Accuracy & Greens In Regulation, accounting for missing data
+    for column, (avg_column, relative_column) in HOLE_FIELD_RATES.items():
+        avg = aggregates[column]
+        avg[avg == 0] = np.nan
+        hole_stats[avg_column] = avg
+        extreme_percentage_cols(hole_stats, avg_column)
+        relative = np.where(hole_stats[column] == True, 1 - hole_stats[avg_column], - hole_stats[avg_column])
+        relative[relative == 0] = np.nan
+        hole_stats[relative_column] = relative
 
     # Hole Length Group
     hole_stats = categorize_hole_lengths(hole_stats)
     return hole_stats
-
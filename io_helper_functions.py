@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 250_000
+# Cleaned type -> type given to the C parser. Nullable ints are parsed as float64 (the parser's native NaN-capable
+# type, much faster than parsing straight to a nullable int) and cast by the cleaner. Categoricals are parsed as
+# categories & then re-coded against the cleaner's vocabularies. 'bool' flags & any other column are parsed as strings,
+# so no column's type is left to per chunk inference.
+PARSE_TIME_TYPES = {
+    'Int8': 'float64',
+    'Int16': 'float64',
+    'Int32': 'float64',
+    'Int64': 'float64',
+    'float64': 'float64',
+    'category': 'category',
+    'bool': 'str',
+}
+DEFAULT_PARSE_TYPE = 'str'
+
+
+def clean_column_name(col):
+    """
+    Raw ShotLink header -> name used by the cleaners before renaming, e.g. 'Player #' -> 'Player'
+    """
+    return col.replace('#', '').strip()
+
+
+def parse_plan(path, column_names, relevant_features, column_types, delimiter=';'):
+    """
+    Reads only the header of an export and works out which raw columns the cleaner needs & their parse dtypes.
+    path can also be a file-like buffer, which is left at its starting position.
+    """
+    position = path.tell() if hasattr(path, 'seek') else None
+    header = pd.read_csv(path, delimiter=delimiter, nrows=0, encoding='utf-8', encoding_errors='ignore').columns
+    if position is not None:
+        path.seek(position)
+    usecols = []
+    dtype = {}
+    for raw_col in header:
+        feature = column_names.get(clean_column_name(raw_col), clean_column_name(raw_col))
+        if feature not in relevant_features:
+            continue
+        usecols.append(raw_col)
+        dtype[raw_col] = PARSE_TIME_TYPES.get(column_types.get(feature), DEFAULT_PARSE_TYPE)
+    return usecols, dtype
+
+
+def read_cleaned_chunks(path, cleaner, column_names, relevant_features, column_types, chunksize=DEFAULT_CHUNKSIZE,
+                        delimiter=';'):
+    """
+    Streams a semicolon-delimited export through cleaner in row chunks. Dropped columns are never parsed and
+    numeric columns get their final dtype at parse time, so only one chunk of raw data is held at a time.
+    path can be a file path, URL or a seekable buffer (e.g. BytesIO of a downloaded file). If a numeric column holds
+    a value that isn't a number, the rest of the file is re-read with numeric columns left for the cleaner to coerce.
+    """
+    position = path.tell() if hasattr(path, 'seek') else None
+    usecols, dtype = parse_plan(path, column_names, relevant_features, column_types, delimiter=delimiter)
+    rows = 0
+    while True:
+        reader = pd.read_csv(path, delimiter=delimiter, usecols=usecols, dtype=dtype, chunksize=chunksize,
+                             skiprows=range(1, rows + 1) if rows else None, encoding='utf-8',
+                             encoding_errors='ignore')
+        with reader:
+            while True:
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    return
+                except ValueError:
+                    if all(parse_type != 'float64' for parse_type in dtype.values()):
+                        raise
+                    break
+                rows += len(chunk)
+                yield cleaner(chunk)
+        # A value the parser couldn't read as a number: read the rest with numeric columns parsed as strings, for the
+        # cleaner to coerce (malformed values become missing)
+        dtype = {column: 'str' if parse_type == 'float64' else parse_type for column, parse_type in dtype.items()}
+        if position is not None:
+            path.seek(position)
+
+
+def count_rows(path, block_size=2 ** 24):
+    """
+    Upper bound on the data rows of an export: its lines after the header, counted in blocks without parsing.
+    None for a URL. A buffer is left at its starting position.
+    """
+    if hasattr(path, 'seek'):
+        position = path.tell()
+        lines = sum(block.count(b'\n' if isinstance(block, bytes) else '\n')
+                    for block in iter(lambda: path.read(block_size), path.read(0)))
+        path.seek(position)
+    elif '://' in str(path):
+        return None
+    else:
+        with open(path, 'rb') as file:
+            lines = sum(block.count(b'\n') for block in iter(lambda: file.read(block_size), b''))
+    # A last line without a newline isn't counted, the header is
+    return lines
+
+
+# Nullable arrays concat_chunks stores as values & an NA mask
+MASKED_ARRAYS = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+
+
+class _ColumnBuffer:
+    """
+    Preallocated storage for one column of concat_chunks: numpy values, plus an NA mask for nullable arrays.
+    Categoricals are stored as codes. Rows no chunk fills are 0, or missing where the type has missing values.
+    """
+
+    def __init__(self, series, capacity):
+        self.dtype = series.dtype
+        self.mask = None
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            self.fill, numpy_dtype = -1, 'int32'
+        elif isinstance(series.array, MASKED_ARRAYS):
+            self.fill, numpy_dtype = 0, self.dtype.numpy_dtype
+            self.mask = np.ones(capacity, dtype=bool)
+            self.array_type = type(series.array)
+        elif isinstance(self.dtype, np.dtype):
+            self.fill, numpy_dtype = 0, self.dtype
+        else:
+            self.fill, numpy_dtype = None, object
+        self.values = np.full(capacity, self.fill, dtype=numpy_dtype)
+
+    def grow(self, capacity):
+        values = np.full(capacity, self.fill, dtype=self.values.dtype)
+        values[:len(self.values)] = self.values
+        self.values = values
+        if self.mask is not None:
+            mask = np.ones(capacity, dtype=bool)
+            mask[:len(self.mask)] = self.mask
+            self.mask = mask
+
+    def write(self, series, rows):
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            categories = self.dtype.categories
+            if series.cat.categories[:len(categories)].equals(categories):
+                # Later chunks' categories usually extend earlier ones', so codes stay valid
+                self.dtype = series.dtype
+            else:
+                categories = categories.append(series.cat.categories.difference(categories, sort=False))
+                self.dtype = pd.CategoricalDtype(categories, ordered=self.dtype.ordered)
+                series = series.cat.set_categories(categories)
+            self.values[rows] = series.cat.codes.to_numpy()
+        elif self.mask is not None:
+            self.mask[rows] = series.isna().to_numpy()
+            self.values[rows] = series.to_numpy(dtype=self.values.dtype, na_value=0)
+        else:
+            self.values[rows] = series.to_numpy()
+
+    def array(self, rows):
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            return pd.Categorical.from_codes(self.values[:rows], dtype=self.dtype)
+        if self.mask is not None:
+            return self.array_type(self.values[:rows], self.mask[:rows])
+        if self.values.dtype == object:
+            return pd.array(self.values[:rows], dtype=self.dtype)
+        return self.values[:rows]
+
+
+def concat_chunks(chunks, rows=None, position_column=None):
+    """
+    Concatenates cleaned chunks into columns preallocated for `rows` rows (grown if more arrive), so the table is
+    never held twice, as a list of chunks & their concat. A column missing from some chunks (e.g. MALFORMED_COLUMN)
+    is 0 or missing there. With position_column, each chunk's rows are written to the row positions that column
+    holds (& it's dropped), e.g. to put results back in input order. rows must then be the total.
+    """
+    capacity = rows or DEFAULT_CHUNKSIZE
+    buffers = {}
+    filled = 0
+    for chunk in chunks:
+        end = filled + len(chunk)
+        if position_column is None:
+            positions = slice(filled, end)
+            if end > capacity:
+                capacity = max(end, 2 * capacity)
+                for buffer in buffers.values():
+                    buffer.grow(capacity)
+        else:
+            positions = chunk.pop(position_column).to_numpy()
+        for column in chunk.columns:
+            if column not in buffers:
+                buffers[column] = _ColumnBuffer(chunk[column], capacity)
+            buffers[column].write(chunk[column], positions)
+        filled = end
+    if position_column is not None and filled != rows:
+        raise ValueError(f'Chunks hold {filled} rows, expected {rows}')
+    return pd.DataFrame({column: buffer.array(filled) for column, buffer in buffers.items()}, copy=False)
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+from shot_helper_functions import FIELD_DISTANCE_CATEGORIES, SHOT_KEYS
+
+SG_GROUP = ['SGCategory', 'CourseID', 'Round', 'EventID', 'Hole']
+HOLE_GROUP = ['EventID', 'Hole']
+FIELD_GROUP = ['EventID', 'Hole', 'detailed_category']
+PLAYER_ROUND_GROUP = ['EventID', 'PlayerID', 'Round']
+
+
+def _tee_shots(shots):
+    return shots['SGCategory'] == 'Off the Tee'
+
+
+def _field_shots(shots):
+    return shots['detailed_category'].isin(FIELD_DISTANCE_CATEGORIES)
+
+
+# Running means kept as sums & counts of non-missing values: name -> (group keys, value column, row filter)
+MEAN_AGGREGATES = {
+    'AvgSG': (SG_GROUP, 'SGBaseline', None),
+    'HoleAvg': (HOLE_GROUP, 'HoleScore', None),
+    'DD_Avg': (HOLE_GROUP, 'ShotDistance', _tee_shots),
+    'Avg_ToDistance': (FIELD_GROUP, 'ToDistance', _field_shots),
+}
+
+
+# Shot columns a store keeps, so it can re-emit the values of stored shots whose groups a later batch changes
+STORED_COLUMNS = SHOT_KEYS + ['CourseID', 'SGCategory', 'detailed_category', 'SGBaseline', 'HoleScore', 'Strokes',
+                              'ShotDistance', 'ToDistance']
+# Per shot values append() emits, indexed by SHOT_KEYS
+CHANGED_COLUMNS = ['AdjSG', 'Vs_HoleAvg', 'Vs_RoundAvg', 'Vs_EventAvg', 'Vs_Field']
+
+
+def _as_key(key):
+    return key if isinstance(key, tuple) else (key,)
+
+
+def _lookup(state, shots, keys):
+    """
+    Looks up state's [total, count] for every row of shots with one index lookup. Missing keys give NaN.
+    """
+    values = np.full((len(shots), 2), np.nan)
+    if not state:
+        return values
+    positions = pd.MultiIndex.from_tuples(list(state), names=keys).get_indexer(pd.MultiIndex.from_frame(shots[keys]))
+    found = positions >= 0
+    values[found] = np.array(list(state.values()), dtype='float64')[positions[found]]
+    return values
+
+
+class FieldAggregates:
+    """
+    Incremental store for the field averages behind AdjSG & the Vs_* columns (relative_SG & shot_feature_engineering).
+    Keeps running sums & counts per group, so appending a batch of shots only updates the groups in that batch.
+    States are mergeable & batches can be retracted, so late corrections are a retract of the old rows plus an
+    append of the new ones.
+    Shots must already be categorised & passed through missing_shots_handler, with detailed_category assigned, &
+    be unique on SHOT_KEYS.
+    Besides the sums, the STORED_COLUMNS of every open event's shots are kept (about 55 bytes a shot, 2MB for a 43K
+    shot event). They are needed because a batch moves its event's RoundAvg & EventAvg, so the Vs_* values of every
+    shot in the event change & append() re-emits them all: about 0.1s for a 43K shot event, whatever the size of the
+    store, against minutes for rerunning the season. close() drops a finished event's shots, so memory only grows with
+    the live events.
+    """
+
+    def __init__(self):
+        self.means = {name: {} for name in MEAN_AGGREGATES}
+        # (EventID, PlayerID, Round) -> [RoundScore, number of shots]
+        self.player_rounds = {}
+        # RoundAvg & EventAvg are means over shots of RoundScore: keep sum(shots * RoundScore) & sum(shots)
+        self.rounds = {}
+        self.events = {}
+        # EventID -> the event's STORED_COLUMNS
+        self.shots = {}
+
+    @classmethod
+    def from_shots(cls, shots):
+        store = cls()
+        store._update(shots, 1)
+        return store
+
+    def append(self, shots):
+        """
+        Adds a batch of shots. Returns the AdjSG & Vs_* values (CHANGED_COLUMNS) of every stored shot in the batch's
+        events, indexed by SHOT_KEYS: a new round moves its event's EventAvg, so all of them can change.
+        """
+        self._update(shots, 1)
+        return self._changed(shots)
+
+    def retract(self, shots):
+        """
+        Removes a batch of shots that was previously appended. Returns the new values of the remaining shots in
+        the batch's events, as append does.
+        """
+        self._update(shots, -1)
+        return self._changed(shots)
+
+    def correct(self, old_shots, new_shots):
+        """
+        Replaces previously appended shots with corrected ones.
+        """
+        changed = pd.concat([self.retract(old_shots), self.append(new_shots)])
+        return changed[~changed.index.duplicated(keep='last')]
+
+    def close(self, event):
+        """
+        Drops a finished event's stored shots, keeping its sums. Later batches for it still update the sums but only
+        re-emit their own shots.
+        """
+        self.shots.pop(event, None)
+
+    def merge(self, other):
+        """
+        Folds another store (e.g. one built on a different worker or batch of shots) into this one.
+        """
+        for name, state in other.means.items():
+            for key, (total, count) in state.items():
+                self._add_mean(name, key, total, count)
+        for key, (score, shots) in other.player_rounds.items():
+            self._add_player_round(key, score, shots)
+        for event, shots in other.shots.items():
+            self._store_event(event, shots, 1)
+        return self
+
+    def _add_mean(self, name, key, total, count):
+        current = self.means[name].setdefault(key, [0.0, 0])
+        current[0] += total
+        current[1] += count
+        if current[1] == 0:
+            del self.means[name][key]
+
+    def _add_player_round(self, key, score, shots):
+        old_score, old_shots = self.player_rounds.get(key, (0.0, 0))
+        new_score, new_shots = old_score + score, old_shots + shots
+        weighted_change = new_shots * new_score - old_shots * old_score
+        event, _, round_ = key
+        for state, state_key in ((self.rounds, (event, round_)), (self.events, (event,))):
+            current = state.setdefault(state_key, [0.0, 0])
+            current[0] += weighted_change
+            current[1] += new_shots - old_shots
+            if current[1] == 0:
+                del state[state_key]
+        if new_shots == 0:
+            self.player_rounds.pop(key, None)
+        else:
+            self.player_rounds[key] = [new_score, new_shots]
+
+    def _store_event(self, event, shots, sign):
+        stored = self.shots.get(event)
+        if sign > 0:
+            stored = shots if stored is None else pd.concat([stored, shots], ignore_index=True)
+        elif stored is not None:
+            retracted = pd.MultiIndex.from_frame(stored[SHOT_KEYS]).isin(pd.MultiIndex.from_frame(shots[SHOT_KEYS]))
+            stored = stored[~retracted].reset_index(drop=True)
+        if stored is None or stored.empty:
+            self.shots.pop(event, None)
+        else:
+            self.shots[event] = stored
+
+    def _update(self, shots, sign):
+        for name, (keys, column, row_filter) in MEAN_AGGREGATES.items():
+            rows = shots if row_filter is None else shots[row_filter(shots)]
+            values = pd.to_numeric(rows[column], errors='coerce').astype('float64')
+            grouped = values.groupby([rows[key] for key in keys], observed=True).agg(['sum', 'count'])
+            for key, total, count in zip(grouped.index, grouped['sum'], grouped['count']):
+                self._add_mean(name, _as_key(key), sign * total, sign * count)
+
+        strokes = pd.to_numeric(shots['Strokes'], errors='coerce').astype('float64')
+        grouped = strokes.groupby([shots[key] for key in PLAYER_ROUND_GROUP]).agg(['sum', 'size'])
+        for key, score, size in zip(grouped.index, grouped['sum'], grouped['size']):
+            self._add_player_round(_as_key(key), sign * score, sign * size)
+
+        for event, rows in shots[STORED_COLUMNS].groupby('EventID', sort=False):
+            self._store_event(event, rows, sign)
+
+    def _changed(self, shots):
+        events = [self.shots[event] for event in shots['EventID'].dropna().unique() if event in self.shots]
+        if not events:
+            return pd.DataFrame(columns=CHANGED_COLUMNS, dtype='float64',
+                                index=pd.MultiIndex.from_arrays([[]] * len(SHOT_KEYS), names=SHOT_KEYS))
+        changed = self.annotate(pd.concat(events, ignore_index=True))
+        return changed.set_index(SHOT_KEYS)[CHANGED_COLUMNS]
+
+    def annotate(self, shots):
+        """
+        Writes AvgSG, AdjSG, HoleAvg, RoundScore, RoundAvg, EventAvg, the Vs_* columns & Vs_Field onto shots
+        from the current state.
+        """
+        for name, (keys, _, _) in MEAN_AGGREGATES.items():
+            totals, counts = _lookup(self.means[name], shots, keys).T
+            with np.errstate(divide='ignore', invalid='ignore'):
+                means = np.where(counts > 0, totals / counts, np.nan)
+            if name == 'HoleAvg':
+                means = np.round(means, 0)
+            if name in ('AvgSG', 'HoleAvg'):
+                shots[name] = means
+            else:
+                shots['_' + name] = means
+        shots['AdjSG'] = shots['SGBaseline'] - shots['AvgSG']
+        shots['Vs_HoleAvg'] = shots['HoleScore'] - shots['HoleAvg']
+
+        shots['RoundScore'] = _lookup(self.player_rounds, shots, PLAYER_ROUND_GROUP)[:, 0]
+        for name, state, keys in (('RoundAvg', self.rounds, ['EventID', 'Round']),
+                                  ('EventAvg', self.events, ['EventID'])):
+            totals, counts = _lookup(state, shots, keys).T
+            with np.errstate(divide='ignore', invalid='ignore'):
+                shots[name] = totals / counts
+        shots['Vs_RoundAvg'] = shots['RoundScore'] - shots['RoundAvg']
+        shots['Vs_EventAvg'] = shots['RoundScore'] - shots['EventAvg']
+
+        shots['Vs_Field'] = np.nan
+        tee_shot = _tee_shots(shots)
+        shots.loc[tee_shot, 'Vs_Field'] = (pd.to_numeric(shots.loc[tee_shot, 'ShotDistance']).astype('float64')
+                                           - shots.loc[tee_shot, '_DD_Avg'])
+        field_shot = _field_shots(shots)
+        shots.loc[field_shot, 'Vs_Field'] = (pd.to_numeric(shots.loc[field_shot, 'ToDistance']).astype('float64')
+                                             - shots.loc[field_shot, '_Avg_ToDistance'])
+        shots.drop(['_DD_Avg', '_Avg_ToDistance'], axis='columns', inplace=True)
+        return shots
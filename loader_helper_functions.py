@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+import urllib.error
+import urllib.request
+from io import BytesIO
+
+from cache_helper_functions import file_fingerprint
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PARSE_WORKERS = 2
+DEFAULT_RETRIES = 3
+# Seconds before the first retry, doubled for each one after
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 60
+
+
+class ChecksumError(ValueError):
+    pass
+
+
+class Source:
+    """
+    One file to load: a local path or http(s) URL, the loader that parses & cleans it (e.g. load_shot_stats, which
+    accepts a path or a buffer) & optionally its expected sha256.
+    """
+
+    def __init__(self, name, location, loader, sha256=None):
+        self.name = name
+        self.location = location
+        self.loader = loader
+        self.sha256 = sha256
+
+    @property
+    def is_remote(self):
+        return self.location.startswith(('http://', 'https://'))
+
+    def __repr__(self):
+        return f'Source({self.name!r}, {self.location!r})'
+
+
+def _download(url, timeout=DEFAULT_TIMEOUT):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def _verify(source, digest):
+    if source.sha256 is not None and digest != source.sha256:
+        raise ChecksumError(f'{source.name}: sha256 {digest} does not match expected {source.sha256}')
+
+
+async def fetch(source, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT):
+    """
+    What source.loader should read: a BytesIO of a downloaded file, or the path of a local one. Blocking reads run
+    in threads. The checksum is verified when given, & failed downloads or checksums are retried with backoff.
+    """
+    for attempt in range(retries + 1):
+        try:
+            if source.is_remote:
+                content = await asyncio.to_thread(_download, source.location, timeout)
+                _verify(source, hashlib.sha256(content).hexdigest())
+                return BytesIO(content)
+            if not os.path.exists(source.location):
+                raise FileNotFoundError(source.location)
+            if source.sha256 is not None:
+                _verify(source, await asyncio.to_thread(file_fingerprint, source.location))
+            return source.location
+        except urllib.error.HTTPError as error:
+            # Client errors won't go away on a retry
+            if error.code < 500 or attempt == retries:
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt)
+        except (FileNotFoundError, PermissionError):
+            raise
+        except (OSError, urllib.error.URLError, ChecksumError):
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def iter_sources(sources, concurrency=DEFAULT_CONCURRENCY, parse_workers=DEFAULT_PARSE_WORKERS,
+                       retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetches up to `concurrency` sources at once & hands each to its loader (in a thread, at most `parse_workers` at
+    once) as soon as it arrives, so downloads overlap parsing. Yields (source, frame) in completion order.
+    A source that still fails after its retries raises when its turn comes.
+    """
+    fetch_slots = asyncio.Semaphore(concurrency)
+    parse_slots = asyncio.Semaphore(parse_workers)
+
+    async def load(source):
+        async with fetch_slots:
+            data = await fetch(source, retries, backoff, timeout)
+        async with parse_slots:
+            return source, await asyncio.to_thread(source.loader, data)
+
+    tasks = [asyncio.ensure_future(load(source)) for source in sources]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def load_sources_async(sources, **kwargs):
+    """
+    Loads every source concurrently. Returns name -> frame.
+    """
+    return {source.name: frame async for source, frame in iter_sources(sources, **kwargs)}
+
+
+def load_sources(sources, **kwargs):
+    """
+    Blocking wrapper of load_sources_async, e.g. for multi-season backfills from a script
+    """
+    return asyncio.run(load_sources_async(sources, **kwargs))
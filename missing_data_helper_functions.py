@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+
+def _as_mask(mask, length):
+    """
+    Rule output -> plain bool array, treating missing as False
+    """
+    if isinstance(mask, pd.Series):
+        mask = mask.fillna(False)
+    return np.broadcast_to(np.asarray(mask, dtype=bool), (length,))
+
+
+def zeros(column):
+    """
+    Rule: blank values equal to 0
+    """
+    return lambda df: df[column] == 0
+
+
+def zeros_where(column, condition):
+    """
+    Rule: blank values equal to 0 on rows where condition(df) holds
+    """
+    return lambda df: (df[column] == 0) & condition(df)
+
+
+def where(condition):
+    """
+    Rule: blank values on rows where condition(df) holds
+    """
+    return condition
+
+
+def outside(column, limit):
+    """
+    Rule: blank values with an absolute value above limit
+    """
+    return lambda df: df[column].abs() > limit
+
+
+def zeros_above_percent(column, percent, keys):
+    """
+    Rule: blank all zeros in a column if more than `percent`% of its rows (with a complete group key) are 0.
+    Which columns were blanked shows up in the handlers' return_report counts.
+    """
+    def rule(df):
+        percentage_zeros = zero_percentage(df, column, keys)
+        if percentage_zeros > percent:
+            return df[column] == 0
+        return False
+    return rule
+
+
+def missing_key(keys):
+    """
+    Rule: blank values on rows where any of keys is missing (what a grouped transform over keys would give)
+    """
+    return lambda df: df[keys].isna().any(axis=1)
+
+
+def zero_percentage(df, column, keys):
+    """
+    Percent of entries = 0 in a column, over rows whose group key is complete
+    """
+    valid = df[keys].notna().all(axis=1)
+    total = int(valid.sum())
+    if total == 0:
+        return np.nan
+    zeros_count = int(((df[column] == 0).fillna(False) & valid).sum())
+    return zeros_count / total * 100
+
+
+def apply_missing_data_rules(df, rules):
+    """
+    Applies (column, rule) pairs in order, each rule a vectorized mask of the values to set to NaN.
+    Returns df & a per column count of the values that were changed.
+    """
+    report = {}
+    for column, rule in rules:
+        mask = _as_mask(rule(df), len(df)) & df[column].notna().to_numpy(dtype=bool)
+        changed = int(mask.sum())
+        if changed:
+            df[column] = df[column].mask(mask)
+        report[column] = report.get(column, 0) + changed
+    return df, pd.Series(report, name='values_changed', dtype='int64')
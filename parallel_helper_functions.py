@@ -0,0 +1,141 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from hole_helper_functions import hole_feature_engineering, hole_missing_data_handler
+from io_helper_functions import concat_chunks
+from shot_helper_functions import add_SG_category, add_detailed_category, missing_shots_handler, relative_SG, \
+    shot_feature_engineering
+
+# Every group in these stages is at EventID granularity or finer, so they can run per event
+SHOT_SHARD_STAGES = [add_SG_category, missing_shots_handler, relative_SG, add_detailed_category,
+                     shot_feature_engineering]
+HOLE_SHARD_STAGES = [hole_feature_engineering]
+ROW_ORDER_COLUMN = '_row_order'
+
+
+def to_shared_memory(df):
+    """
+    Writes a frame into a new shared memory block as an Arrow IPC stream. Returns the block & the stream size.
+    """
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Size the stream first so it can be written straight into the block without an intermediate copy
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, table.schema) as writer:
+        writer.write_table(table)
+    size = sizer.size()
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    target = pa.py_buffer(block.buf)
+    with pa.ipc.new_stream(pa.FixedSizeBufferWriter(target), table.schema) as writer:
+        writer.write_table(table)
+    # Drop the export of block.buf so the block can be closed later
+    del target
+    return block, size
+
+
+def from_shared_memory(name, size):
+    """
+    Reads a frame written by to_shared_memory. The stream is copied out in one go so the block can be closed
+    straight away without pandas holding references into it.
+    """
+    import pyarrow as pa
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        data = bytes(block.buf[:size])
+    finally:
+        block.close()
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
+
+
+def _run_shard(name, size, stages):
+    """
+    Worker: runs the stages over one shard & hands the result back through shared memory.
+    """
+    df = from_shared_memory(name, size)
+    for stage in stages:
+        df = stage(df)
+    block, size = to_shared_memory(df)
+    block.close()
+    return block.name, size
+
+
+def _release(block):
+    """
+    Closes & unlinks a shared memory block
+    """
+    block.close()
+    block.unlink()
+
+
+def run_sharded(df, stages, shard_key='EventID', max_workers=None, max_in_flight=None):
+    """
+    Partitions df by shard_key & runs the stages on each shard in a process pool. Shards travel as Arrow buffers in
+    shared memory rather than pickled DataFrames, & are copied out of df only as workers free up: at most
+    max_in_flight (2 per worker by default) are in shared memory at once. Results are written back into the input's
+    row order as they arrive. The stages must keep every row. Every block is unlinked even when a shard fails.
+    """
+    max_workers = max_workers or os.cpu_count()
+    max_in_flight = max_in_flight or 2 * max_workers
+    groups = df.groupby(shard_key, sort=True, dropna=False, observed=True).indices
+    # Biggest shards first so the pool isn't left waiting on one large event at the end
+    pending = iter(enumerate(sorted(groups.values(), key=len, reverse=True)))
+    blocks, futures = {}, {}
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            def submit():
+                for i, positions in pending:
+                    shard = df.iloc[positions].assign(**{ROW_ORDER_COLUMN: positions})
+                    blocks[i], size = to_shared_memory(shard)
+                    futures[i] = executor.submit(_run_shard, blocks[i].name, size, stages)
+                    return
+
+            def collect():
+                while futures:
+                    done, _ = wait(futures.values(), return_when=FIRST_COMPLETED)
+                    for i in [i for i, future in futures.items() if future in done]:
+                        name, size = futures.pop(i).result()
+                        try:
+                            shard = from_shared_memory(name, size)
+                        finally:
+                            _release(shared_memory.SharedMemory(name=name))
+                        _release(blocks.pop(i))
+                        submit()
+                        yield shard
+
+            try:
+                for _ in range(max_in_flight):
+                    submit()
+                # Each result is written straight to its rows' positions, so results aren't held twice
+                result = concat_chunks(collect(), len(df), ROW_ORDER_COLUMN)
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+    finally:
+        # The pool has shut down, so every future is settled: free the input blocks & the results not collected
+        for block in blocks.values():
+            _release(block)
+        for future in futures.values():
+            if not future.cancelled() and future.exception() is None:
+                _release(shared_memory.SharedMemory(name=future.result()[0]))
+    result.index = df.index
+    return result
+
+
+def shot_pipeline_sharded(shot_stats, max_workers=None):
+    """
+    Cleaned shots -> SG categories, missing data, relative_SG, detailed categories & features, one event per task.
+    """
+    return run_sharded(shot_stats, SHOT_SHARD_STAGES, max_workers=max_workers)
+
+
+def hole_pipeline_sharded(hole_stats, max_workers=None):
+    """
+    Cleaned holes -> missing data & features. hole_missing_data_handler decides which columns to blank from the
+    zero percentage of the whole table, so it runs before sharding.
+    """
+    hole_stats = hole_missing_data_handler(hole_stats)
+    return run_sharded(hole_stats, HOLE_SHARD_STAGES, max_workers=max_workers)
@@ -0,0 +1,273 @@
+import functools
+import inspect
+import os
+import sys
+
+from cache_helper_functions import DEFAULT_CACHE_DIR, run_cached_stages
+from course_helper_functions import CourseProfiles, build_hole_profiles, build_shot_profiles, load_course_stats
+from dtype_helper_functions import load_vocabularies, save_vocabularies
+from expected_strokes_helper_functions import fill_missing_SG
+from hole_helper_functions import HOLE_FIELD_AVERAGES, HOLE_FIELD_RATES, HOLE_MISSING_DATA_RULES, \
+    HOLE_RELEVANT_FEATURES, hole_feature_engineering, hole_missing_data_handler, load_hole_stats, validate_holes
+from profiling_helper_functions import PipelineProfiler
+from rollup_helper_functions import roll_up_shots
+from shot_helper_functions import SHOT_MISSING_DATA_RULES, SHOT_RELEVANT_FEATURES, add_detailed_category, \
+    add_SG_category, load_shot_stats, missing_shots_handler, relative_SG, shot_feature_engineering, validate_shots
+
+# Vocabularies are persisted in the cache dir, next to the cached frames whose categories they fix
+VOCABULARIES_FILE = 'vocabularies.json'
+
+
+def _rule_columns(rules):
+    return list(dict.fromkeys(column for column, _ in rules))
+
+
+def _vocabulary_sizes(vocabularies):
+    return {column: len(values) for column, values in vocabularies.items()}
+
+
+def lazy_attributes(module_name, attributes):
+    """
+    Module __getattr__ computing each of attributes (name -> function) on first access & caching it on the module,
+    so importing the module (e.g. in a worker process) does no work
+    """
+    module = sys.modules[module_name]
+
+    def __getattr__(name):
+        if name not in attributes:
+            raise AttributeError(f'module {module_name!r} has no attribute {name!r}')
+        value = attributes[name]()
+        setattr(module, name, value)
+        return value
+    return __getattr__
+
+
+class Pipeline:
+    """
+    Lazily evaluated pipeline over one source file. Nothing is read until a result is asked for, and then only the
+    stages the requested columns depend on are run. Leading stages in CACHED_STAGES go through run_cached_stages.
+    Columns no stage lists are taken to come from the loader. Stages taking a keyword of stage_options() get the
+    pipeline's value, e.g. validation stages write their quarantine file to quarantine_dir (by default under cache_dir)
+    & the feature stages look field averages up from course_profiles (a CourseProfiles or a profile pipeline) instead
+    of grouping per event. With expected_strokes (an ExpectedStrokesTable), SG that missing data handling blanked is
+    filled in from the table. Loaders encode categoricals over the pipeline's vocabularies, persisted in
+    vocabularies_path (by default in cache_dir).
+    """
+    # Stages in run order: (function, columns it adds or rewrites, names of the stages it needs first).
+    # The first stage is the loader & takes the source path.
+    STAGES = []
+    CACHED_STAGES = ()
+
+    def __init__(self, path, columns=None, cache_dir=DEFAULT_CACHE_DIR, vocabularies_path=None,
+                 profiler=None, quarantine_dir=None, course_profiles=None, expected_strokes=None):
+        self.path = path
+        self.columns = columns
+        self.cache_dir = cache_dir
+        if quarantine_dir is None and cache_dir is not None:
+            quarantine_dir = os.path.join(cache_dir, 'quarantine')
+        self.quarantine_dir = quarantine_dir
+        if vocabularies_path is None and cache_dir is not None:
+            vocabularies_path = os.path.join(cache_dir, VOCABULARIES_FILE)
+        self.vocabularies_path = vocabularies_path
+        self.vocabularies = {}
+        self.course_profiles = course_profiles
+        self.expected_strokes = expected_strokes
+        self.profiler = profiler or PipelineProfiler()
+        self._frame = None
+        self._done = []
+
+    @property
+    def stage_names(self):
+        return [stage.__name__ for stage, _, _ in self.STAGES]
+
+    def stage_options(self):
+        """
+        Keyword arguments passed to the stages that take them
+        """
+        quarantine_path = None
+        if self.quarantine_dir:
+            name = os.path.splitext(os.path.basename(self.path))[0]
+            quarantine_path = os.path.join(self.quarantine_dir, f'{name}.csv')
+        return {'quarantine_path': quarantine_path, 'vocabularies': self.vocabularies,
+                'course_profiles': self.course_profiles, 'expected_strokes': self.expected_strokes}
+
+    def _bind(self, stage):
+        # The wrapper keeps the stage's name & source, so options don't change its cache key
+        parameters = inspect.signature(stage).parameters
+        options = {name: value for name, value in self.stage_options().items() if name in parameters}
+        if not options:
+            return stage
+
+        @functools.wraps(stage)
+        def bound(*args):
+            return stage(*args, **options)
+        return bound
+
+    def stages_for(self, columns=None):
+        """
+        Names of the stages needed for columns (all stages if None), in run order
+        """
+        if columns is None:
+            return self.stage_names
+        producers = {}
+        for stage, produces, _ in self.STAGES:
+            producers.update(dict.fromkeys(produces, stage.__name__))
+        requires = {stage.__name__: required for stage, _, required in self.STAGES}
+        needed = set()
+        pending = [self.stage_names[0]] + [producers.get(column, self.stage_names[0]) for column in columns]
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(requires[name])
+        return [name for name in self.stage_names if name in needed]
+
+    def result(self, columns=None):
+        """
+        The processed frame, restricted to columns (the pipeline's default columns if None). Stages already run
+        are not run again.
+        """
+        columns = self.columns if columns is None else columns
+        self._run(self.stages_for(columns))
+        return self._frame if columns is None else self._frame[list(columns)]
+
+    def _run(self, needed):
+        # A stage skipped earlier can run after later ones, since every stage's requirements are already done
+        remaining = [name for name in needed if name not in self._done]
+        if not remaining:
+            return
+        stages = {stage.__name__: self._bind(stage) for stage, _, _ in self.STAGES}
+        if self._frame is None and self.vocabularies_path:
+            load_vocabularies(self.vocabularies_path, self.vocabularies)
+        sizes = _vocabulary_sizes(self.vocabularies)
+        if self._frame is None:
+            cached = []
+            for name in remaining:
+                if self.cache_dir is None or name not in self.CACHED_STAGES:
+                    break
+                cached.append(name)
+            if cached:
+                self._frame = run_cached_stages(self.path, [self.profiler.stage(stages[name]) for name in cached],
+                                                self.cache_dir)
+            else:
+                self._frame = self.profiler.run(remaining[0], stages[remaining[0]], self.path)
+                cached = remaining[:1]
+            self._done.extend(cached)
+            remaining = remaining[len(cached):]
+        for name in remaining:
+            self._frame = self.profiler.run(name, stages[name], self._frame)
+            self._done.append(name)
+        # Vocabularies only grow, so they changed if any got longer. Values other pipelines saved meanwhile are merged
+        # in first, so they aren't lost.
+        if self.vocabularies_path and _vocabulary_sizes(self.vocabularies) != sizes:
+            save_vocabularies(self.vocabularies_path, load_vocabularies(self.vocabularies_path, self.vocabularies))
+
+
+class ShotPipeline(Pipeline):
+    """
+    rshot.txt -> cleaned & validated shots, SG categories, missing data (with expected_strokes, missing SG filled
+    from the table), relative SG, detailed categories & field features
+    """
+    STAGES = [
+        (load_shot_stats, SHOT_RELEVANT_FEATURES, []),
+        (validate_shots, [], ['load_shot_stats']),
+        (add_SG_category, ['SGCategory'], ['validate_shots']),
+        (missing_shots_handler, _rule_columns(SHOT_MISSING_DATA_RULES), ['add_SG_category']),
+        (fill_missing_SG, ['SGBaseline'], ['missing_shots_handler']),
+        (relative_SG, ['AvgSG', 'AdjSG'], ['fill_missing_SG']),
+        (add_detailed_category, ['detailed_category'], ['missing_shots_handler']),
+        (shot_feature_engineering,
+         ['HoleAvg', 'Vs_HoleAvg', 'RoundScore', 'RoundAvg', 'Vs_RoundAvg', 'EventAvg', 'Vs_EventAvg', 'Vs_Field',
+          'Fairway', 'FairwayAvg'],
+         ['add_detailed_category']),
+    ]
+    CACHED_STAGES = ('load_shot_stats', 'validate_shots', 'add_SG_category', 'missing_shots_handler')
+
+
+class HolePipeline(Pipeline):
+    """
+    rhole.txt -> cleaned & validated holes, missing data & field features
+    """
+    STAGES = [
+        (load_hole_stats, HOLE_RELEVANT_FEATURES, []),
+        (validate_holes, [], ['load_hole_stats']),
+        (hole_missing_data_handler, _rule_columns(HOLE_MISSING_DATA_RULES), ['validate_holes']),
+        (hole_feature_engineering,
+         [column for columns in list(HOLE_FIELD_AVERAGES.values()) + list(HOLE_FIELD_RATES.values())
+          for column in columns] + ['HoleLengthCategory'],
+         ['hole_missing_data_handler']),
+    ]
+    CACHED_STAGES = ('load_hole_stats', 'validate_holes', 'hole_missing_data_handler')
+
+
+class ProfilePipeline(Pipeline):
+    """
+    Pipeline whose result is a course hole profile table. It can be passed as another pipeline's course_profiles:
+    the profiles are only built when a feature stage first looks one up.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._profiles = None
+
+    def profiles(self):
+        if self._profiles is None:
+            self._profiles = CourseProfiles(self.result())
+        return self._profiles
+
+    def lookup(self, df, column, by=None):
+        return self.profiles().lookup(df, column, by)
+
+
+class HoleProfilePipeline(ProfilePipeline):
+    """
+    rhole.txt -> per course hole profiles for hole_feature_engineering. Every stage is cached, so the profiles are
+    only rebuilt when the export changes.
+    """
+    STAGES = HolePipeline.STAGES[:3] + [
+        (build_hole_profiles, [], ['hole_missing_data_handler']),
+    ]
+    CACHED_STAGES = ('load_hole_stats', 'validate_holes', 'hole_missing_data_handler', 'build_hole_profiles')
+
+
+class ShotProfilePipeline(ProfilePipeline):
+    """
+    rshot.txt -> per course hole profiles for shot_feature_engineering, all stages cached
+    """
+    STAGES = ShotPipeline.STAGES[:4] + [
+        ShotPipeline.STAGES[6],
+        (build_shot_profiles, [], ['add_detailed_category']),
+    ]
+    CACHED_STAGES = ('load_shot_stats', 'validate_shots', 'add_SG_category', 'missing_shots_handler',
+                     'add_detailed_category', 'build_shot_profiles')
+
+
+def load_holes_from_shots(path, quarantine_path=None, vocabularies=None):
+    """
+    Holes rolled up from an rshot.txt export. Shots are rolled up before missing_shots_handler, like rhole's values.
+    """
+    vocabularies = {} if vocabularies is None else vocabularies
+    shot_stats = validate_shots(load_shot_stats(path, vocabularies=vocabularies), quarantine_path)
+    return roll_up_shots(add_SG_category(shot_stats), vocabularies)
+
+
+class DerivedHolePipeline(Pipeline):
+    """
+    HolePipeline with the holes rolled up from rshot.txt instead of read from rhole.txt, for runs where only the
+    shots changed. path is the shot export.
+    """
+    STAGES = [
+        (load_holes_from_shots, HOLE_RELEVANT_FEATURES, []),
+        (hole_missing_data_handler, _rule_columns(HOLE_MISSING_DATA_RULES), ['load_holes_from_shots']),
+        HolePipeline.STAGES[3],
+    ]
+    CACHED_STAGES = ('load_holes_from_shots', 'hole_missing_data_handler')
+
+
+class CoursePipeline(Pipeline):
+    """
+    Course file (local path or URL) -> cleaned course stats. Course files are small, so they aren't cached.
+    """
+    STAGES = [
+        (load_course_stats, [], []),
+    ]
@@ -0,0 +1,124 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+
+import pandas as pd
+
+PROFILE_MODES = (None, 'cprofile', 'tracemalloc')
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes. Reads /proc where available, which is much cheaper than psutil.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return peak_rss()
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes (ru_maxrss is KiB on Linux)
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _rows(value):
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+class PipelineProfiler:
+    """
+    Records wall & CPU time, peak RSS growth, net bytes allocated (RSS delta) & rows in/out for each pipeline stage.
+    Default mode only reads clocks & /proc, so it is cheap enough to leave on. mode='cprofile' or 'tracemalloc' adds
+    a per stage cProfile report or traced allocation peak, for the stages listed in `profiled` (all if None).
+    """
+
+    def __init__(self, mode=None, profiled=None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'mode must be one of {PROFILE_MODES}')
+        self.mode = mode
+        self.profiled = profiled
+        self.records = []
+        self.profiles = {}
+
+    def run(self, name, stage, *args, **kwargs):
+        """
+        Calls stage(*args, **kwargs) & records it under name. Rows in are taken from the first argument.
+        """
+        mode = self.mode if self.profiled is None or name in self.profiled else None
+        rows_in = _rows(args[0]) if args else None
+        rss_before, peak_before = current_rss(), peak_rss()
+        profiler = cProfile.Profile() if mode == 'cprofile' else None
+        if mode == 'tracemalloc':
+            tracemalloc.start()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            result = stage(*args, **kwargs)
+        finally:
+            if profiler:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            traced_peak = None
+            if mode == 'tracemalloc':
+                traced_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        record = {
+            'stage': name,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'peak_rss_delta_mb': (peak_rss() - peak_before) / 2 ** 20,
+            'allocated_mb': (current_rss() - rss_before) / 2 ** 20,
+            'rows_in': rows_in,
+            'rows_out': _rows(result),
+        }
+        if traced_peak is not None:
+            record['traced_peak_mb'] = traced_peak / 2 ** 20
+        if profiler:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(20)
+            self.profiles[name] = stream.getvalue()
+        self.records.append(record)
+        return result
+
+    def stage(self, stage, name=None):
+        """
+        Wraps a stage function so every call is recorded. The wrapper keeps the stage's name & source (for
+        run_cached_stages versioning).
+        """
+        @functools.wraps(stage)
+        def wrapper(*args, **kwargs):
+            return self.run(name or stage.__name__, stage, *args, **kwargs)
+        return wrapper
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.records)
+        return frame.astype({'rows_in': 'Int64', 'rows_out': 'Int64'}) if len(frame) else frame
+
+    def to_json(self, path=None):
+        """
+        Records (and any cProfile reports) as JSON. Written to path if given.
+        """
+        content = json.dumps({'stages': self.records, 'profiles': self.profiles}, indent=1)
+        if path:
+            with open(path, 'w') as file:
+                file.write(content)
+        return content
+
+    def table(self):
+        """
+        Console table of the records
+        """
+        if not self.records:
+            return ''
+        return self.to_frame().to_string(index=False, float_format=lambda value: f'{value:.3f}')
@@ -0,0 +1,153 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+ROSTERS_PATH = 'rosters.json'
+# Primary sort order of an indexed table. Lookups by a prefix of these keys are contiguous slices.
+INDEX_KEYS = ['PlayerID', 'EventID', 'Round', 'Hole']
+# Stands in for missing key values, which sort first
+MISSING_KEY = -1
+
+
+def load_rosters(path=ROSTERS_PATH):
+    """
+    Team rosters from a JSON config: team name -> list of PlayerIDs
+    """
+    with open(path) as file:
+        return {team: [int(player) for player in players] for team, players in json.load(file).items()}
+
+
+class TableIndex:
+    """
+    Query layer over a processed shot or hole table. The table is sorted once by INDEX_KEYS, so lookups by player,
+    (player, event), (player, event, round) ... are binary searches returning zero-copy slices of the sorted frame.
+    EventID & (EventID, Round, Hole) lookups go through hash indexes of row positions, & teams are resolved from
+    the rosters to the union of their players' ranges. Filters are evaluated on numpy arrays at the candidate
+    positions only, & rows are taken from the frame once at the end.
+    """
+
+    def __init__(self, df, rosters=None, keys=INDEX_KEYS):
+        self.keys = list(keys)
+        key_values = [df[key].to_numpy('int64', na_value=MISSING_KEY) for key in self.keys]
+        order = np.lexsort(key_values[::-1])
+        self.frame = df.take(order)
+        self.rosters = rosters or {}
+        self._values = {key: values[order] for key, values in zip(self.keys, key_values)}
+        self._hash_indexes = {}
+        self._team_positions = {}
+
+    def _range(self, values):
+        """
+        [start, stop) of the rows matching a prefix of the index keys, narrowed one key at a time
+        """
+        start, stop = 0, len(self.frame)
+        for key, value in zip(self.keys, values):
+            window = self._values[key][start:stop]
+            start, stop = start + np.searchsorted(window, value, 'left'), start + np.searchsorted(window, value, 'right')
+        return start, stop
+
+    def _hash_index(self, columns):
+        """
+        Row positions per value of columns, built on first use
+        """
+        columns = tuple(columns)
+        if columns not in self._hash_indexes:
+            keys = pd.DataFrame({column: self._column_values(column) for column in columns})
+            self._hash_indexes[columns] = keys.groupby(list(columns), sort=False).indices
+        return self._hash_indexes[columns]
+
+    def _column_values(self, column):
+        """
+        Column as a numpy array for filtering: int64 keys, category codes or the column's values
+        """
+        if column not in self._values:
+            series = self.frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.cat.codes.to_numpy()
+            elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+                values = series.to_numpy('float64', na_value=np.nan)
+            else:
+                values = series.to_numpy(dtype=object)
+            self._values[column] = values
+        return self._values[column]
+
+    def _filter(self, positions, column, value):
+        """
+        Subset of positions (a slice or an array) where column == value, as an array
+        """
+        values = self._column_values(column)
+        dtype = self.frame[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            value = dtype.categories.get_indexer([value])[0]
+            if value == -1:
+                # Not a category, so no row matches (code -1 is a missing value)
+                return np.array([], dtype='int64')
+        if isinstance(positions, slice):
+            return positions.start + np.flatnonzero(values[positions] == value)
+        return positions[values[positions] == value]
+
+    def team_positions(self, team, event_id=None):
+        """
+        Sorted row positions of a team's players, optionally for one event. Whole team positions are kept.
+        """
+        if event_id is None and team in self._team_positions:
+            return self._team_positions[team]
+        prefix = [] if event_id is None else [event_id]
+        ranges = [self._range([player] + prefix) for player in sorted(set(self.rosters[team]))]
+        positions = np.concatenate([np.arange(start, stop) for start, stop in ranges] + [np.array([], dtype='int64')])
+        if event_id is None:
+            self._team_positions[team] = positions
+        return positions
+
+    def positions(self, player_id=None, event_id=None, round_no=None, hole=None, team=None, **equals):
+        """
+        Row positions in the sorted frame matching the query: a slice where the indexes give a contiguous range.
+        """
+        empty = np.array([], dtype='int64')
+        if player_id is not None:
+            values = [player_id, event_id, round_no, hole]
+            prefix = values.index(None) if None in values else len(values)
+            positions = slice(*self._range(values[:prefix]))
+            keys = dict(zip(self.keys[prefix:], values[prefix:]))
+        elif team is not None:
+            positions = self.team_positions(team, event_id)
+            keys = {'Round': round_no, 'Hole': hole}
+        elif event_id is not None and round_no is not None and hole is not None:
+            positions = self._hash_index(['EventID', 'Round', 'Hole']).get((event_id, round_no, hole), empty)
+            keys = {}
+        elif event_id is not None:
+            positions = self._hash_index(['EventID']).get(event_id, empty)
+            keys = {'Round': round_no, 'Hole': hole}
+        else:
+            positions = slice(0, len(self.frame))
+            keys = {'Round': round_no, 'Hole': hole}
+        for column, value in list(keys.items()) + list(equals.items()):
+            if value is not None:
+                positions = self._filter(positions, column, value)
+        return positions
+
+    def query(self, player_id=None, event_id=None, round_no=None, hole=None, team=None, **equals):
+        """
+        Rows matching the given keys & column == value filters, e.g.
+        query(player_id=X, event_id=Y, detailed_category='Putt6-15')
+        """
+        return self.frame.iloc[self.positions(player_id, event_id, round_no, hole, team, **equals)]
+
+    def player(self, player_id, event_id=None, round_no=None, hole=None):
+        """
+        Rows of a player, optionally narrowed to an event, round & hole
+        """
+        return self.query(player_id=player_id, event_id=event_id, round_no=round_no, hole=hole)
+
+    def event(self, event_id, round_no=None, hole=None):
+        """
+        Rows of an event, optionally narrowed to a round & hole
+        """
+        return self.query(event_id=event_id, round_no=round_no, hole=hole)
+
+    def team(self, team, event_id=None):
+        """
+        Rows of a team's players, optionally for one event
+        """
+        return self.query(team=team, event_id=event_id)
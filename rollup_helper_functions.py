@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from dtype_helper_functions import coerce_column_types
+from hole_helper_functions import HOLE_COLUMN_TYPES, HOLE_RELEVANT_FEATURES
+
+HOLE_KEYS = ['EventID', 'PlayerID', 'Round', 'Hole']
+# Per hole columns taken from the hole's first shot
+HOLE_ATTRIBUTES = ['Year', 'TournID', 'CourseID', 'Par', 'Yardage']
+# Shot columns the rollup reads
+ROLLUP_SHOT_COLUMNS = HOLE_KEYS + HOLE_ATTRIBUTES + ['ShotNo', 'Strokes', 'FromLie', 'ToLie', 'ShotDistance',
+                                                     'FromDistance', 'ToDistance', 'SGBaseline', 'SGCategory']
+# SGCategory -> hole SG column
+SG_CATEGORY_COLUMNS = {
+    'Off the Tee': 'SGOTT',
+    'Approach': 'SGAPP',
+    'Around the Green': 'SGARG',
+    'Putt': 'SGPutt',
+}
+# Derived columns compared against rhole.txt: column -> absolute tolerance
+RECONCILED_COLUMNS = {
+    'HoleScore': 0,
+    'ScoreToPar': 0,
+    'Fairway': 0,
+    'GIR': 0,
+    # rhole driving distance is rounded to the yard
+    'DrivingDistance': 1,
+    'TeeShotFinishLie': 0,
+    'AppDistance': 0,
+    'AppProx': 0,
+    'AppShotFinishLie': 0,
+    'SGOTT': 0.01,
+    'SGAPP': 0.01,
+    'SGARG': 0.01,
+    'SGPutt': 0.01,
+}
+
+
+def _float(series):
+    return series.to_numpy('float64', na_value=np.nan)
+
+
+def roll_up_shots(shot_stats, vocabularies=None):
+    """
+    Builds a hole_stats compatible frame (what load_hole_stats returns) from shots with SG categories, in one
+    sorted pass: shots are sorted by (EventID, PlayerID, Round, Hole, ShotNo) once & every per hole value is a
+    reduceat or a take at the hole boundaries. Shots without a complete hole key are dropped.
+    Use shots before missing_shots_handler, so SG sums are over the raw vendor values like rhole's.
+    """
+    shot_stats = shot_stats.loc[shot_stats[HOLE_KEYS].notna().all(axis=1).to_numpy(), ROLLUP_SHOT_COLUMNS]
+    keys = [shot_stats[key].to_numpy('int64') for key in HOLE_KEYS]
+    order = np.lexsort([_float(shot_stats['ShotNo'])] + keys[::-1])
+    keys = [key[order] for key in keys]
+    shots = shot_stats.iloc[order]
+    new_hole = np.ones(len(shots), dtype=bool)
+    new_hole[1:] = np.logical_or.reduce([np.diff(key) != 0 for key in keys])
+    starts = np.flatnonzero(new_hole)
+    if not len(starts):
+        return coerce_column_types(pd.DataFrame(columns=HOLE_RELEVANT_FEATURES), HOLE_COLUMN_TYPES, vocabularies)
+    ends = np.append(starts[1:], len(shots)) - 1
+    position = np.arange(len(shots))
+
+    holes = {key: values[starts] for key, values in zip(HOLE_KEYS, keys)}
+    for column in HOLE_ATTRIBUTES:
+        holes[column] = shots[column].to_numpy()[starts]
+    par = _float(shots['Par'])[starts]
+
+    # Score: strokes summed over the hole's shots
+    strokes = _float(shots['Strokes'])
+    hole_score = np.add.reduceat(strokes, starts)
+    holes['HoleScore'] = hole_score
+    holes['ScoreToPar'] = hole_score - par
+
+    # Tee shot: the hole's first shot
+    to_lie = shots['ToLie'].astype('object').to_numpy()
+    holes['Fairway'] = (to_lie[starts] == 'Fairway') & (par >= 4)
+    holes['DrivingDistance'] = np.where(par >= 4, np.round(_float(shots['ShotDistance'])[starts] / 36), np.nan)
+    holes['TeeShotFinishLie'] = to_lie[starts]
+
+    # Green in regulation: strokes taken before the first shot from the green (all of them if holed from off it)
+    on_green = shots['FromLie'].eq('Green').fillna(False).to_numpy(dtype=bool)
+    first_green = np.minimum.reduceat(np.where(on_green, position, len(shots)), starts)
+    cumulative = np.nancumsum(strokes)
+    before_hole = cumulative[starts] - np.nan_to_num(strokes[starts])
+    before_green = np.where(first_green < len(shots), cumulative[np.minimum(first_green, len(shots) - 1)]
+                            - np.nan_to_num(strokes[np.minimum(first_green, len(shots) - 1)]), cumulative[ends])
+    holes['GIR'] = before_green - before_hole <= par - 2
+
+    # Approach: the hole's last shot from off the green
+    last_off_green = np.maximum.reduceat(np.where(on_green, -1, position), starts)
+    has_approach = last_off_green >= 0
+    approach = np.where(has_approach, last_off_green, 0)
+    holes['AppDistance'] = np.where(has_approach, _float(shots['FromDistance'])[approach], np.nan)
+    holes['AppProx'] = np.where(has_approach, _float(shots['ToDistance'])[approach], np.nan)
+    holes['AppShotFinishLie'] = np.where(has_approach, to_lie[approach], None)
+
+    # SG per category: sums of the shots' SG, NaN if any of the category's shots is missing one
+    sg = _float(shots['SGBaseline'])
+    sg_category = shots['SGCategory'].astype('object').to_numpy()
+    for category, column in SG_CATEGORY_COLUMNS.items():
+        holes[column] = np.add.reduceat(np.where(sg_category == category, sg, 0.0), starts)
+
+    holes = pd.DataFrame(holes).loc[:, HOLE_RELEVANT_FEATURES]
+    return coerce_column_types(holes, HOLE_COLUMN_TYPES, vocabularies)
+
+
+def reconcile_holes(derived, hole_stats, columns=RECONCILED_COLUMNS):
+    """
+    Compares holes rolled up from shots with the cleaned rhole.txt values (both before missing data handling).
+    Returns a per column report: holes compared, matching within tolerance, mismatches, missing on one side only &
+    the mean/max absolute difference. A 'holes' row counts holes found in only one of the tables.
+    """
+    merged = derived.merge(hole_stats, on=HOLE_KEYS, how='outer', suffixes=('_derived', '_rhole'), indicator=True)
+    report = {'holes': {'compared': int((merged['_merge'] == 'both').sum()),
+                        'only_derived': int((merged['_merge'] == 'left_only').sum()),
+                        'only_rhole': int((merged['_merge'] == 'right_only').sum())}}
+    both = merged[merged['_merge'] == 'both']
+    for column, tolerance in columns.items():
+        left, right = both[f'{column}_derived'], both[f'{column}_rhole']
+        present = (left.notna() & right.notna()).to_numpy(dtype=bool)
+        numeric = pd.api.types.is_numeric_dtype(left.dtype) and not pd.api.types.is_bool_dtype(left.dtype)
+        if numeric:
+            difference = np.abs(_float(left) - _float(right))[present]
+            matches = difference <= tolerance
+        else:
+            matches = (left.astype('object') == right.astype('object')).to_numpy(dtype=bool)[present]
+        report[column] = {
+            'compared': int(present.sum()),
+            'matches': int(matches.sum()),
+            'mismatches': int((~matches).sum()),
+            'missing_derived': int((left.isna() & right.notna()).sum()),
+            'missing_rhole': int((left.notna() & right.isna()).sum()),
+            'mean_abs_diff': difference.mean() if numeric and len(difference) else np.nan,
+            'max_abs_diff': difference.max() if numeric and len(difference) else np.nan,
+        }
+    return pd.DataFrame.from_dict(report, orient='index')
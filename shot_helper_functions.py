@@ -1,96 +1,165 @@
 import numpy as np
 import pandas as pd
 
+from dtype_helper_functions import coerce_column_types, event_id
+from io_helper_functions import DEFAULT_CHUNKSIZE, concat_chunks, count_rows, read_cleaned_chunks
+from missing_data_helper_functions import apply_missing_data_rules, missing_key, outside, zeros, zeros_where
+from validation_helper_functions import duplicated, malformed, missing, negative, outside_range, validate
 
-def shots_cleaner(raw_shot_stats):
+
+SHOT_COLUMN_NAMES = {
+    'of Strokes': 'Strokes',
+    'Tourn.': 'TournID',
+    'Player': 'PlayerID',
+    'Course': 'CourseID',
+    'Hole Score': 'HoleScore',
+    'Shot': 'ShotNo',
+    'Shot Type(S/P/D)': 'ShotType',
+    'Distance': 'ShotDistance',
+    'Distance to Pin': 'FromDistance',
+    'From Location(Scorer)': 'FromLie',
+    'Distance to Hole after the Shot': 'ToDistance',
+    'Par Value': 'Par',
+    'To Location(Scorer)': 'ToLie',
+    'Distance from Center': 'DistanceFromCentre',
+    'Left/Right': 'LeftRight',
+    'Strokes Gained/Baseline': 'SGBaseline',
+    'In the Hole Flag': 'InHoleFlag'
+}
+SHOT_RELEVANT_FEATURES = [
+    'Year',
+    'TournID',
+    'PlayerID',
+    'CourseID',
+    'EventID',
+    'Round',
+    'Hole',
+    'Par',
+    'Yardage',
+    'HoleScore',
+    'ShotNo',
+    'ShotType',
+    'Strokes',
+    'FromLie',
+    'ToLie',
+    'ShotDistance',
+    'FromDistance',
+    'InHoleFlag',
+    'ToDistance',
+    'DistanceFromCentre',
+    'LeftRight',
+    'SGBaseline',
+]
+SHOT_COLUMN_TYPES = {
+    'Year': 'Int16',
+    'TournID': 'Int16',
+    'PlayerID': 'Int32',
+    'CourseID': 'Int32',
+    'EventID': 'Int32',
+    'Round': 'Int8',
+    'Hole': 'Int8',
+    'Par': 'Int8',
+    'Yardage': 'Int16',
+    'HoleScore': 'Int8',
+    'ShotType': 'category',
+    'ShotNo': 'Int8',
+    'FromLie': 'category',
+    'ToLie': 'category',
+    'ShotDistance': 'Int32',
+    'FromDistance': 'Int32',
+    'InHoleFlag': 'category',
+    'ToDistance': 'Int32',
+    'DistanceFromCentre': 'Int32',
+    'LeftRight': 'category',
+    'SGBaseline': 'float64',
+    'Strokes': 'Int8',
+}
+
+
+def shots_cleaner(raw_shot_stats, vocabularies=None):
     """
     Function for cleaning shots data. Changes column names & Types. Drops irrelevant cols.
+    IDs become small ints, with EventID a composite Year/TournID key, & lies/flags categoricals over vocabularies.
     """
     raw_shot_stats = raw_shot_stats.rename(columns={col: col.replace('#', '') for col in raw_shot_stats.columns})
     raw_shot_stats.columns = raw_shot_stats.columns.str.strip()
-    raw_shot_stats['EventID'] = raw_shot_stats['Year'].astype(str) + raw_shot_stats['Tourn.'].astype(str)
-    raw_shot_stats.rename(columns={
-        'of Strokes': 'Strokes',
-        'Tourn.': 'TournID',
-        'Player': 'PlayerID',
-        'Course': 'CourseID',
-        'Hole Score': 'HoleScore',
-        'Shot': 'ShotNo',
-        'Shot Type(S/P/D)': 'ShotType',
-        'Distance': 'ShotDistance',
-        'Distance to Pin': 'FromDistance',
-        'From Location(Scorer)': 'FromLie',
-        'Distance to Hole after the Shot': 'ToDistance',
-        'Par Value': 'Par',
-        'To Location(Scorer)': 'ToLie',
-        'Distance from Center': 'DistanceFromCentre',
-        'Left/Right': 'LeftRight',
-        'Strokes Gained/Baseline': 'SGBaseline',
-        'In the Hole Flag': 'InHoleFlag'
-    }, inplace=True)
-    relevant_features = [
-        'Year',
-        'TournID',
-        'PlayerID',
-        'CourseID',
-        'EventID',
-        'Round',
-        'Hole',
-        'Par',
-        'Yardage',
-        'HoleScore',
-        'ShotNo',
-        'ShotType',
-        'Strokes',
-        'FromLie',
-        'ToLie',
-        'ShotDistance',
-        'FromDistance',
-        'InHoleFlag',
-        'ToDistance',
-        'DistanceFromCentre',
-        'LeftRight',
-        'SGBaseline',
-    ]
-    raw_shot_stats = raw_shot_stats.loc[:, relevant_features]
-    pd.to_numeric(raw_shot_stats['HoleScore'], errors='coerce')
-    column_types = {
-        'Year': 'Int64',
-        'TournID': 'str',
-        'PlayerID': 'str',
-        'CourseID': 'str',
-        'EventID': 'str',
-        'Round': 'Int64',
-        'Hole': 'Int64',
-        'Par': 'Int64',
-        'Yardage': 'Int64',
-        'ShotType': 'str',
-        'ShotNo': 'Int64',
-        'FromLie': 'str',
-        'ShotDistance': 'Int64',
-        'InHoleFlag': 'str',
-        'ToDistance': 'Int64',
-        'DistanceFromCentre': 'Int64',
-        'LeftRight': 'str',
-        'SGBaseline': 'float64',
-        'Strokes': 'Int64',
-    }
-    raw_shot_stats = raw_shot_stats.astype(column_types)
+    raw_shot_stats.rename(columns=SHOT_COLUMN_NAMES, inplace=True)
+    raw_shot_stats['EventID'] = event_id(raw_shot_stats['Year'], raw_shot_stats['TournID'])
+    raw_shot_stats = raw_shot_stats.loc[:, SHOT_RELEVANT_FEATURES]
+    raw_shot_stats = coerce_column_types(raw_shot_stats, SHOT_COLUMN_TYPES, vocabularies)
     shot_stats = raw_shot_stats
     return shot_stats
 
+
+def load_shot_stats(path, chunksize=DEFAULT_CHUNKSIZE, vocabularies=None):
+    """
+    Reads & cleans an rshot.txt export chunk by chunk, so memory scales with chunksize rather than file size.
+    Categoricals are encoded over vocabularies, shared by every chunk (a new set if None).
+    """
+    vocabularies = {} if vocabularies is None else vocabularies
+    chunks = read_cleaned_chunks(path, lambda chunk: shots_cleaner(chunk, vocabularies), SHOT_COLUMN_NAMES,
+                                 SHOT_RELEVANT_FEATURES, SHOT_COLUMN_TYPES, chunksize=chunksize)
+    return concat_chunks(chunks, count_rows(path))
+
+
+# Cached outputs of earlier versions are stale: 2 = HoleScore typed as Int8 & malformed values recorded
+load_shot_stats.cache_version = 2
+
+
+SHOT_KEYS = ['EventID', 'PlayerID', 'Round', 'Hole', 'ShotNo']
+# (reason, rule) pairs checked by validate_shots; rows failing any are quarantined. Values the cleaner couldn't parse
+# are malformed, & keys must be present.
+SHOT_VALIDATION_RULES = (
+    [(f'malformed {column}', malformed(column, SHOT_COLUMN_TYPES)) for column, dtype in SHOT_COLUMN_TYPES.items()
+     if dtype != 'category']
+    + [(f'missing {key}', missing(key)) for key in SHOT_KEYS]
+    + [('Par outside 3-5', outside_range('Par', 3, 5)),
+       ('Hole outside 1-18', outside_range('Hole', 1, 18))]
+    + [(f'negative {column}', negative(column)) for column in ['ShotDistance', 'FromDistance', 'ToDistance']]
+    + [('duplicate key', duplicated(SHOT_KEYS))]
+)
+# Rules whose rows are written to the quarantine but kept: a blank Par or HoleScore is carried as missing
+SHOT_FLAG_RULES = [(f'missing {column}', missing(column)) for column in ['Par', 'HoleScore']]
+
+
+def validate_shots(shot_stats, quarantine_path=None, return_report=False):
+    """
+    Checks cleaned shots against SHOT_VALIDATION_RULES in one vectorized pass per rule. Failing rows are dropped &
+    written to quarantine_path (if given) with their reasons, along with the rows SHOT_FLAG_RULES flag but keep.
+    With return_report, also returns the number of rows failing each rule.
+    """
+    shot_stats, report = validate(shot_stats, SHOT_VALIDATION_RULES, quarantine_path, SHOT_FLAG_RULES)
+    return (shot_stats, report) if return_report else shot_stats
+
+
 def filter_sg(x):
+    """
+    filters SG for missing data. Kept for existing callers, missing_shots_handler uses the outside() rule.
+    """
     return np.where((x > 0.5) | (x < -0.5), np.nan, x)
 
-def missing_shots_handler(shot_stats):
-    shot_stats.loc[shot_stats['ShotDistance'] == 0, 'ShotDistance'] = np.nan
-    shot_stats.loc[shot_stats['FromDistance'] == 0, 'FromDistance'] = np.nan
+
+SG_GROUP = ['SGCategory', 'CourseID', 'Round', 'EventID', 'Hole']
+# (column, rule) pairs applied in order by missing_shots_handler
+SHOT_MISSING_DATA_RULES = [
+    ('ShotDistance', zeros('ShotDistance')),
+    ('FromDistance', zeros('FromDistance')),
     # Replace 0s in ToDistance with NaN, unless InHoleFlag is 'Y'
-    condition = (shot_stats['ToDistance'] == 0) & (shot_stats['InHoleFlag'] != 'Y')
-    shot_stats.loc[condition, 'ToDistance'] = np.nan
-    shot_stats['SGBaseline'] = shot_stats.groupby(['SGCategory', 'CourseID', 'Round', 'EventID', 'Hole'])['SGBaseline'].transform(
-        filter_sg)
-    return shot_stats
+    ('ToDistance', zeros_where('ToDistance', lambda df: df['InHoleFlag'] != 'Y')),
+    ('SGBaseline', outside('SGBaseline', 0.5)),
+    # SG was filtered with a grouped transform, which leaves rows without a complete group key as NaN
+    ('SGBaseline', missing_key(SG_GROUP)),
+]
+
+
+def missing_shots_handler(shot_stats, return_report=False):
+    """
+    Applies SHOT_MISSING_DATA_RULES in one vectorized pass per column.
+    With return_report, also returns the number of values changed per column.
+    """
+    shot_stats, report = apply_missing_data_rules(shot_stats, SHOT_MISSING_DATA_RULES)
+    return (shot_stats, report) if return_report else shot_stats
+
 
 def Strokes_Gained_Category(row):
     """
@@ -112,7 +181,7 @@ def relative_SG(shot_stats):
     """
     Finds Average SG & Adjusted SG for each player, also filters missing data 
     """
-    AvgSG = shot_stats.groupby(['SGCategory', 'CourseID', 'Round', 'EventID', 'Hole'])['SGBaseline'].transform('mean')
+    AvgSG = shot_stats.groupby(SG_GROUP, observed=True)['SGBaseline'].transform('mean')
     shot_stats['AvgSG'] = AvgSG
     shot_stats['AdjSG'] = shot_stats['SGBaseline'] - shot_stats['AvgSG']
     return shot_stats
@@ -149,20 +218,108 @@ def detailed_category(row):
             return 'Putt30+'
     return 'Other'
 
+SG_CATEGORIES = ['Off the Tee', 'Approach', 'Around the Green', 'Putt', 'Other']
+
+# ToDistance bins (inches) per SGCategory: (lower edges, labels). Each label covers [edge, next edge),
+# anything below the first edge or with a missing ToDistance falls back to 'Other'.
+DETAILED_CATEGORY_BINS = {
+    'Off the Tee': ([-np.inf, 10080], ['OTT Short', 'OTT Long']),
+    'Approach': ([1800, 3600, 5400, 7200, 9000], ['App50-100', 'App100-150', 'App150-200', 'App200-250', 'App250+']),
+    'Around the Green': ([0, 900, 1800], ['ARG0-25', 'ARG25-50', 'Other']),
+    'Putt': ([0, 6, 15, 30], ['Putt0-6', 'Putt6-15', 'Putt15-30', 'Putt30+']),
+}
+DETAILED_CATEGORIES = [label for _, labels in DETAILED_CATEGORY_BINS.values() for label in labels if label != 'Other'] + [
+    'Other']
+
+
+# detailed categories compared on distance left against the rest of the field
+FIELD_DISTANCE_CATEGORIES = [
+    'App50-100', 'App100-150', 'App150-200', 'App200-250', 'App250+',
+    'ARG25-50', 'ARG0-25',
+    'Putt0-6', 'Putt6-15', 'Putt15-30', 'Putt30+',
+]
+
+
+def _as_float(column):
+    """
+    Nullable/object numeric column as a float array with NaN for missing values
+    """
+    return pd.to_numeric(column, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def assign_SG_category(shot_stats):
+    """
+    Vectorized Strokes_Gained_Category. Returns a categorical Series aligned to shot_stats.
+    """
+    par = _as_float(shot_stats['Par'])
+    shot_no = _as_float(shot_stats['ShotNo'])
+    from_distance = _as_float(shot_stats['FromDistance'])
+    on_green = shot_stats['FromLie'].eq('Green').fillna(False).to_numpy(dtype=bool)
+    conditions = [
+        (par >= 4) & (shot_no == 1),
+        from_distance > 1800,
+        (from_distance <= 1800) & ~on_green,
+        on_green,
+    ]
+    codes = np.select(conditions, np.arange(len(conditions)), default=SG_CATEGORIES.index('Other'))
+    return pd.Series(pd.Categorical.from_codes(codes, categories=SG_CATEGORIES), index=shot_stats.index,
+                     name='SGCategory')
+
+
+def add_SG_category(shot_stats):
+    """
+    Pipeline stage: adds the SGCategory column
+    """
+    shot_stats['SGCategory'] = assign_SG_category(shot_stats)
+    return shot_stats
+
+
+def assign_detailed_category(shot_stats):
+    """
+    Vectorized detailed_category, driven by DETAILED_CATEGORY_BINS. Returns a categorical Series.
+    """
+    sg_category = shot_stats['SGCategory'].astype('object')
+    to_distance = _as_float(shot_stats['ToDistance'])
+    other = DETAILED_CATEGORIES.index('Other')
+    codes = np.full(len(shot_stats), other)
+    for category, (edges, labels) in DETAILED_CATEGORY_BINS.items():
+        mask = (sg_category == category).to_numpy(dtype=bool) & ~np.isnan(to_distance)
+        bins = np.searchsorted(edges, to_distance[mask], side='right') - 1
+        label_codes = np.array([DETAILED_CATEGORIES.index(label) for label in labels])
+        codes[mask] = np.where(bins >= 0, label_codes[bins.clip(0)], other)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=DETAILED_CATEGORIES), index=shot_stats.index,
+                     name='detailed_category')
+
+
+def add_detailed_category(shot_stats):
+    """
+    Pipeline stage: adds the detailed_category column
+    """
+    shot_stats['detailed_category'] = assign_detailed_category(shot_stats)
+    return shot_stats
+
+
 def mean_skipna(x):
     """
     Used in conjunction with transform to skip rows with nan
     """
     return x.dropna().mean()
 
-def shot_feature_engineering(shot_stats):
+def shot_feature_engineering(shot_stats, course_profiles=None):
     """
-
+    With course_profiles (a CourseProfiles of build_shot_profiles), the hole, driving distance, fairway & distance
+    left field averages are looked up from the course hole's precomputed profile instead of grouped per event.
     """
     # Average Scores
-    shot_stats['HoleScore'].replace('', np.nan, inplace=True)
     shot_stats['HoleScore'] = pd.to_numeric(shot_stats['HoleScore'], errors='coerce')
-    shot_stats['HoleAvg'] = shot_stats.groupby(['EventID', 'Hole'])['HoleScore'].transform('mean').round(0)
+    if course_profiles is None:
+        shot_stats['HoleAvg'] = shot_stats.groupby(['EventID', 'Hole'])['HoleScore'].transform('mean').round(0)
+    else:
+        HoleAvg = np.round(course_profiles.lookup(shot_stats, 'HoleAvg'), 0)
+        # Same dtype as the grouped mean of a nullable HoleScore
+        if isinstance(shot_stats['HoleScore'].dtype, pd.api.extensions.ExtensionDtype):
+            HoleAvg = pd.array(HoleAvg, dtype='Float64')
+        shot_stats['HoleAvg'] = HoleAvg
     shot_stats['Vs_HoleAvg'] = shot_stats['HoleScore'] - shot_stats['HoleAvg']
 
     # Round
@@ -174,53 +331,37 @@ def shot_feature_engineering(shot_stats):
     shot_stats['EventAvg'] = shot_stats.groupby(['EventID'])['RoundScore'].transform('mean')
     shot_stats['Vs_EventAvg'] = shot_stats['RoundScore'] - shot_stats['EventAvg']
 
-    # Compare against the field
+    # Compare against the field, computing each group statistic over a masked view & writing Vs_Field in place
     shot_stats['Vs_Field'] = np.nan
     # Driving Distance
-    shot_stats['DrivingDistance'] = np.where(shot_stats['SGCategory'] == 'Off the Tee', shot_stats['ShotDistance'],
-                                             None)
-    shot_stats['DD_Avg'] = shot_stats.groupby(['EventID', 'Hole'])['DrivingDistance'].transform('mean')
-    shot_stats.loc[shot_stats['SGCategory'] == 'Off the Tee', 'Vs_Field'] = shot_stats['DrivingDistance'] - shot_stats[
-        'DD_Avg']
-    # Fairway found flagged by 1's, so we can sum them for average
-    shot_stats['Fairway'] = np.where((shot_stats['SGCategory'] == 'Off the Tee') & (shot_stats['ToLie'] == 'Fairway'),
-                                     1, 0)
-    subset_df = shot_stats[shot_stats['SGCategory'] == 'Off the Tee']
-    fairway_percent = subset_df.groupby(['EventID', 'Hole']).apply(
-        lambda x: (x['Fairway'].sum() / len(x)) * 100).reset_index(name='FairwayAvg')
-    shot_stats = pd.merge(shot_stats, fairway_percent, how='left', on=['EventID', 'Hole'])
-    shot_stats.loc[shot_stats['SGCategory'] != 'Off the Tee', 'FairwayAvg'] = None
-
-    # Approach
-    app_relevant_categories = ['App50-100', 'App100-150', 'App150-200', 'App200-250', 'App250+']
-    subset_df = shot_stats[shot_stats['detailed_category'].isin(app_relevant_categories)]
-    Avg_Approach = subset_df.groupby(['EventID', 'Hole', 'detailed_category'])['ToDistance'].mean().reset_index(
-        name='Avg_Approach')
-    shot_stats = pd.merge(shot_stats, Avg_Approach, how='left', on=['EventID', 'Hole', 'detailed_category'])
-    shot_stats.loc[shot_stats['detailed_category'].isin(app_relevant_categories), 'Vs_Field'] = shot_stats[
-                                                                                                    'ToDistance'] - \
-                                                                                                shot_stats[
-                                                                                                    'Avg_Approach']
-
-    # Around the Green
-    arg_relevant_categories = ['ARG25-50', 'ARG0-25']
-    subset_df = shot_stats[shot_stats['detailed_category'].isin(arg_relevant_categories)]
-    Avg_ARG = subset_df.groupby(['EventID', 'Hole', 'detailed_category'])['ToDistance'].mean().reset_index(
-        name='Avg_ARG')
-    shot_stats = pd.merge(shot_stats, Avg_ARG, how='left', on=['EventID', 'Hole', 'detailed_category'])
-    shot_stats.loc[shot_stats['detailed_category'].isin(arg_relevant_categories), 'Vs_Field'] = shot_stats[
-                                                                                                    'ToDistance'] - \
-                                                                                                shot_stats['Avg_ARG']
-
-    # Putting
-    Putt_relevant_categories = ['Putt0-6', 'Putt6-15', 'Putt15-30', 'Putt30+']
-    subset_df = shot_stats[shot_stats['detailed_category'].isin(Putt_relevant_categories)]
-    Avg_Putt = subset_df.groupby(['EventID', 'Hole', 'detailed_category'])['ToDistance'].mean().reset_index(
-        name='Avg_Putt')
-    shot_stats = pd.merge(shot_stats, Avg_Putt, how='left', on=['EventID', 'Hole', 'detailed_category'])
-    shot_stats.loc[shot_stats['detailed_category'].isin(Putt_relevant_categories), 'Vs_Field'] = shot_stats[
-                                                                                                     'ToDistance'] - \
-                                                                                                 shot_stats['Avg_Putt']
-    # Drop irrelevant columns only used for calculation
-    shot_stats.drop(['DrivingDistance', 'DD_Avg', 'Avg_Putt', 'Avg_ARG', 'Avg_Approach'], axis='columns', inplace=True)
-    return shot_stats
+    tee_shot = shot_stats['SGCategory'] == 'Off the Tee'
+    tee_shots = shot_stats.loc[tee_shot, ['EventID', 'Hole', 'ShotDistance']]
+    if course_profiles is None:
+        DD_Avg = tee_shots.groupby(['EventID', 'Hole'])['ShotDistance'].transform('mean')
+    else:
+        DD_Avg = course_profiles.lookup(shot_stats.loc[tee_shot, ['CourseID', 'Hole']], 'DD_Avg')
+    shot_stats.loc[tee_shot, 'Vs_Field'] = (tee_shots['ShotDistance'] - DD_Avg).to_numpy('float64', na_value=np.nan)
+    # Fairway found flagged by 1's, so the group mean is the fairway percentage
+    shot_stats['Fairway'] = np.where(tee_shot & (shot_stats['ToLie'] == 'Fairway'), 1, 0)
+    if course_profiles is None:
+        FairwayAvg = shot_stats.loc[tee_shot, 'Fairway'].groupby(
+            [tee_shots['EventID'], tee_shots['Hole']]).transform('mean') * 100
+        FairwayAvg = FairwayAvg.to_numpy('float64', na_value=np.nan)
+    else:
+        FairwayAvg = course_profiles.lookup(shot_stats.loc[tee_shot, ['CourseID', 'Hole']], 'FairwayAvg')
+    shot_stats['FairwayAvg'] = np.nan
+    shot_stats.loc[tee_shot, 'FairwayAvg'] = FairwayAvg
+
+    # Approach, Around the Green & Putting: distance left vs the field's average for the same detailed category.
+    # Groups include detailed_category, so all three are handled in one grouped transform.
+    field_shot = shot_stats['detailed_category'].isin(FIELD_DISTANCE_CATEGORIES)
+    field_shots = shot_stats.loc[field_shot, ['EventID', 'CourseID', 'Hole', 'detailed_category', 'ToDistance']]
+    if course_profiles is None:
+        Avg_ToDistance = field_shots.groupby(['EventID', 'Hole', 'detailed_category'],
+                                             observed=True)['ToDistance'].transform('mean')
+    else:
+        Avg_ToDistance = course_profiles.lookup(field_shots, 'Avg_ToDistance', by=field_shots['detailed_category'])
+    shot_stats.loc[field_shot, 'Vs_Field'] = (field_shots['ToDistance'] - Avg_ToDistance).to_numpy('float64',
+                                                                                                  na_value=np.nan)
+    # The merge-based version returned a fresh RangeIndex
+    return shot_stats.reset_index(drop=True)
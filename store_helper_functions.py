@@ -0,0 +1,166 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+META_FILE = 'meta.json'
+# Dictionary codes are stored as int32 so dictionaries can keep growing as events are appended
+CODE_DTYPE = 'int32'
+
+
+def _column_spec(name, series):
+    """
+    How a column is stored: 'numeric' (values), 'masked' (values & a missing mask, for nullable dtypes) or
+    'dictionary' (int32 codes into an append-only list of values, for categoricals & strings)
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or not (pd.api.types.is_numeric_dtype(dtype)
+                                                      or pd.api.types.is_bool_dtype(dtype)):
+        return {'name': name, 'kind': 'dictionary', 'dtype': CODE_DTYPE, 'dictionary': []}
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return {'name': name, 'kind': 'masked', 'dtype': dtype.numpy_dtype.name, 'pandas_dtype': dtype.name}
+    return {'name': name, 'kind': 'numeric', 'dtype': dtype.name}
+
+
+def _check_spec(spec, series):
+    """
+    Raises if series can't be stored in a column with spec without losing values, e.g. floats or missing values
+    into a plain int column
+    """
+    new_spec = _column_spec(spec['name'], series)
+    if spec['kind'] == 'dictionary':
+        fits = new_spec['kind'] == 'dictionary'
+    else:
+        fits = (new_spec['kind'] == 'numeric' or new_spec['kind'] == spec['kind']) \
+            and np.can_cast(new_spec['dtype'], spec['dtype'], casting='safe')
+    if not fits:
+        stored = spec.get('pandas_dtype', spec['dtype']) if spec['kind'] != 'dictionary' else 'dictionary'
+        raise ValueError(f"column {spec['name']!r} of dtype {series.dtype} can't be stored as {stored}")
+
+
+def _encode(spec, series):
+    """
+    A column's values (& missing mask for masked columns) as stored. Dictionary columns are re-coded against the
+    spec's dictionary, which is extended with unseen values.
+    """
+    if spec['kind'] == 'dictionary':
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, labels = pd.factorize(series)
+        dictionary = spec['dictionary']
+        positions = {value: code for code, value in enumerate(dictionary)}
+        for label in map(str, labels):
+            if label not in positions:
+                positions[label] = len(dictionary)
+                dictionary.append(label)
+        lookup = np.array([positions[str(label)] for label in labels] + [-1], dtype=CODE_DTYPE)
+        return lookup[codes], None
+    if spec['kind'] == 'masked':
+        return series.to_numpy(spec['dtype'], na_value=0), series.isna().to_numpy(dtype=bool)
+    return series.to_numpy(spec['dtype']), None
+
+
+class ColumnStore:
+    """
+    Persisted columnar table in a directory: one fixed-width binary file per column (plus a missing-value mask for
+    nullable columns) & meta.json with the row count, schema & string dictionaries. Reads memory-map the files, so
+    every process on the box shares one page-cache copy, & column/row-range projections are zero-copy.
+    Appends only add bytes to the ends of the files; meta.json is replaced atomically afterwards, so readers never
+    see a partial append, & bytes past its row count are discarded by the next append. One writer at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rereads meta.json, e.g. to see rows another process appended
+        """
+        meta_path = os.path.join(self.path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                self.meta = json.load(file)
+        else:
+            self.meta = {'rows': 0, 'columns': []}
+        self._specs = {spec['name']: (i, spec) for i, spec in enumerate(self.meta['columns'])}
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    @property
+    def columns(self):
+        return [spec['name'] for spec in self.meta['columns']]
+
+    def __len__(self):
+        return self.rows
+
+    def _file(self, i, suffix):
+        return os.path.join(self.path, f'{i}.{suffix}')
+
+    def append(self, df):
+        """
+        Appends a frame's rows. The first append fixes the schema; later frames must have the same columns, each
+        castable to its stored dtype without loss. Every column is encoded before any file is written, & files are
+        cut back to the committed row count first, so a failed append leaves the store as it was.
+        """
+        if not self.meta['columns']:
+            os.makedirs(self.path, exist_ok=True)
+            meta = {'rows': 0, 'columns': [_column_spec(name, df[name]) for name in df.columns]}
+        else:
+            if list(df.columns) != self.columns:
+                raise ValueError(f'columns {list(df.columns)} do not match the store columns {self.columns}')
+            meta = json.loads(json.dumps(self.meta))
+            for spec in meta['columns']:
+                _check_spec(spec, df[spec['name']])
+        encoded = [_encode(spec, df[spec['name']]) for spec in meta['columns']]
+        for i, (data, missing) in enumerate(encoded):
+            self._write(i, 'values', data)
+            if missing is not None:
+                self._write(i, 'missing', missing)
+        meta['rows'] += len(df)
+        tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+        self.refresh()
+
+    def _write(self, i, suffix, data):
+        with open(self._file(i, suffix), 'ab') as file:
+            # Drop anything an earlier failed append left past the committed rows
+            file.truncate(self.rows * data.itemsize)
+            np.ascontiguousarray(data).tofile(file)
+
+    def _map(self, i, suffix, dtype):
+        if not self.rows:
+            return np.empty(0, dtype=dtype)
+        # Plain ndarray view of the mapping, which it keeps open
+        return np.memmap(self._file(i, suffix), dtype=dtype, mode='r', shape=(self.rows,)).view(np.ndarray)
+
+    def column(self, name, start=0, stop=None):
+        """
+        One column's rows [start, stop) as a pandas array over the memory-mapped file. Dictionary columns come back
+        as categoricals, whose codes pandas narrows to its own code width (a 1-2 byte per row copy).
+        """
+        i, spec = self._specs[name]
+        rows = slice(start, self.rows if stop is None else min(stop, self.rows))
+        values = self._map(i, 'values', spec['dtype'])[rows]
+        if spec['kind'] == 'dictionary':
+            return pd.Categorical.from_codes(values, categories=spec['dictionary'], validate=False)
+        if spec['kind'] == 'masked':
+            missing = self._map(i, 'missing', 'bool')[rows]
+            return pd.api.types.pandas_dtype(spec['pandas_dtype']).construct_array_type()(values, missing)
+        return values
+
+    def read(self, columns=None, start=0, stop=None):
+        """
+        The stored table projected to columns & rows [start, stop), without copying numeric column data
+        """
+        columns = self.columns if columns is None else list(columns)
+        index = pd.RangeIndex(start, self.rows if stop is None else min(stop, self.rows))
+        data = {name: pd.Series(self.column(name, start, stop), index=index, name=name, copy=False)
+                for name in columns}
+        return pd.DataFrame(data, index=index, copy=False)
@@ -0,0 +1,209 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Raw export headers, in the form shots_cleaner / hole_cleaner expect. Columns the pipeline drops are included so
+# ingestion does realistic work.
+SHOT_HEADERS = [
+    'Tour', 'Year', 'Tourn.#', 'Player #', 'Course #', 'Player First Name', 'Player Last Name', 'Round', 'Hole',
+    'Hole Score', 'Par Value', 'Yardage', 'Shot', 'Shot Type(S/P/D)', '# of Strokes', 'From Location(Scorer)',
+    'From Location(Enhanced)', 'To Location(Scorer)', 'To Location(Enhanced)', 'Distance', 'Distance to Pin',
+    'In the Hole Flag', 'Around the Green Flag', '1st Putt Flag', 'Distance to Hole after the Shot', 'Time',
+    'X Coordinate', 'Y Coordinate', 'Z Coordinate', 'Distance from Center', 'Distance from Edge', 'Left/Right',
+    'Strokes Gained/Baseline',
+]
+HOLE_HEADERS = [
+    'Tour', 'Tournament Year', 'Tournament Schedule', 'Player #', 'Course #', 'Player First Name', 'Player Last Name',
+    'Round', 'Hole', 'Par', 'Actual Yard', 'Score', 'RTP Score', 'Hit Fwy', 'Hit Green', 'Driving Distance (rounded)',
+    'Tee Shot Landing Loc', 'Tee Shot Detail Landing Loc', 'Appr Shot Dist to the Pin', 'Appr Shot Prox to the Hole',
+    'Appr Shot Landing Loc', 'OTT Strokes Gained', 'APP Strokes Gained', 'ARG Strokes Gained', 'Putts Gained',
+]
+COURSE_PARS = np.array([4, 4, 3, 5, 4, 4, 3, 4, 5, 4, 4, 3, 4, 5, 4, 3, 4, 5])
+# Yardage ranges by par
+YARDAGE_RANGES = {3: (130, 250), 4: (340, 500), 5: (520, 630)}
+FAIRWAY_LIES = ['Fairway', 'Primary Rough', 'Intermediate Rough', 'Fairway Bunker']
+GREENSIDE_LIES = ['Fringe', 'Primary Rough', 'Green Side Bunker']
+# Average shots per row of a hole file, used to size events
+SHOTS_PER_HOLE = 4
+
+
+def event_layout(rows, players=150, rounds=4):
+    """
+    Number of events & players per event for roughly `rows` shot rows. Below one full event the field is shrunk.
+    """
+    rows_per_player = rounds * 18 * SHOTS_PER_HOLE
+    if rows < players * rows_per_player:
+        return 1, max(1, round(rows / rows_per_player))
+    return round(rows / (players * rows_per_player)), players
+
+
+def simulate_event(rng, year, tourn_id, course_id, player_ids, rounds):
+    """
+    Simulates one event. Returns raw shot & hole frames with ShotLink headers.
+    """
+    pars = COURSE_PARS
+    yardages = np.array([rng.integers(*YARDAGE_RANGES[par]) for par in pars])
+    n_holes = len(player_ids) * rounds * len(pars)
+    player = np.repeat(player_ids, rounds * len(pars))
+    round_no = np.tile(np.repeat(np.arange(1, rounds + 1), len(pars)), len(player_ids))
+    hole = np.tile(np.arange(1, len(pars) + 1), len(player_ids) * rounds)
+    par = pars[hole - 1]
+    yardage = yardages[hole - 1]
+
+    # Score relative to par & putts; full shots are everything before the first putt
+    score = par + rng.choice([-2, -1, 0, 1, 2], size=n_holes, p=[0.01, 0.2, 0.62, 0.14, 0.03])
+    score = np.maximum(score, 2)
+    putts = np.minimum(rng.choice([1, 2, 3], size=n_holes, p=[0.35, 0.58, 0.07]), score - 1)
+    full_shots = score - putts
+
+    # One row per shot
+    shot_hole = np.repeat(np.arange(n_holes), score)
+    starts = np.repeat(np.cumsum(score) - score, score)
+    shot_no = np.arange(len(shot_hole)) - starts + 1
+    is_putt = shot_no > full_shots[shot_hole]
+    last_full = shot_no == full_shots[shot_hole]
+    last_shot = shot_no == score[shot_hole]
+
+    # Each shot starts where the previous one finished. Tee shots on par 4/5 travel a drive, other full shots leave a
+    # random fraction of the distance & the last full shot finishes on the green. Distances are in inches.
+    n_shots = len(shot_hole)
+    tee_shot = shot_no == 1
+    drive = rng.normal(290, 25, size=n_shots) * 36
+    fraction = rng.uniform(0.05, 0.5, size=n_shots)
+    green_distance = rng.lognormal(np.log(240), 0.8, size=n_shots)
+    putt_fraction = rng.uniform(0.02, 0.25, size=n_shots)
+    from_distance = yardage[shot_hole] * 36.0
+    to_distance = np.zeros(n_shots)
+    for k in range(1, score.max() + 1):
+        at = np.flatnonzero(shot_no == k)
+        if k > 1:
+            from_distance[at] = to_distance[at - 1]
+        start = from_distance[at]
+        to_distance[at] = np.select(
+            [is_putt[at], last_full[at], tee_shot[at] & (par[shot_hole[at]] >= 4)],
+            [start * putt_fraction[at], green_distance[at], np.maximum(start - drive[at], 360)],
+            start * fraction[at])
+    to_distance = np.where(last_shot, 0, to_distance)
+    first_putt = is_putt & (shot_no == full_shots[shot_hole] + 1)
+    from_distance, to_distance = np.round(from_distance), np.round(to_distance)
+
+    from_lie = np.where(shot_no == 1, 'Tee Box', np.where(is_putt, 'Green', 'Fairway'))
+    on_fairway = rng.random(len(shot_hole)) < 0.6
+    from_lie = np.where((from_lie == 'Fairway') & ~on_fairway,
+                        rng.choice(FAIRWAY_LIES[1:], size=len(shot_hole)), from_lie)
+    near_green = (~is_putt) & (shot_no > 1) & (from_distance <= 1800)
+    from_lie = np.where(near_green, rng.choice(GREENSIDE_LIES, size=len(shot_hole)), from_lie)
+    to_lie = np.append(from_lie[1:], 'Hole')
+    to_lie = np.where(last_shot, 'Hole', to_lie)
+
+    sg = rng.normal(0, 0.3, size=len(shot_hole)).round(3)
+    # Vendor data has missing values: zeros & wild SG values
+    sg = np.where(rng.random(len(shot_hole)) < 0.03, rng.normal(0, 3, size=len(shot_hole)).round(3), sg)
+    shot_distance = np.abs(from_distance - to_distance)
+    shot_distance = np.where(rng.random(len(shot_hole)) < 0.01, 0, shot_distance)
+
+    shots = pd.DataFrame({
+        'Tour': 'R',
+        'Year': year,
+        'Tourn.#': tourn_id,
+        'Player #': player[shot_hole],
+        'Course #': course_id,
+        'Player First Name': 'First',
+        'Player Last Name': 'Last',
+        'Round': round_no[shot_hole],
+        'Hole': hole[shot_hole],
+        'Hole Score': score[shot_hole],
+        'Par Value': par[shot_hole],
+        'Yardage': yardage[shot_hole],
+        'Shot': shot_no,
+        'Shot Type(S/P/D)': np.where(is_putt, 'P', 'S'),
+        '# of Strokes': 1,
+        'From Location(Scorer)': from_lie,
+        'From Location(Enhanced)': from_lie,
+        'To Location(Scorer)': to_lie,
+        'To Location(Enhanced)': to_lie,
+        'Distance': shot_distance.astype('int64'),
+        'Distance to Pin': from_distance.astype('int64'),
+        'In the Hole Flag': np.where(last_shot, 'Y', 'N'),
+        'Around the Green Flag': np.where(near_green, 'Y', 'N'),
+        '1st Putt Flag': np.where(first_putt, 'Y', 'N'),
+        'Distance to Hole after the Shot': to_distance.astype('int64'),
+        'Time': rng.integers(700, 1900, size=n_shots),
+        'X Coordinate': rng.normal(0, 1000, size=n_shots).round(1),
+        'Y Coordinate': rng.normal(0, 1000, size=n_shots).round(1),
+        'Z Coordinate': rng.normal(0, 10, size=n_shots).round(1),
+        'Distance from Center': np.abs(rng.normal(0, 300, size=n_shots)).round().astype('int64'),
+        'Distance from Edge': np.abs(rng.normal(0, 200, size=n_shots)).round().astype('int64'),
+        'Left/Right': rng.choice(['L', 'R'], size=n_shots),
+        'Strokes Gained/Baseline': sg,
+    }, columns=SHOT_HEADERS)
+
+    # Hole rows, derived from the same shots
+    hole_sg = pd.DataFrame({'hole': shot_hole, 'sg': sg,
+                            'category': np.select([tee_shot & (par[shot_hole] >= 4), from_distance > 1800,
+                                                   is_putt], ['OTT', 'APP', 'Putt'], 'ARG')})
+    hole_sg = hole_sg.pivot_table(index='hole', columns='category', values='sg', aggfunc='sum', fill_value=0.0)
+    hole_sg = hole_sg.reindex(index=np.arange(n_holes), columns=['OTT', 'APP', 'ARG', 'Putt'], fill_value=0.0)
+    approach = np.flatnonzero(last_full)
+    tee_lie = to_lie[tee_shot]
+    holes = pd.DataFrame({
+        'Tour': 'R',
+        'Tournament Year': year,
+        'Tournament Schedule': tourn_id,
+        'Player #': player,
+        'Course #': course_id,
+        'Player First Name': 'First',
+        'Player Last Name': 'Last',
+        'Round': round_no,
+        'Hole': hole,
+        'Par': par,
+        'Actual Yard': yardage,
+        'Score': score,
+        'RTP Score': score - par,
+        'Hit Fwy': np.where((par >= 4) & (tee_lie == 'Fairway'), 'Y', 'N'),
+        'Hit Green': np.where(full_shots <= par - 2, 'Y', 'N'),
+        'Driving Distance (rounded)': np.where(par >= 4, np.round(shot_distance[tee_shot] / 36), 0).astype('int64'),
+        'Tee Shot Landing Loc': tee_lie,
+        'Tee Shot Detail Landing Loc': tee_lie,
+        'Appr Shot Dist to the Pin': from_distance[approach].astype('int64'),
+        'Appr Shot Prox to the Hole': to_distance[approach].astype('int64'),
+        'Appr Shot Landing Loc': to_lie[approach],
+        'OTT Strokes Gained': hole_sg['OTT'].round(3).to_numpy(),
+        'APP Strokes Gained': hole_sg['APP'].round(3).to_numpy(),
+        'ARG Strokes Gained': hole_sg['ARG'].round(3).to_numpy(),
+        'Putts Gained': hole_sg['Putt'].round(3).to_numpy(),
+    }, columns=HOLE_HEADERS)
+    return shots, holes
+
+
+def write_synthetic_data(shot_path, hole_path, events=2, players=150, rounds=4, year=2023, seed=0):
+    """
+    Writes semicolon-delimited rshot/rhole style files, one event at a time so memory stays at one event.
+    Returns the number of shot & hole rows written.
+    """
+    rng = np.random.default_rng(seed)
+    player_pool = rng.choice(np.arange(20000, 60000), size=max(players * 2, 200), replace=False)
+    shot_rows = hole_rows = 0
+    for event in range(events):
+        player_ids = np.sort(rng.choice(player_pool, size=players, replace=False))
+        shots, holes = simulate_event(rng, year + event // 50, event % 50 + 1, 500 + event % 40, player_ids, rounds)
+        mode, header = ('w', True) if event == 0 else ('a', False)
+        shots.to_csv(shot_path, sep=';', index=False, mode=mode, header=header)
+        holes.to_csv(hole_path, sep=';', index=False, mode=mode, header=header)
+        shot_rows += len(shots)
+        hole_rows += len(holes)
+    return shot_rows, hole_rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Writes synthetic ShotLink style rshot/rhole files.')
+    parser.add_argument('shot_path')
+    parser.add_argument('hole_path')
+    parser.add_argument('--events', type=int, default=2)
+    parser.add_argument('--players', type=int, default=150)
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(write_synthetic_data(args.shot_path, args.hole_path, args.events, args.players, args.rounds,
+                               seed=args.seed))
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The helper modules live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import write_synthetic_data  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def synthetic_exports(tmp_path_factory):
+    """
+    (rshot, rhole) paths of two small synthetic events: 4 players, 2 rounds each
+    """
+    directory = tmp_path_factory.mktemp('exports')
+    shot_path, hole_path = str(directory / 'rshot.txt'), str(directory / 'rhole.txt')
+    write_synthetic_data(shot_path, hole_path, events=2, players=4, rounds=2)
+    return shot_path, hole_path
@@ -0,0 +1,82 @@
+"""
+Merge-based feature engineering as it was before the grouped-transform rewrites, kept as the parity oracles
+& for benchmark_exports to time against.
+"""
+import numpy as np
+import pandas as pd
+
+from hole_helper_functions import HOLE_FIELD_AVERAGES, HOLE_FIELD_RATES, calculate_bool_avg, \
+    categorize_hole_lengths, extreme_percentage_cols
+
+
+def merge_shot_features(shot_stats):
+    """
+    shot_feature_engineering before the merges were replaced by masked grouped transforms. The object-dtype driving
+    distance difference is cast to float64, which pandas 3 no longer does on assignment.
+    """
+    # Average Scores
+    shot_stats['HoleScore'] = shot_stats['HoleScore'].replace('', np.nan)
+    shot_stats['HoleScore'] = pd.to_numeric(shot_stats['HoleScore'], errors='coerce')
+    shot_stats['HoleAvg'] = shot_stats.groupby(['EventID', 'Hole'])['HoleScore'].transform('mean').round(0)
+    shot_stats['Vs_HoleAvg'] = shot_stats['HoleScore'] - shot_stats['HoleAvg']
+
+    # Round
+    shot_stats['RoundScore'] = shot_stats.groupby(['EventID', 'PlayerID', 'Round'])['Strokes'].transform('sum')
+    shot_stats['RoundAvg'] = shot_stats.groupby(['EventID', 'Round'])['RoundScore'].transform('mean')
+    shot_stats['Vs_RoundAvg'] = shot_stats['RoundScore'] - shot_stats['RoundAvg']
+
+    # Event Average
+    shot_stats['EventAvg'] = shot_stats.groupby(['EventID'])['RoundScore'].transform('mean')
+    shot_stats['Vs_EventAvg'] = shot_stats['RoundScore'] - shot_stats['EventAvg']
+
+    # Compare against the field
+    shot_stats['Vs_Field'] = np.nan
+    # Driving Distance
+    shot_stats['DrivingDistance'] = np.where(shot_stats['SGCategory'] == 'Off the Tee', shot_stats['ShotDistance'],
+                                             None)
+    shot_stats['DD_Avg'] = shot_stats.groupby(['EventID', 'Hole'])['DrivingDistance'].transform('mean')
+    shot_stats.loc[shot_stats['SGCategory'] == 'Off the Tee', 'Vs_Field'] = (
+        shot_stats['DrivingDistance'] - shot_stats['DD_Avg']).astype('float64')
+    # Fairway found flagged by 1's, so we can sum them for average
+    shot_stats['Fairway'] = np.where((shot_stats['SGCategory'] == 'Off the Tee') & (shot_stats['ToLie'] == 'Fairway'),
+                                     1, 0)
+    subset_df = shot_stats[shot_stats['SGCategory'] == 'Off the Tee']
+    fairway_percent = subset_df.groupby(['EventID', 'Hole']).apply(
+        lambda x: (x['Fairway'].sum() / len(x)) * 100).reset_index(name='FairwayAvg')
+    shot_stats = pd.merge(shot_stats, fairway_percent, how='left', on=['EventID', 'Hole'])
+    shot_stats.loc[shot_stats['SGCategory'] != 'Off the Tee', 'FairwayAvg'] = None
+
+    # Approach, Around the Green & Putting
+    for name, categories in [('Avg_Approach', ['App50-100', 'App100-150', 'App150-200', 'App200-250', 'App250+']),
+                             ('Avg_ARG', ['ARG25-50', 'ARG0-25']),
+                             ('Avg_Putt', ['Putt0-6', 'Putt6-15', 'Putt15-30', 'Putt30+'])]:
+        subset_df = shot_stats[shot_stats['detailed_category'].isin(categories)]
+        average = subset_df.groupby(['EventID', 'Hole', 'detailed_category'],
+                                    observed=True)['ToDistance'].mean().reset_index(name=name)
+        shot_stats = pd.merge(shot_stats, average, how='left', on=['EventID', 'Hole', 'detailed_category'])
+        shot_stats.loc[shot_stats['detailed_category'].isin(categories), 'Vs_Field'] = \
+            shot_stats['ToDistance'] - shot_stats[name]
+    # Drop irrelevant columns only used for calculation
+    shot_stats.drop(['DrivingDistance', 'DD_Avg', 'Avg_Putt', 'Avg_ARG', 'Avg_Approach'], axis='columns', inplace=True)
+    return shot_stats
+
+
+def merge_hole_features(hole_stats):
+    """
+    hole_feature_engineering before the fused groupby: one grouped transform per average & a groupby.apply + merge
+    per boolean rate. Its in place replaces are written as assignments, which is what they did before pandas'
+    copy-on-write.
+    """
+    keys = ['EventID', 'Hole']
+    for column, (avg_column, relative_column) in HOLE_FIELD_AVERAGES.items():
+        hole_stats[avg_column] = hole_stats.groupby(keys)[column].transform('mean')
+        hole_stats[relative_column] = hole_stats[column] - hole_stats[avg_column]
+    for column, (avg_column, relative_column) in HOLE_FIELD_RATES.items():
+        rates = hole_stats.groupby(keys).apply(calculate_bool_avg, column=column)
+        hole_stats = pd.merge(hole_stats, rates.reset_index(name=avg_column), on=keys, how='left')
+        hole_stats[avg_column] = hole_stats[avg_column].replace(0, np.nan)
+        extreme_percentage_cols(hole_stats, avg_column)
+        hole_stats[relative_column] = np.where(hole_stats[column] == True, 1 - hole_stats[avg_column],
+                                               - hole_stats[avg_column])
+        hole_stats[relative_column] = hole_stats[relative_column].replace(0, np.nan)
+    return categorize_hole_lengths(hole_stats)
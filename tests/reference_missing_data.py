@@ -0,0 +1,46 @@
+"""
+Missing-data handlers as they were before the rules tables, kept as the parity oracle.
+"""
+import numpy as np
+
+
+def zero_handler(df, column):
+    """
+    Percent of row entries = 0 in a given column, over rows with a complete group key.
+    """
+    total_count = df.groupby(['EventID', 'Round', 'CourseID', 'Hole']).size()
+    count_zeros = df[df[column] == 0].groupby(['EventID', 'Round', 'CourseID', 'Hole']).size()
+    return (count_zeros.sum() / total_count.sum()) * 100
+
+
+def filter_hole_sg(row):
+    if abs(row) > 0.5:
+        return np.nan
+    return row
+
+
+def hole_missing_data_handler(df):
+    # Set DD to nan for all Par 3's
+    df.loc[df['Par'] == 3, 'DrivingDistance'] = np.nan
+    df.loc[(df['AppShotFinishLie'] != 'Hole') & (df['AppProx'] == 0), 'AppProx'] = np.nan
+    for feature in ['DrivingDistance', 'Yardage', 'SGOTT', 'SGAPP', 'SGARG', 'SGPutt', 'AppProx']:
+        if zero_handler(df, feature) > 10:
+            df.loc[df[feature] == 0, feature] = np.nan
+    for category in ['SGOTT', 'SGAPP', 'SGARG', 'SGPutt']:
+        df[category] = df[category].apply(filter_hole_sg)
+    return df
+
+
+def filter_shot_sg(x):
+    return np.where((x > 0.5) | (x < -0.5), np.nan, x)
+
+
+def missing_shots_handler(shot_stats):
+    shot_stats.loc[shot_stats['ShotDistance'] == 0, 'ShotDistance'] = np.nan
+    shot_stats.loc[shot_stats['FromDistance'] == 0, 'FromDistance'] = np.nan
+    # Replace 0s in ToDistance with NaN, unless InHoleFlag is 'Y'
+    condition = (shot_stats['ToDistance'] == 0) & (shot_stats['InHoleFlag'] != 'Y')
+    shot_stats.loc[condition, 'ToDistance'] = np.nan
+    shot_stats['SGBaseline'] = shot_stats.groupby(['SGCategory', 'CourseID', 'Round', 'EventID', 'Hole'],
+                                                  observed=True)['SGBaseline'].transform(filter_shot_sg)
+    return shot_stats
@@ -0,0 +1,107 @@
+import importlib.util
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+import cache_helper_functions
+from cache_helper_functions import run_cached_stages, stage_version
+
+STAGES = '''
+import pandas as pd
+
+OFFSET = {offset}
+RULES = [('double', lambda df: df['x'] * 2)]
+
+
+def helper(df):
+    return df['x'] + OFFSET
+
+
+def unrelated():
+    return {unrelated}
+
+
+def load(path):
+    return pd.read_csv(path)
+
+
+def add_y(df):
+    df['y'] = helper(df)
+    return df
+
+
+def add_z(df):
+    for name, rule in RULES:
+        df['z'] = rule(df){z_edit}
+    return df
+'''
+
+
+def write_stages(directory, name, offset=1, unrelated=0, z_edit=''):
+    path = os.path.join(directory, f'{name}.py')
+    with open(path, 'w') as file:
+        file.write(STAGES.format(offset=offset, unrelated=unrelated, z_edit=z_edit))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = sys.modules[name] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def stage_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_helper_functions, 'PACKAGE_DIR', str(tmp_path))
+    monkeypatch.setattr(sys, 'modules', dict(sys.modules))
+    pd.DataFrame({'x': [1, 2, 3]}).to_csv(tmp_path / 'source.csv', index=False)
+    return tmp_path
+
+
+def run(stage_dir, module):
+    return run_cached_stages(str(stage_dir / 'source.csv'), [module.load, module.add_y, module.add_z],
+                             str(stage_dir / 'cache'))
+
+
+def cached_files(stage_dir):
+    files = {}
+    for name in os.listdir(stage_dir / 'cache'):
+        files.setdefault(name.split('-')[0], set()).add(name)
+    return files
+
+
+def rerun(stage_dir, **edit):
+    """
+    Runs the stages, then again from an edited copy of their module. Returns the stages that were rerun.
+    """
+    run(stage_dir, write_stages(stage_dir, 'stages_before'))
+    before = cached_files(stage_dir)
+    result = run(stage_dir, write_stages(stage_dir, 'stages_after', **edit))
+    after = cached_files(stage_dir)
+    return {stage for stage in after if after[stage] != before[stage]}, result
+
+
+def test_unchanged_stages_are_cached(stage_dir):
+    assert rerun(stage_dir)[0] == set()
+
+
+def test_editing_a_stage_leaves_earlier_stages_cached(stage_dir):
+    rerun_stages, result = rerun(stage_dir, z_edit=' + 1')
+    assert rerun_stages == {'add_z'}
+    assert result['z'].tolist() == [3, 5, 7]
+
+
+def test_editing_a_referenced_constant_invalidates_its_stage_and_later_ones(stage_dir):
+    rerun_stages, result = rerun(stage_dir, offset=10)
+    assert rerun_stages == {'add_y', 'add_z'}
+    assert result['y'].tolist() == [11, 12, 13]
+
+
+def test_editing_an_unreferenced_function_invalidates_nothing(stage_dir):
+    assert rerun(stage_dir, unrelated=1)[0] == set()
+
+
+def test_cache_version_overrides(stage_dir):
+    module = write_stages(stage_dir, 'stages_before')
+    version = stage_version(module.load)
+    module.load.cache_version = 2
+    assert stage_version(module.load) != version
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from pipeline import HolePipeline, HoleProfilePipeline, ShotPipeline, ShotProfilePipeline
+from synthetic_data import write_synthetic_data
+
+
+@pytest.fixture(scope='module')
+def single_event_exports(tmp_path_factory):
+    """
+    (rshot, rhole) paths of one synthetic event, so per course hole profiles equal the per event field averages
+    """
+    directory = tmp_path_factory.mktemp('single_event')
+    shot_path, hole_path = str(directory / 'rshot.txt'), str(directory / 'rhole.txt')
+    write_synthetic_data(shot_path, hole_path, events=1, players=4, rounds=2)
+    return shot_path, hole_path
+
+
+@pytest.mark.parametrize('pipeline, profile_pipeline, export', [
+    (ShotPipeline, ShotProfilePipeline, 0),
+    (HolePipeline, HoleProfilePipeline, 1),
+])
+def test_profile_path_matches_grouped_path(single_event_exports, tmp_path, pipeline, profile_pipeline, export):
+    path = single_event_exports[export]
+    options = {'cache_dir': str(tmp_path), 'vocabularies_path': None}
+    profiles = profile_pipeline(path, **options)
+    result = pipeline(path, course_profiles=profiles, **options).result()
+    expected = pipeline(path, **options).result()
+    assert profiles._profiles is not None
+    pd.testing.assert_frame_equal(result, expected)
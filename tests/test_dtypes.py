@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dtype_helper_functions import load_vocabularies, memory_report, save_vocabularies
+from hole_helper_functions import hole_feature_engineering, hole_missing_data_handler, load_hole_stats
+from parallel_helper_functions import SHOT_SHARD_STAGES
+from shot_helper_functions import load_shot_stats
+
+# Vocabularies already holding values in another order, so every category code differs from a fresh encoding
+SEEDED_VOCABULARIES = {
+    'FromLie': ['Water', 'Unknown', 'Tee', 'Rough', 'Green', 'Fringe', 'Fairway'],
+    'ToLie': ['Water', 'Unknown', 'Rough', 'Hole', 'Green', 'Fringe', 'Fairway'],
+    'TeeShotFinishLie': ['Water', 'Rough', 'Green', 'Fairway'],
+}
+
+
+def as_objects(df):
+    """
+    df with its categoricals as plain object columns, as the cleaners returned them before encoding
+    """
+    return df.assign(**{column: df[column].astype('object') for column in df.columns
+                        if isinstance(df[column].dtype, pd.CategoricalDtype)})
+
+
+def run_shot_stages(shots):
+    for stage in SHOT_SHARD_STAGES:
+        shots = stage(shots)
+    return shots
+
+
+def run_hole_stages(holes):
+    return hole_feature_engineering(hole_missing_data_handler(holes))
+
+
+@pytest.mark.parametrize('load, run', [(load_shot_stats, run_shot_stages), (load_hole_stats, run_hole_stages)])
+def test_categorical_encoding_leaves_results_unchanged(synthetic_exports, load, run):
+    path = synthetic_exports[0] if load is load_shot_stats else synthetic_exports[1]
+    fresh = load(path, vocabularies={})
+    seeded = load(path, vocabularies={column: list(values) for column, values in SEEDED_VOCABULARIES.items()})
+    categoricals = [column for column in fresh.columns if isinstance(fresh[column].dtype, pd.CategoricalDtype)]
+    assert categoricals
+    assert any(not np.array_equal(fresh[column].cat.codes, seeded[column].cat.codes) for column in categoricals)
+
+    expected = as_objects(run(as_objects(fresh)))
+    pd.testing.assert_frame_equal(as_objects(run(fresh)), expected)
+    pd.testing.assert_frame_equal(as_objects(run(seeded)), expected)
+
+
+def test_vocabularies_round_trip(tmp_path):
+    path = str(tmp_path / 'cache' / 'vocabularies.json')
+    save_vocabularies(path, {'FromLie': ['Tee', 'Fairway']})
+    vocabularies = load_vocabularies(path, {'FromLie': ['Green'], 'ToLie': ['Hole']})
+    # Loaded values are appended after the ones already held, which keep their codes
+    assert vocabularies == {'FromLie': ['Green', 'Tee', 'Fairway'], 'ToLie': ['Hole']}
+    assert load_vocabularies(str(tmp_path / 'missing.json')) == {}
+
+
+def test_memory_report(synthetic_exports):
+    shots = load_shot_stats(synthetic_exports[0], vocabularies={})
+    report = memory_report(shots)
+    assert list(report.index) == list(shots.columns) + ['total']
+    assert report.loc['FromLie', ['before_dtype', 'after_dtype']].tolist() == ['object', 'category']
+    assert report.loc['PlayerID', 'before_dtype'] == 'object'
+    columns = report.drop(index='total')
+    np.testing.assert_allclose(report.loc['total', ['before_mb', 'after_mb', 'saved_mb']].astype('float64'),
+                               [columns['before_mb'].sum(), columns['after_mb'].sum(), columns['saved_mb'].sum()])
+    assert report.loc['total', 'saved_mb'] > 0
+    assert (memory_report(shots, baseline=shots).drop(index='total')['saved_mb'] == 0).all()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from expected_strokes_helper_functions import ALL_LIES, MIN_LIE_SHOTS, ExpectedStrokesTable, fill_missing_SG
+from pipeline import ShotPipeline
+
+# Every completed hole: Tee 15000in -> Fairway 5000in -> Green 300in -> holed, so 3, 2 & 1 strokes to hole out
+HOLE_SHOTS = [('Tee', 15000, 'Fairway', 5000, 'N'), ('Fairway', 5000, 'Green', 300, 'N'),
+              ('Green', 300, 'Hole', 0, 'Y')]
+
+
+def known_shots(holes=MIN_LIE_SHOTS):
+    rows = []
+    for hole in range(holes):
+        for shot_no, (from_lie, from_distance, to_lie, to_distance, holed) in enumerate(HOLE_SHOTS, 1):
+            rows.append((2023001, hole, 1, 1, shot_no, 1, from_lie, from_distance, to_lie, to_distance, holed))
+    # An unfinished hole, left out of the table: 10 strokes from the fairway would raise its expectation
+    rows.append((2023001, holes, 1, 1, 1, 10, 'Fairway', 5000, 'Fairway', 4000, 'N'))
+    return pd.DataFrame(rows, columns=['EventID', 'PlayerID', 'Round', 'Hole', 'ShotNo', 'Strokes', 'FromLie',
+                                       'FromDistance', 'ToLie', 'ToDistance', 'InHoleFlag'])
+
+
+@pytest.fixture(scope='module')
+def table():
+    return ExpectedStrokesTable.from_shots(known_shots())
+
+
+def test_expected_strokes_on_known_shots(table):
+    assert table.lies == ['Tee', 'Fairway', 'Green', ALL_LIES]
+    np.testing.assert_allclose(table.expected_strokes(['Tee', 'Fairway', 'Green'], [15000, 5000, 300]), [3, 2, 1])
+    # Unseen & missing lies use the all lies curve, missing distances are NaN
+    all_lies = table.expected_strokes([ALL_LIES] * 2, [5000, 300])
+    np.testing.assert_allclose(table.expected_strokes(['Sand', None, 'Green'], [5000, 300, np.nan]),
+                               list(all_lies) + [np.nan])
+    np.testing.assert_allclose(all_lies, [2, 1], atol=0.05)
+
+
+def test_strokes_gained_with_holed_shots(table):
+    shots = known_shots(1).iloc[:3].copy()
+    # A chip-in from the fairway: 2 expected strokes in 1, finishing on 0 whatever its ToLie & ToDistance say
+    shots.loc[3] = [2023001, 1, 1, 1, 1, 1, 'Fairway', 5000, None, np.nan, 'Y']
+    np.testing.assert_allclose(table.strokes_gained(shots), [0, 0, 0, 1])
+
+
+def test_saved_table_is_memory_mapped(table, tmp_path):
+    table.save(str(tmp_path))
+    loaded = ExpectedStrokesTable.load(str(tmp_path))
+    assert isinstance(loaded.expected, np.memmap)
+    assert loaded.lies == table.lies
+    np.testing.assert_array_equal(loaded.expected, table.expected)
+
+
+def test_fill_missing_sg_only_fills_missing(table):
+    shots = known_shots(1).iloc[:3].copy()
+    shots['SGBaseline'] = [0.25, np.nan, np.nan]
+    pd.testing.assert_frame_equal(fill_missing_SG(shots.copy()), shots)
+    np.testing.assert_allclose(fill_missing_SG(shots.copy(), table)['SGBaseline'], [0.25, 0, 0])
+
+
+def test_pipeline_fills_blanked_sg_when_given_a_table(synthetic_exports, tmp_path):
+    options = {'cache_dir': str(tmp_path), 'vocabularies_path': None}
+    shots = ShotPipeline(synthetic_exports[0], **options).result()
+    table = ExpectedStrokesTable.from_shots(shots)
+    filled = ShotPipeline(synthetic_exports[0], expected_strokes=table, **options).result()
+    blanked = shots['SGBaseline'].isna()
+    assert blanked.any()
+    pd.testing.assert_series_equal(filled.loc[~blanked, 'SGBaseline'], shots.loc[~blanked, 'SGBaseline'])
+    np.testing.assert_allclose(filled.loc[blanked, 'SGBaseline'], table.strokes_gained(shots.loc[blanked]))
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from form_helper_functions import FormTracker, add_event_order, ewm_form, round_aggregates, rolling_form
+
+# EventIDs whose order differs from the schedule's, as tournament numbers are IDs rather than schedule positions
+SCHEDULE = pd.DataFrame({
+    'EventID': [2023014, 2023003, 2023027, 2023009, 2023021],
+    'EventDate': pd.to_datetime(['2023-01-12', '2023-01-26', '2023-02-09', '2023-02-23', '2023-03-09']),
+})
+CATEGORIES = ['Off the Tee', 'Approach', 'Putt']
+
+
+def hole_rows(seed=0):
+    """
+    Shot-like rows of every scheduled event: 6 players (not all in every event), 2 rounds, a few missing values
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for event in SCHEDULE['EventID']:
+        players = rng.choice(np.arange(1, 7), size=4, replace=False)
+        n = len(players) * 2 * 6
+        frames.append(pd.DataFrame({
+            'PlayerID': np.repeat(players, 12),
+            'EventID': event,
+            'Round': np.tile(np.repeat([1, 2], 6), len(players)),
+            'SGCategory': rng.choice(CATEGORIES, size=n),
+            'SGBaseline': np.where(rng.random(n) < 0.05, np.nan, rng.normal(0, 1, n)),
+        }))
+    return add_event_order(pd.concat(frames, ignore_index=True), SCHEDULE)
+
+
+@pytest.mark.parametrize('by', [None, 'SGCategory'])
+def test_incremental_form_matches_batch(by):
+    rows = hole_rows()
+    tracker = FormTracker('SGBaseline', by=by, window=3, alpha=0.3, order='EventDate')
+    # Appended in date order, which is not EventID order
+    incremental = pd.concat([tracker.update(rows[rows['EventID'] == event]) for event in SCHEDULE['EventID']],
+                            ignore_index=True)
+
+    rounds = round_aggregates(rows, {'SGBaseline': 'sum'}, by, 'EventDate')
+    rounds['SGBaseline_last3'] = rolling_form(rounds, 'SGBaseline', 3, by, 'EventDate')
+    rounds['SGBaseline_ewm'] = ewm_form(rounds, 'SGBaseline', 0.3, by, 'EventDate')
+    keys = ['PlayerID', 'EventID', 'Round'] + ([by] if by else [])
+    expected = rounds.set_index(keys).sort_index()
+    result = incremental.set_index(keys).sort_index()[expected.columns]
+    pd.testing.assert_frame_equal(result, expected, check_exact=False)
+
+    # Ordering by EventID instead would give different form
+    by_event_id = ewm_form(rounds, 'SGBaseline', 0.3, by)
+    assert not np.allclose(by_event_id, rounds['SGBaseline_ewm'], equal_nan=True)
+
+    latest = rounds.sort_values('EventDate', kind='stable').groupby(['PlayerID'] + ([by] if by else [])).tail(1)
+    form = tracker.form().set_index(keys).sort_index()
+    pd.testing.assert_frame_equal(form[expected.columns], latest.set_index(keys).sort_index()[expected.columns],
+                                  check_exact=False)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from hole_helper_functions import hole_feature_engineering
+from reference_features import merge_hole_features
+
+NAN = np.nan
+
+COLUMNS = {
+    'EventID': 'Int32', 'Hole': 'Int8', 'Yardage': 'Int16', 'HoleScore': 'Int8', 'Fairway': 'bool', 'GIR': 'bool',
+    'DrivingDistance': 'Int16', 'SGOTT': 'float64', 'SGAPP': 'float64', 'SGARG': 'float64', 'SGPutt': 'float64',
+    'HoleAvg': 'Float64', 'Vs_HoleAvg': 'Float64', 'DD_Avg': 'Float64', 'Vs_DDAvg': 'Float64',
+    'SGOTT_avg': 'float64', 'Vs_SGOTT_avg': 'float64', 'SGAPP_avg': 'float64', 'Vs_SGAPP_avg': 'float64',
+    'SGARG_avg': 'float64', 'Vs_SGARG_avg': 'float64', 'SGPutt_avg': 'float64', 'Vs_SGPutt_avg': 'float64',
+    'FairwayAvg': 'float64', 'RelativeFairway': 'float64', 'GIRavg': 'float64', 'RelativeGIR': 'float64',
+    'HoleLengthCategory': 'category',
+}
+
+
+def hole_frame():
+    """
+    Hole 1: 1 of 4 fairways & no GIRs (a 0 rate). Hole 2: 1 of 11 fairways & 10 of 11 GIRs (extreme rates), one
+    blank HoleScore. Hole 3: every fairway hit (relative 0). The last row is missing its Hole.
+    """
+    holes = [1] * 4 + [2] * 11 + [3] * 2 + [None]
+    n = len(holes)
+    return pd.DataFrame({
+        'EventID': pd.array([2023001] * n, dtype='Int32'),
+        'Hole': pd.array(holes, dtype='Int8'),
+        'Yardage': pd.array([420] * 4 + [180] * 11 + [560] * 2 + [None], dtype='Int16'),
+        'HoleScore': pd.array([4, 5, 4, 3] + [3] * 10 + [None] + [5, 4] + [4], dtype='Int8'),
+        'Fairway': [True, False, False, False] + [True] + [False] * 10 + [True, True] + [True],
+        'GIR': [False] * 4 + [True] * 10 + [False] + [True, False] + [True],
+        'DrivingDistance': pd.array([300, 280, None, 290] + [None] * 11 + [310, 290] + [300], dtype='Int16'),
+        'SGOTT': [0.5, -0.5, 0.25, NAN] + [0.0] * 11 + [0.1, -0.1] + [0.2],
+        'SGAPP': [0.0] * n,
+        'SGARG': [0.0] * n,
+        'SGPutt': [1.0, -1.0] + [0.0] * (n - 2),
+    })
+
+
+def test_columns_and_dtypes():
+    result = hole_feature_engineering(hole_frame())
+    assert list(result.columns) == list(COLUMNS)
+    assert result.dtypes.astype(str).to_dict() == COLUMNS
+
+
+def test_field_averages():
+    result = hole_feature_engineering(hole_frame())
+    np.testing.assert_allclose(result['HoleAvg'].to_numpy('float64', na_value=NAN),
+                               [4.0] * 4 + [3.0] * 11 + [4.5] * 2 + [NAN])
+    np.testing.assert_allclose(result['Vs_HoleAvg'].to_numpy('float64', na_value=NAN),
+                               [0, 1, 0, -1] + [0] * 10 + [NAN] + [0.5, -0.5] + [NAN])
+    np.testing.assert_allclose(result['Vs_DDAvg'].to_numpy('float64', na_value=NAN),
+                               [10, -10, NAN, 0] + [NAN] * 11 + [10, -10] + [NAN])
+    np.testing.assert_allclose(result['SGOTT_avg'], [0.25 / 3] * 4 + [0.0] * 13 + [NAN])
+    np.testing.assert_allclose(result['Vs_SGOTT_avg'],
+                               [0.5 - 0.25 / 3, -0.5 - 0.25 / 3, 0.25 - 0.25 / 3, NAN] + [0.0] * 11 +
+                               [0.1, -0.1] + [NAN])
+
+
+def test_rates_zero_and_extreme_values():
+    result = hole_feature_engineering(hole_frame())
+    # 0 rates & 0 relatives are missing, as are rates in (0, 0.1) & (0.9, 1)
+    np.testing.assert_allclose(result['FairwayAvg'], [0.25] * 4 + [NAN] * 11 + [1.0] * 2 + [NAN])
+    np.testing.assert_allclose(result['RelativeFairway'], [0.75, -0.25, -0.25, -0.25] + [NAN] * 14)
+    np.testing.assert_allclose(result['GIRavg'], [NAN] * 15 + [0.5] * 2 + [NAN])
+    np.testing.assert_allclose(result['RelativeGIR'], [NAN] * 15 + [0.5, -0.5] + [NAN])
+
+
+def test_missing_hole_row():
+    result = hole_feature_engineering(hole_frame())
+    missing = result.iloc[-1]
+    assert all(pd.isna(missing[column]) for column in ['HoleAvg', 'DD_Avg', 'SGOTT_avg', 'FairwayAvg', 'GIRavg',
+                                                       'RelativeFairway', 'RelativeGIR', 'HoleLengthCategory'])
+    assert result['HoleLengthCategory'].astype(object).iloc[:-1].tolist() == \
+        ['401-450'] * 4 + ['151-200'] * 11 + ['551-600'] * 2
+
+
+def test_matches_merge_path():
+    result = hole_feature_engineering(hole_frame())
+    expected = merge_hole_features(hole_frame())
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_dtype=False)
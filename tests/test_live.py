@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from live_helper_functions import CHANGED_COLUMNS, FieldAggregates
+from shot_helper_functions import DETAILED_CATEGORIES, SG_CATEGORIES, SHOT_KEYS, relative_SG, \
+    shot_feature_engineering
+
+
+def shot_frame(seed=0):
+    """
+    Two events of 6 players, 2 rounds & 4 holes each, with 1-5 shots per hole & some missing values.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for event in (2023001, 2023002):
+        for player in range(6):
+            for round_ in (1, 2):
+                for hole in range(1, 5):
+                    shots = int(rng.integers(1, 6))
+                    for shot in range(1, shots + 1):
+                        rows.append((event, player, round_, hole, shot, event % 1000, shots))
+    shots = pd.DataFrame(rows, columns=SHOT_KEYS + ['CourseID', 'HoleScore'])
+    n = len(shots)
+    for key, dtype in zip(SHOT_KEYS, ['Int32', 'Int32', 'Int8', 'Int8', 'Int8']):
+        shots[key] = shots[key].astype(dtype)
+    shots['CourseID'] = shots['CourseID'].astype('Int32')
+    shots['HoleScore'] = shots['HoleScore'].astype('Int8')
+    shots['Strokes'] = pd.array(rng.choice([1, 1, 1, 2], n), dtype='Int8')
+    shots['SGCategory'] = pd.Categorical(rng.choice(SG_CATEGORIES[:4], n), categories=SG_CATEGORIES)
+    shots['detailed_category'] = pd.Categorical(rng.choice(DETAILED_CATEGORIES, n), categories=DETAILED_CATEGORIES)
+    shots['SGBaseline'] = np.where(rng.random(n) < 0.1, np.nan, rng.normal(0, 0.5, n).round(3))
+    shots['ShotDistance'] = pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(1, 12000, n)), dtype='Int32')
+    shots['ToDistance'] = pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(0, 12000, n)), dtype='Int32')
+    shots['ToLie'] = pd.Categorical(rng.choice(['Fairway', 'Rough', 'Green'], n))
+    return shots
+
+
+def full_recompute(shots):
+    expected = relative_SG(shot_feature_engineering(shots.copy()))
+    return expected.set_index(SHOT_KEYS)[CHANGED_COLUMNS]
+
+
+def assert_matches(changed, shots):
+    expected = full_recompute(shots)
+    assert len(changed)
+    pd.testing.assert_frame_equal(changed, expected.loc[changed.index], check_dtype=False)
+
+
+def test_batches_merge_and_correct_match_full_recompute():
+    shots = shot_frame()
+    first, second = shots[shots['Round'] == 1], shots[shots['Round'] == 2]
+    store = FieldAggregates.from_shots(first.iloc[::2]).merge(FieldAggregates.from_shots(first.iloc[1::2]))
+
+    appended = first
+    for batch in np.array_split(np.arange(len(second)), 5):
+        appended = pd.concat([appended, second.iloc[batch]])
+        assert_matches(store.append(second.iloc[batch]), appended)
+
+    old = appended.sample(20, random_state=1)
+    new = old.copy()
+    new['SGBaseline'] = new['SGBaseline'] + 0.25
+    new['Strokes'] = pd.array(np.where(new['Strokes'] == 1, 2, 1), dtype='Int8')
+    new['ToDistance'] = new['ToDistance'] + 7
+    corrected = pd.concat([appended.drop(old.index), new])
+    changed = store.correct(old, new)
+    assert_matches(changed, corrected)
+    assert len(changed) == len(corrected)
+
+
+def test_append_only_emits_batch_events():
+    shots = shot_frame()
+    store = FieldAggregates.from_shots(shots[shots['EventID'] == 2023001])
+    batch = shots[shots['EventID'] == 2023002]
+    changed = store.append(batch)
+    assert set(changed.index.get_level_values('EventID')) == {2023002}
+    assert_matches(changed, shots)
+
+
+def test_retract_removes_shots():
+    shots = shot_frame()
+    event = shots[shots['EventID'] == 2023001]
+    store = FieldAggregates.from_shots(shots)
+    changed = store.retract(event)
+    assert set(changed.index.get_level_values('EventID')) == set()
+    assert 2023001 not in store.shots
+    assert store.annotate(event.copy())['AvgSG'].isna().all()
+
+
+def test_closed_event_keeps_sums_but_not_shots():
+    shots = shot_frame()
+    event = shots['EventID'] == 2023001
+    first, last = shots[event & (shots['Hole'] < 4)], shots[event & (shots['Hole'] == 4)]
+    store = FieldAggregates.from_shots(first)
+    store.close(2023001)
+    assert 2023001 not in store.shots
+    changed = store.append(last)
+    # Only the batch's own shots are re-emitted, with values from the event's full sums
+    assert len(changed) == len(last)
+    assert_matches(changed, shots[event])
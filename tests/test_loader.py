@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import urllib.error
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from hole_helper_functions import load_hole_stats
+from loader_helper_functions import ChecksumError, Source, load_sources
+
+CONTENT = b'a;b\n1;2\n'
+
+
+class Mirror(ThreadingHTTPServer):
+    """
+    Local stand-in for an HTTP mirror. files: path -> (body, number of 503s to answer first). Unknown paths are 404.
+    """
+
+    def __init__(self, files):
+        super().__init__(('127.0.0.1', 0), MirrorHandler)
+        self.files = files
+        self.requests = Counter()
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests[self.path] += 1
+        if self.path not in self.server.files:
+            self.send_error(404)
+            return
+        body, failures = self.server.files[self.path]
+        if self.server.requests[self.path] <= failures:
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mirror(synthetic_exports):
+    with open(synthetic_exports[1], 'rb') as file:
+        holes = file.read()
+    server = Mirror({'/rhole.txt': (holes, 0), '/flaky.txt': (CONTENT, 2), '/corrupt.txt': (CONTENT, 0)})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read(data):
+    return pd.read_csv(data, sep=';')
+
+
+def load(*sources):
+    return load_sources(list(sources), retries=2, backoff=0)
+
+
+def test_remote_and_local_sources(mirror, synthetic_exports):
+    sha256 = hashlib.sha256(mirror.files['/rhole.txt'][0]).hexdigest()
+    frames = load(Source('remote', mirror.url('/rhole.txt'), lambda data: load_hole_stats(data, vocabularies={}),
+                         sha256),
+                  Source('local', synthetic_exports[1], lambda data: load_hole_stats(data, vocabularies={}), sha256))
+    pd.testing.assert_frame_equal(frames['remote'], frames['local'])
+
+
+def test_server_error_is_retried(mirror):
+    frames = load(Source('flaky', mirror.url('/flaky.txt'), read))
+    assert frames['flaky'].to_dict('list') == {'a': [1], 'b': [2]}
+    assert mirror.requests['/flaky.txt'] == 3
+
+
+def test_checksum_mismatch_is_retried_then_raised(mirror):
+    with pytest.raises(ChecksumError):
+        load(Source('corrupt', mirror.url('/corrupt.txt'), read, sha256='0' * 64))
+    assert mirror.requests['/corrupt.txt'] == 3
+
+
+def test_client_error_fails_fast(mirror):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        load(Source('missing', mirror.url('/missing.txt'), read))
+    assert error.value.code == 404
+    assert mirror.requests['/missing.txt'] == 1
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import reference_missing_data
+from hole_helper_functions import hole_missing_data_handler, load_hole_stats
+from shot_helper_functions import add_SG_category, load_shot_stats, missing_shots_handler
+
+
+def with_edge_cases(df, zero_columns):
+    """
+    Zeros in 20% of each zero_columns column (over the 10% threshold), SG far outside +-0.5 & a few missing holes
+    """
+    rows = np.arange(len(df))
+    for column in zero_columns:
+        df.loc[rows % 5 == 0, column] = 0
+    df.loc[rows % 7 == 0, df.columns.intersection(['SGOTT', 'SGPutt', 'SGBaseline'])] = 2.0
+    df.loc[rows % 11 == 0, 'Hole'] = pd.NA
+    return df
+
+
+def test_hole_handler_matches_previous_output(synthetic_exports):
+    holes = with_edge_cases(load_hole_stats(synthetic_exports[1], vocabularies={}), ['Yardage', 'SGARG'])
+    result, report = hole_missing_data_handler(holes.copy(), return_report=True)
+    expected = reference_missing_data.hole_missing_data_handler(holes.copy())
+    pd.testing.assert_frame_equal(result, expected)
+    assert report['Yardage'] == (holes['Yardage'] == 0).sum()
+    assert report['SGOTT'] > 0
+
+
+def test_shot_handler_matches_previous_output(synthetic_exports):
+    shots = add_SG_category(load_shot_stats(synthetic_exports[0], vocabularies={}))
+    shots = with_edge_cases(shots, ['ShotDistance', 'ToDistance'])
+    result = missing_shots_handler(shots.copy())
+    expected = reference_missing_data.missing_shots_handler(shots.copy())
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+import pytest
+
+from hole_helper_functions import hole_feature_engineering, hole_missing_data_handler, load_hole_stats
+from parallel_helper_functions import SHOT_SHARD_STAGES, hole_pipeline_sharded, run_sharded, shot_pipeline_sharded
+from shot_helper_functions import load_shot_stats
+
+SHM_DIR = '/dev/shm'
+
+
+def fail_on_second_event(df):
+    if df['EventID'].iloc[0] % 1000 == 2:
+        raise RuntimeError('shard failed')
+    return df
+
+
+def shm_blocks():
+    return set(os.listdir(SHM_DIR))
+
+
+def test_shot_pipeline_matches_serial(synthetic_exports):
+    shots = load_shot_stats(synthetic_exports[0], vocabularies={})
+    expected = shots.copy()
+    for stage in SHOT_SHARD_STAGES:
+        expected = stage(expected)
+    result = shot_pipeline_sharded(shots, max_workers=2)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_hole_pipeline_matches_serial(synthetic_exports):
+    holes = load_hole_stats(synthetic_exports[1], vocabularies={})
+    expected = hole_feature_engineering(hole_missing_data_handler(holes.copy()))
+    # One shard in flight at a time, so shards are streamed to the pool
+    result = hole_pipeline_sharded(holes, max_workers=1)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.skipif(not os.path.isdir(SHM_DIR), reason='shared memory blocks are listed in /dev/shm')
+@pytest.mark.parametrize('max_in_flight', [1, None])
+def test_failed_shard_unlinks_every_block(synthetic_exports, max_in_flight):
+    holes = load_hole_stats(synthetic_exports[1], vocabularies={})
+    before = shm_blocks()
+    with pytest.raises(RuntimeError, match='shard failed'):
+        run_sharded(holes, [fail_on_second_event], max_workers=2, max_in_flight=max_in_flight)
+    assert shm_blocks() == before
@@ -0,0 +1,39 @@
+import os
+import sys
+import types
+
+import pytest
+
+from dtype_helper_functions import load_vocabularies
+from pipeline import HolePipeline, lazy_attributes
+
+
+def test_vocabularies_saved_in_cache_dir_only_when_changed(synthetic_exports, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache_dir = tmp_path / 'cache'
+    HolePipeline(synthetic_exports[1], cache_dir=str(cache_dir)).result()
+    assert os.listdir(tmp_path) == ['cache']
+    path = cache_dir / 'vocabularies.json'
+    assert path.exists()
+
+    saves = []
+    monkeypatch.setattr('pipeline.save_vocabularies', lambda *args: saves.append(args))
+    pipeline = HolePipeline(synthetic_exports[1], cache_dir=str(cache_dir))
+    pipeline.result(['Par'])
+    pipeline.result()
+    assert saves == []
+    # The saved vocabularies are the ones the next pipeline over the cache dir starts from
+    assert pipeline.vocabularies == load_vocabularies(str(path))
+    assert pipeline.vocabularies['TeeShotFinishLie']
+
+
+def test_lazy_attributes_computed_once(monkeypatch):
+    module = types.ModuleType('lazy_example')
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    calls = []
+    module.__getattr__ = lazy_attributes(module.__name__, {'table': lambda: calls.append(1) or len(calls)})
+    assert module.table == 1
+    assert module.table == 1
+    assert calls == [1]
+    with pytest.raises(AttributeError, match='no attribute'):
+        module.missing
@@ -0,0 +1,32 @@
+from hole_helper_functions import load_hole_stats, validate_holes
+from pipeline import load_holes_from_shots
+from rollup_helper_functions import RECONCILED_COLUMNS, reconcile_holes
+
+# 2 events x 4 players x 2 rounds x 18 holes
+HOLES = 288
+
+
+def test_rolled_up_holes_reconcile_with_rhole(synthetic_exports):
+    derived = load_holes_from_shots(synthetic_exports[0])
+    holes = validate_holes(load_hole_stats(synthetic_exports[1]))
+    report = reconcile_holes(derived, holes)
+    assert report.loc['holes', ['compared', 'only_derived', 'only_rhole']].tolist() == [HOLES, 0, 0]
+    columns = report.loc[list(RECONCILED_COLUMNS)]
+    assert (columns['mismatches'] == 0).all()
+    assert (columns['missing_rhole'] == 0).all()
+    # The rollup leaves driving distance out on par 3's, as hole_missing_data_handler would
+    assert (columns['missing_derived'].drop('DrivingDistance') == 0).all()
+    assert columns.loc['DrivingDistance', 'missing_derived'] == (holes['Par'] == 3).sum() > 0
+    assert (columns['compared'] > 0).all()
+
+
+def test_reconcile_reports_differences(synthetic_exports):
+    derived = load_holes_from_shots(synthetic_exports[0])
+    holes = validate_holes(load_hole_stats(synthetic_exports[1]))
+    holes.loc[holes.index[:3], 'HoleScore'] += 1
+    holes.loc[holes.index[3], 'SGPutt'] += 0.5
+    report = reconcile_holes(derived, holes.iloc[:-2])
+    assert report.loc['holes', ['compared', 'only_derived', 'only_rhole']].tolist() == [HOLES - 2, 2, 0]
+    assert report.loc['HoleScore', 'mismatches'] == 3
+    assert report.loc['HoleScore', 'max_abs_diff'] == 1
+    assert report.loc['SGPutt', 'mismatches'] == 1
@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shot_helper_functions import SG_CATEGORIES, Strokes_Gained_Category, assign_detailed_category, \
+    assign_SG_category, detailed_category
+
+# Every ToDistance bin edge (inches) of detailed_category
+DETAILED_EDGES = [0, 6, 15, 30, 900, 1800, 3600, 5400, 7200, 9000, 10080]
+TO_DISTANCES = sorted({distance + offset for distance in DETAILED_EDGES for offset in (-1, -0.5, 0, 0.5, 1)}) + [
+    -10, 20000, np.nan]
+
+
+def sg_category_frame():
+    rows = itertools.product([3, 4, 5, np.nan], [1, 2, np.nan], [np.nan, 0, 1799, 1799.5, 1800, 1800.5, 1801, 5000],
+                             ['Green', 'Fairway', 'Tee Box', np.nan])
+    return pd.DataFrame(list(rows), columns=['Par', 'ShotNo', 'FromDistance', 'FromLie'])
+
+
+def detailed_category_frame():
+    rows = itertools.product(SG_CATEGORIES + [np.nan], TO_DISTANCES)
+    return pd.DataFrame(list(rows), columns=['SGCategory', 'ToDistance'])
+
+
+def test_sg_category_matches_row_wise():
+    shots = sg_category_frame()
+    expected = shots.apply(Strokes_Gained_Category, axis=1)
+    result = assign_SG_category(shots)
+    assert result.astype(object).tolist() == expected.tolist()
+    assert 'Other' in set(expected)
+
+
+@pytest.mark.parametrize('dtypes', [{}, {'Par': 'Int8', 'ShotNo': 'Int8', 'FromDistance': 'Int32',
+                                         'FromLie': 'category'}])
+def test_sg_category_cleaned_dtypes(dtypes):
+    shots = sg_category_frame()
+    shots = shots[shots['FromDistance'].isna() | (shots['FromDistance'] % 1 == 0)]
+    expected = shots.apply(Strokes_Gained_Category, axis=1)
+    typed = shots.astype(dtypes)
+    assert assign_SG_category(typed).astype(object).tolist() == expected.tolist()
+
+
+def test_detailed_category_matches_row_wise():
+    shots = detailed_category_frame()
+    expected = shots.apply(detailed_category, axis=1)
+    result = assign_detailed_category(shots)
+    assert result.astype(object).tolist() == expected.tolist()
+
+
+def test_detailed_category_fallbacks():
+    shots = detailed_category_frame()
+    result = assign_detailed_category(shots).astype(object)
+    missing = shots['SGCategory'].isna() | shots['ToDistance'].isna()
+    assert (result[missing] == 'Other').all()
+    # Below the first bin, & Around the Green from 1800 up, fall back to 'Other'
+    assert (result[(shots['SGCategory'] == 'Putt') & (shots['ToDistance'] < 0)] == 'Other').all()
+    assert (result[(shots['SGCategory'] == 'Around the Green') & (shots['ToDistance'] >= 1800)] == 'Other').all()
+    assert (result[shots['SGCategory'] == 'Other'] == 'Other').all()
+
+
+def test_detailed_category_categorical_input():
+    shots = detailed_category_frame()
+    expected = shots.apply(detailed_category, axis=1)
+    shots['SGCategory'] = pd.Categorical(shots['SGCategory'], categories=SG_CATEGORIES)
+    assert assign_detailed_category(shots).astype(object).tolist() == expected.tolist()
+
+
+def test_categories_are_aligned_to_input():
+    shots = sg_category_frame().set_index(np.arange(1000, 1000 + len(sg_category_frame())))
+    assert assign_SG_category(shots).index.equals(shots.index)
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from reference_features import merge_shot_features
+from shot_helper_functions import (add_detailed_category, add_SG_category, load_shot_stats, missing_shots_handler,
+                                   relative_SG, shot_feature_engineering)
+
+
+def categorised_shots(path):
+    shots = load_shot_stats(path, vocabularies={})
+    for stage in [add_SG_category, missing_shots_handler, relative_SG, add_detailed_category]:
+        shots = stage(shots)
+    return shots
+
+
+def test_matches_merge_path(synthetic_exports):
+    # Shuffled rows with a gapped index, so both row order & the returned index are checked
+    shots = categorised_shots(synthetic_exports[0]).sample(frac=0.9, random_state=1)
+    result = shot_feature_engineering(shots.copy())
+    expected = merge_shot_features(shots.copy())
+    assert isinstance(result.index, pd.RangeIndex)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from store_helper_functions import ColumnStore
+
+
+def frame(start, n):
+    rows = np.arange(start, start + n)
+    return pd.DataFrame({
+        'EventID': rows.astype('int64') + 2023000,
+        'SGBaseline': rows / 4,
+        'Hole': pd.array(np.where(rows % 3 == 0, None, rows % 18 + 1), dtype='Int8'),
+        'Fairway': rows % 2 == 0,
+        'FromLie': pd.Series(np.array(['Fairway', 'Green', 'Rough'])[rows % 3], dtype='category'),
+        'ToLie': np.array(['Green', 'Hole', 'Bunker', 'Fringe'])[start % 4 + rows % 2],
+    })
+
+
+def expected_frame(*frames):
+    expected = pd.concat(frames, ignore_index=True)
+    for column in ['FromLie', 'ToLie']:
+        expected[column] = expected[column].astype('object')
+    return expected
+
+
+def read_all(store):
+    result = store.read()
+    for column in ['FromLie', 'ToLie']:
+        result[column] = result[column].astype('object')
+    return result
+
+
+def test_round_trip_across_appends(tmp_path):
+    store = ColumnStore(str(tmp_path / 'shots'))
+    store.append(frame(0, 10))
+    # New dictionary values arrive in the second append
+    store.append(frame(10, 7))
+    reopened = ColumnStore(str(tmp_path / 'shots'))
+    assert len(reopened) == 17
+    pd.testing.assert_frame_equal(read_all(reopened), expected_frame(frame(0, 10), frame(10, 7)))
+    projection = reopened.read(['SGBaseline', 'Hole'], start=5, stop=12)
+    assert list(projection.index) == list(range(5, 12))
+    pd.testing.assert_frame_equal(projection, expected_frame(frame(0, 10), frame(10, 7))[['SGBaseline', 'Hole']]
+                                  .iloc[5:12])
+
+
+@pytest.mark.parametrize('change, message', [
+    (lambda df: df.drop(columns='ToLie'), 'do not match'),
+    (lambda df: df.assign(EventID=np.nan), "'EventID'"),
+    (lambda df: df.assign(EventID=df['EventID'] + 0.5), "'EventID'"),
+    (lambda df: df.assign(SGBaseline='x'), "'SGBaseline'"),
+    (lambda df: df.assign(FromLie=1), "'FromLie'"),
+])
+def test_mismatched_schema_is_rejected(tmp_path, change, message):
+    store = ColumnStore(str(tmp_path))
+    store.append(frame(0, 10))
+    with pytest.raises(ValueError, match=message):
+        store.append(change(frame(10, 5)))
+    assert len(store) == 10
+    pd.testing.assert_frame_equal(read_all(store), expected_frame(frame(0, 10)))
+
+
+def test_failed_append_leaves_the_store_as_it_was(tmp_path, monkeypatch):
+    store = ColumnStore(str(tmp_path))
+    store.append(frame(0, 10))
+    write = ColumnStore._write
+    written = []
+
+    def fail_on_third_file(self, i, suffix, data):
+        if len(written) == 2:
+            raise OSError('disk full')
+        written.append(i)
+        write(self, i, suffix, data)
+
+    monkeypatch.setattr(ColumnStore, '_write', fail_on_third_file)
+    with pytest.raises(OSError, match='disk full'):
+        store.append(frame(10, 5))
+    monkeypatch.undo()
+    # The first files have bytes past the committed rows, which readers don't see
+    assert os.path.getsize(tmp_path / '0.values') == 15 * 8
+    assert len(ColumnStore(str(tmp_path))) == 10
+    pd.testing.assert_frame_equal(read_all(ColumnStore(str(tmp_path))), expected_frame(frame(0, 10)))
+
+    # The next append cuts them off instead of shifting its rows
+    store.append(frame(10, 5))
+    pd.testing.assert_frame_equal(read_all(ColumnStore(str(tmp_path))), expected_frame(frame(0, 10), frame(10, 5)))
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dtype_helper_functions import MALFORMED_COLUMN, coerce_numeric, malformed_flag
+from hole_helper_functions import HOLE_COLUMN_TYPES, HOLE_KEYS, load_hole_stats, validate_holes
+from validation_helper_functions import KEPT_COLUMN, REASON_COLUMN, duplicated, malformed, validate
+
+
+def read_raw(path):
+    return pd.read_csv(path, sep=';', dtype=str, keep_default_na=False)
+
+
+def write_raw(raw, path):
+    raw.to_csv(path, sep=';', index=False)
+    return str(path)
+
+
+def test_coerce_numeric():
+    values = coerce_numeric(pd.Series(['12', 'x', '3.5', '300', '', None, '-4']), 'Int8')
+    assert str(values.dtype) == 'Int8'
+    assert values.tolist() == [12, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, -4]
+    floats = coerce_numeric(pd.Series(['1.5', 'abc']), 'float64')
+    assert floats.iloc[0] == 1.5 and np.isnan(floats.iloc[1])
+
+
+def test_fairway_and_gir_flags(synthetic_exports, tmp_path):
+    raw = read_raw(synthetic_exports[1])
+    raw.loc[3, 'Hit Fwy'] = 'X'
+    holes = load_hole_stats(write_raw(raw, tmp_path / 'rhole.txt'), vocabularies={})
+    assert holes['Fairway'].dtype == bool and holes['GIR'].dtype == bool
+    assert holes['GIR'].tolist() == (raw['Hit Green'] == 'Y').tolist()
+    assert (raw['Hit Fwy'] == 'N').any() and not holes.loc[raw['Hit Fwy'] == 'N', 'Fairway'].any()
+    assert holes.loc[raw['Hit Fwy'] == 'Y', 'Fairway'].all()
+    assert holes[MALFORMED_COLUMN].tolist() == [malformed_flag('Fairway', HOLE_COLUMN_TYPES) if row == 3 else 0
+                                                for row in range(len(raw))]
+
+
+def test_malformed_value_in_a_later_chunk(synthetic_exports, tmp_path):
+    raw = read_raw(synthetic_exports[1])
+    bad, blank = len(raw) - 5, len(raw) - 3
+    raw.loc[bad, 'Score'] = 'abc'
+    raw.loc[blank, 'Score'] = ''
+    path = write_raw(raw, tmp_path / 'rhole.txt')
+    holes = load_hole_stats(path, chunksize=10, vocabularies={})
+    expected = load_hole_stats(synthetic_exports[1], chunksize=10, vocabularies={})
+
+    # Every row is read, with the earlier chunks' types unchanged by the re-read of the rest
+    assert len(holes) == len(raw)
+    assert holes.dtypes.drop(MALFORMED_COLUMN).equals(expected.dtypes)
+    assert holes['HoleScore'].isna().tolist() == [row in (bad, blank) for row in range(len(raw))]
+    flags = holes[MALFORMED_COLUMN].fillna(0).to_numpy()
+    assert np.flatnonzero(flags).tolist() == [bad]
+    assert np.flatnonzero(malformed('HoleScore', HOLE_COLUMN_TYPES)(holes)).tolist() == [bad]
+
+    quarantine_path = tmp_path / 'quarantine.csv'
+    valid, report = validate_holes(holes, str(quarantine_path), return_report=True)
+    assert report['malformed HoleScore'] == 1 and report['missing HoleScore'] == 2
+    # The malformed row is dropped, the blank one kept & carried as missing
+    assert len(valid) == len(raw) - 1 and MALFORMED_COLUMN not in valid
+    quarantined = pd.read_csv(quarantine_path)
+    assert quarantined[REASON_COLUMN].tolist() == ['malformed HoleScore; missing HoleScore', 'missing HoleScore']
+    assert quarantined[KEPT_COLUMN].tolist() == [False, True]
+
+
+def test_duplicate_keys_ranges_and_reasons(synthetic_exports, tmp_path):
+    holes = load_hole_stats(synthetic_exports[1], vocabularies={})
+    n = len(holes)
+    holes.loc[1, 'Par'] = 6
+    holes.loc[2, 'Hole'] = 19
+    holes.loc[3, 'Par'] = 2
+    holes = pd.concat([holes, holes.iloc[[3, 4]]], ignore_index=True)
+
+    quarantine_path = str(tmp_path / 'quarantine.csv')
+    valid, report = validate_holes(holes, quarantine_path, return_report=True)
+    assert report['Par outside 3-5'] == 3 and report['Hole outside 1-18'] == 1 and report['duplicate key'] == 2
+    assert len(valid) == n - 3
+    quarantined = pd.read_csv(quarantine_path)
+    assert quarantined[REASON_COLUMN].tolist() == ['Par outside 3-5', 'Hole outside 1-18', 'Par outside 3-5',
+                                                   'Par outside 3-5; duplicate key', 'duplicate key']
+
+    # A rerun replaces the file rather than adding the same rows again
+    validate_holes(holes, quarantine_path)
+    assert len(pd.read_csv(quarantine_path)) == 5
+
+
+def test_clean_frame_is_returned_unchanged(synthetic_exports, tmp_path):
+    holes = load_hole_stats(synthetic_exports[1], vocabularies={})
+    valid, report = validate_holes(holes, str(tmp_path / 'quarantine.csv'), return_report=True)
+    assert valid is holes and not any(report.values())
+    assert pd.read_csv(tmp_path / 'quarantine.csv').empty
+
+
+@pytest.mark.parametrize('dtype', ['Int32', 'float64', 'object'])
+def test_duplicated(dtype):
+    keys = pd.DataFrame({'EventID': [1, 1, 1, 2, 1, None], 'Hole': [1, 2, 1, 1, 2, 1]})
+    keys['EventID'] = keys['EventID'].astype('Int32').astype(dtype)
+    assert duplicated(['EventID', 'Hole'])(keys).tolist() == [False, False, True, False, True, False]
+    assert not np.any(duplicated(['EventID', 'Hole'])(keys.iloc[[0, 1, 3, 5]]))
+
+
+def test_validate_joins_reasons():
+    df = pd.DataFrame({'a': [1, -1, 5, -5]})
+    rules = [('negative a', lambda df: df['a'] < 0), ('large a', lambda df: df['a'].abs() > 2)]
+    valid, report = validate(df, rules)
+    assert valid['a'].tolist() == [1] and report == {'negative a': 2, 'large a': 2}
+    assert validate(df, rules[:1], flag_rules=rules[1:])[0]['a'].tolist() == [1, 5]
@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dtype_helper_functions import MALFORMED_COLUMN, malformed_flag
+from missing_data_helper_functions import _as_mask
+
+# Column the quarantine file gives each row's reasons in, '; ' separated
+REASON_COLUMN = 'Reason'
+# Column the quarantine file marks rows flagged but kept in the output with
+KEPT_COLUMN = 'Kept'
+
+
+def _values(df, column):
+    return df[column].to_numpy('float64', na_value=np.nan)
+
+
+def missing(column):
+    """
+    Rule: rows where column is missing (blank, or malformed & set to missing by the cleaner)
+    """
+    return lambda df: df[column].isna()
+
+
+def malformed(column, column_types):
+    """
+    Rule: rows where the cleaner couldn't parse column's raw value (recorded in MALFORMED_COLUMN)
+    """
+    flag = malformed_flag(column, column_types)
+
+    def rule(df):
+        if MALFORMED_COLUMN not in df:
+            return False
+        return (df[MALFORMED_COLUMN].fillna(0).to_numpy('int64') & flag) != 0
+    return rule
+
+
+def outside_range(column, low, high):
+    """
+    Rule: rows where column is outside [low, high]. Missing values pass.
+    """
+    def rule(df):
+        values = _values(df, column)
+        return (values < low) | (values > high)
+    return rule
+
+
+def negative(column):
+    """
+    Rule: rows where column is below 0. Missing values pass.
+    """
+    return lambda df: _values(df, column) < 0
+
+
+def duplicated(keys):
+    """
+    Rule: every row but the first with the same keys. Rows missing a key are left to the missing rules.
+    Integer keys are packed into one int64 per row (the last key least significant) when their ranges fit, so a
+    clean table in key order (as exports are) is confirmed with one pass & any other clean table with one sort; rows
+    are only hashed to find which are duplicates when there are some.
+    """
+    def rule(df):
+        complete = np.ones(len(df), dtype=bool)
+        for key in keys:
+            complete &= df[key].notna().to_numpy()
+        if not complete.any():
+            return False
+        rows = slice(None) if complete.all() else complete
+        packed = None
+        radix = 1
+        for key in reversed(keys):
+            if not pd.api.types.is_integer_dtype(df[key].dtype):
+                return _as_mask(df[keys].duplicated() & complete, len(df))
+            value = df[key].to_numpy(na_value=0)[rows]
+            low = int(value.min())
+            width = int(value.max()) - low + 1
+            if radix * width >= 2 ** 62:
+                return _as_mask(df[keys].duplicated() & complete, len(df))
+            value = value.astype('int64') - low
+            if radix > 1:
+                value *= radix
+            if packed is None:
+                packed = value
+            else:
+                packed += value
+            radix *= width
+        if (packed[1:] > packed[:-1]).all():
+            return False
+        ordered = np.sort(packed)
+        if not (ordered[1:] == ordered[:-1]).any():
+            return False
+        mask = np.zeros(len(df), dtype=bool)
+        mask[complete] = pd.Series(packed, copy=False).duplicated().to_numpy()
+        return mask
+    return rule
+
+
+def write_quarantine(rows, path):
+    """
+    Writes quarantined rows (with their REASON_COLUMN) to a CSV, replacing the file of an earlier run so reruns
+    don't repeat rows
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    rows.to_csv(path, index=False)
+
+
+def _reasons(masks, selected):
+    reasons = np.full(int(selected.sum()), '', dtype=object)
+    for reason, mask in masks:
+        flagged = mask[selected]
+        reasons[flagged] = reasons[flagged] + reason + '; '
+    return [reason[:-2] for reason in reasons]
+
+
+def validate(df, rules, quarantine_path=None, flag_rules=()):
+    """
+    Applies (reason, rule) pairs, each rule a vectorized mask of the invalid rows. Invalid rows are dropped & written
+    to quarantine_path with their reasons, instead of stopping the run. Rows failing only flag_rules are written too
+    (with KEPT_COLUMN set) but kept, for values later stages handle as missing. Returns the valid rows (without the
+    cleaner's MALFORMED_COLUMN) & a per reason count. A clean frame is returned as it is.
+    """
+    invalid = np.zeros(len(df), dtype=bool)
+    flagged = np.zeros(len(df), dtype=bool)
+    masks = []
+    report = {}
+    for (reason, rule), is_flag in [(rule, False) for rule in rules] + [(rule, True) for rule in flag_rules]:
+        mask = _as_mask(rule(df), len(df))
+        report[reason] = int(np.count_nonzero(mask))
+        if report[reason]:
+            masks.append((reason, mask))
+            if is_flag:
+                flagged |= mask
+            else:
+                invalid |= mask
+    if MALFORMED_COLUMN in df:
+        df = df.drop(columns=MALFORMED_COLUMN)
+    if quarantine_path:
+        quarantined = invalid | flagged
+        rows = df[quarantined].copy()
+        rows[REASON_COLUMN] = _reasons(masks, quarantined)
+        rows[KEPT_COLUMN] = ~invalid[quarantined]
+        write_quarantine(rows, quarantine_path)
+    if not invalid.any():
+        return df, report
+    return df[~invalid].reset_index(drop=True), report